@@ -20,11 +20,11 @@
 #
 import os
 import re
-import copy
 import DV_Types  # pylint: disable=import-error
 from ctypes import (
     cdll, c_void_p, c_ubyte, c_double, c_uint,
-    c_longlong, c_bool, c_int, c_long
+    c_longlong, c_bool, c_int, c_long, c_size_t,
+    memmove, string_at
 )
 
 # load the *getset.so in this folder
@@ -58,6 +58,13 @@ GetBufferByte = JMP.GetBufferByte
 GetBufferByte.restype = c_ubyte
 # Write to buffer
 SetBufferByte = JMP.SetBufferByte
+# Read the whole encoded stream in one call
+GetBuffer = JMP.GetBuffer
+GetBuffer.restype = c_size_t
+GetBuffer.argtypes = [c_void_p, c_void_p, c_size_t]
+# Write the whole stream in one call
+SetBuffer = JMP.SetBuffer
+SetBuffer.argtypes = [c_void_p, c_void_p, c_size_t]
 
 # Create pErr space for Encoders - i.e. sizeof(int)
 CreateInstanceOf_int = JMP.CreateInstanceOf_int
@@ -70,9 +77,16 @@ class AsnCoderError(Exception):
     pass
 
 
+# Memo of CleanNameAsPythonWants (functools.lru_cache is not in Python 2)
+g_cleanNames = {}
+
+
 def CleanNameAsPythonWants(name):
     """ASN.1 ids have minuses... turn non-ID chars to '_'"""
-    return re.sub(r'[^a-zA-Z0-9_]', '_', name)
+    cleanName = g_cleanNames.get(name)
+    if cleanName is None:
+        cleanName = g_cleanNames[name] = re.sub(r'[^a-zA-Z0-9_]', '_', name)
+    return cleanName
 Clean = CleanNameAsPythonWants
 
 
@@ -82,6 +96,87 @@ def myassert(b):
         raise AsnCoderError("Assertion failed...")
 
 
+# ctypes result types of the getters, per C type in DV_Types.funcTypeLookup
+cTypesResultTypes = {
+    'asn1SccSint': c_longlong,
+    'byte': c_ubyte,
+    'double': c_double,
+    'flag': c_bool,
+    'int': c_int,
+    'long': c_long
+}
+
+# The bridge functions used so far, resolved and configured only once.
+# They are fetched with JMP[name] (and not getattr) so each one is a
+# private function object - setting its restype affects no one else.
+g_getters = {}
+g_setters = {}
+g_constructors = {}
+# The capacity of the OCTET STRINGs, per access path
+g_bufferSizes = {}
+
+
+def GetterFor(typeName, accessor, postfix):
+    """Returns the C getter for the access path, as a callable(ptr, *params)"""
+    key = (typeName, accessor, postfix)
+    getter = g_getters.get(key)
+    if getter is None:
+        bridgeFuncName = Clean(typeName) + "_" + accessor + "_Get" + postfix
+        if bridgeFuncName not in DV_Types.funcTypeLookup:
+            raise AsnCoderError("Function %s not found in lookup - contact support." % bridgeFuncName)
+        resType = DV_Types.funcTypeLookup[bridgeFuncName]
+        if resType.endswith('*'):
+            cTypesResultType = c_void_p
+        else:
+            cTypesResultType = cTypesResultTypes.get(resType, None)
+            if cTypesResultType is None:
+                raise AsnCoderError("Result type of %s not yet supported in the Python mapper - contact support." % resType)
+        getter = JMP[bridgeFuncName]
+        getter.restype = cTypesResultType
+        g_getters[key] = getter
+    return getter
+
+
+def SetterFor(typeName, accessor, postfix):
+    """Returns the C setter for the access path, as a callable(ptr, params, value)"""
+    key = (typeName, accessor, postfix)
+    setter = g_setters.get(key)
+    if setter is None:
+        bridgeFunc = JMP[Clean(typeName) + "_" + accessor + "_Set" + postfix]
+
+        def setter(ptr, params, value):
+            if isinstance(value, float):
+                value = c_double(value)
+            elif isinstance(value, int):
+                value = c_longlong(value)
+            bridgeFunc(ptr, *(tuple(params) + (value,)))
+        g_setters[key] = setter
+    return setter
+
+
+def ConstructorFor(typeName):
+    constructor = g_constructors.get(typeName)
+    if constructor is None:
+        constructor = JMP["CreateInstanceOf_" + Clean(typeName)]
+        constructor.restype = c_void_p
+        g_constructors[typeName] = constructor
+    return constructor
+
+
+def ToPyString(data):
+    """The "Python string" of GetPyString: the bytes themselves under
+Python 2, and one char per byte (i.e. latin-1) under Python 3"""
+    return data if bytes is str else data.decode('latin-1')
+
+
+def FromPyString(data):
+    """The reverse of ToPyString - byte strings, bytearrays and memoryviews
+are used as they are"""
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return data
+    return data.encode('latin-1')
+
+
 class DataStream(object):
     """ASN1SCC BitStream equivalent"""
     def __init__(self, bufferSize):
@@ -98,28 +193,32 @@ class DataStream(object):
         """Rewinds the currentByte and currentBit to the start"""
         ResetStream(self._bs)
 
+    def GetBuffer(self):
+        """Returns the encoded data as a bytearray (copied in a single call)"""
+        data = bytearray(GetStreamCurrentLength(self._bs))
+        if data:
+            GetBuffer(self._bs, (c_ubyte * len(data)).from_buffer(data), len(data))
+        return data
+
+    def SetBuffer(self, data):
+        """Sets the data to decode from bytes, a bytearray or a memoryview
+(copied in a single call)"""
+        length = len(data)
+        myassert(self._bufferSize >= length)
+        if not isinstance(data, bytes):
+            view = memoryview(data)
+            # (Python 2's ctypes can't wrap a memoryview)
+            data = view.tobytes() if view.readonly or bytes is str else (c_ubyte * length).from_buffer(view)
+        SetBuffer(self._bs, data, length)
+
     def GetPyString(self):
-        # print "Reading",
-        msg = ""
-        pData = c_void_p(GetBitstreamBuffer(self._bs))
-        for i in range(0, GetStreamCurrentLength(self._bs)):
-            b = GetBufferByte(pData, i)
-            msg += chr(b)
-            # print b, ",",
-        # print "EOF"
-        return msg
+        """Compatibility wrapper over GetBuffer - one char per byte
+(a byte string under Python 2, as always)"""
+        return ToPyString(bytes(self.GetBuffer()))
 
     def SetFromPyString(self, data):
-        strLength = len(data)
-        assert self._bufferSize >= strLength
-        self._bs.count = strLength
-        pData = c_void_p(GetBitstreamBuffer(self._bs))
-        # print "Writing",
-        for i in range(0, strLength):
-            b = ord(data[i])
-            # print b, ",",
-            SetBufferByte(pData, i, b)
-        # print "EOF"
+        """Compatibility wrapper over SetBuffer - one char per byte"""
+        self.SetBuffer(FromPyString(data))
 
 
 class COMMON(object):
@@ -138,25 +237,31 @@ We do two things to cope:
 
 (1) we form the equivalent path to the C getter/setter function
     (in self._Caccessor)
-(2) we form a list of params, which is basically the indexes of
+(2) we form a tuple of params, which is basically the indexes of
     whatever arrays we meet in the access path
 
 So if the script does...
 
     a.x.y[0].z.k[2].w.Get()
 
-then the params list carries [0,2], to pass it as an argument to the
+then the params tuple carries (0,2), to pass it as an argument to the
 C getter when it is called (in response to the "Get" method call).
 
+All the parts of the path (the C accessor, the params and the steps
+of the access path, used in error messages) are immutable: GetState
+returns them as they are, and SetState/Reset(state) can restore them
+at no cost - no matter how often a walker goes back to a saved spot.
+
 Some key points:
     When the chain ends (in a .Get, .Set, .GetLength or .SetLength
 call), we have to reset the "paths" we have formed, so that the
 next chain will restart from the beginning. That's what the Reset
 method does.
 However, we also have some helper functions for OCTET STRINGs:
-GetPyString and SetFromPyString. These have to do a per-byte loop,
-and if they used the "Get" and "Set" as they originally were,
-the path would be reset after accessing the [0] element...
+GetPyString and SetFromPyString. These need both the length and
+the address of the data (to copy all the bytes in one go), and
+if they used the "Get" and "Set" as they originally were, the
+path would be reset after reading the length...
 So we added a keyword boolean param called "reset", which disables
 this Reset when it is used from within GetPyString and
 SetFromPyString.
@@ -184,25 +289,33 @@ An example for SetLength:
         myassert(isinstance(nodeTypeName, str))
         self._nodeTypeName = nodeTypeName
         self._new_ptr = ptr is None
-        constructor = getattr(JMP, "CreateInstanceOf_" + Clean(nodeTypeName))
-        constructor.restype = c_void_p
-        self._ptr = ptr or constructor()
+        self._ptr = ptr or ConstructorFor(nodeTypeName)()
         self._ptr = c_void_p(self._ptr)
         self._pErr = c_void_p(CreateInstanceOf_int())
         self._Caccessor = ""
-        self._params = []
-        self._accessPath = ""
+        self._params = ()
+        self._accessPath = ()
 
     def Reset(self, state=None):
         if state is None:
             self._Caccessor = ""
-            self._params = []
-            self._accessPath = ""
+            self._params = ()
+            self._accessPath = ()
         else:
-            self._Caccessor, self._params, self._accessPath = state[0][:], copy.deepcopy(state[1]), state[2][:]
+            self._Caccessor, self._params, self._accessPath = state
 
     def GetState(self):
-        return self._Caccessor[:], copy.deepcopy(self._params), self._accessPath[:]
+        """Returns a token for the current access path, for SetState"""
+        return self._Caccessor, self._params, self._accessPath
+
+    def SetState(self, state):
+        """Goes back to an access path returned by GetState"""
+        self._Caccessor, self._params, self._accessPath = state
+
+    def AccessPath(self):
+        return "".join(
+            "." + step if isinstance(step, str) else "[" + str(step) + "]"
+            for step in self._accessPath)
 
     def SetData(self, src):
         bridgeFct = getattr(JMP, "SetDataFor_" + Clean(self._nodeTypeName))
@@ -220,7 +333,7 @@ An example for SetLength:
 
     def __getattr__(self, x):
         self._Caccessor += "_" + Clean(x)
-        self._accessPath += "." + x
+        self._accessPath += (x,)
         return self
 
     def __setattr__(self, name, value):
@@ -231,34 +344,16 @@ An example for SetLength:
 
     def __getitem__(self, idx):
         self._Caccessor += "_iDx"
-        self._params.append(idx)
-        self._accessPath += "[" + str(idx) + "]"
+        self._params += (idx,)
+        self._accessPath += (idx,)
         return self
 
     def Get(self, **args):  # postfix="", reset=True
         try:
-            bridgeFuncName = Clean(self._nodeTypeName) + "_" + self._Caccessor + "_Get" + args.get("postfix", "")
-            if bridgeFuncName not in DV_Types.funcTypeLookup:
-                raise AsnCoderError("Function %s not found in lookup - contact support." % bridgeFuncName)
-            resType = DV_Types.funcTypeLookup[bridgeFuncName]
-            if resType.endswith('*'):
-                cTypesResultType = c_void_p
-            else:
-                cTypesResultType = {
-                    'asn1SccSint': c_longlong,
-                    'byte': c_ubyte,
-                    'double': c_double,
-                    'flag': c_bool,
-                    'int': c_int,
-                    'long': c_long
-                }.get(resType, None)
-                if cTypesResultType is None:
-                    raise AsnCoderError("Result type of %s not yet supported in the Python mapper - contact support." % resType)
-            bridgeFunc = getattr(JMP, bridgeFuncName)
-            bridgeFunc.restype = cTypesResultType
-            retVal = bridgeFunc(self._ptr, *self._params)
+            getter = GetterFor(self._nodeTypeName, self._Caccessor, args.get("postfix", ""))
+            retVal = getter(self._ptr, *self._params)
         except:
-            oldAP = self._accessPath
+            oldAP = self.AccessPath()
             if args.get("reset", True):
                 self.Reset()
             raise AsnCoderError("The access path you used (%s) is not valid." % oldAP)
@@ -268,19 +363,10 @@ An example for SetLength:
 
     def Set(self, value, **args):  # postfix="", reset=True
         try:
-            # print Clean(self._nodeTypeName) + "_" + self._Caccessor + "_Set"+postfix
-            bridgeFunc = getattr(JMP, Clean(self._nodeTypeName) + "_" + self._Caccessor + "_Set" + args.get("postfix", ""))
-            if isinstance(value, float):
-                ctypesValue = c_double(value)
-            elif isinstance(value, int):
-                ctypesValue = c_longlong(value)
-            else:
-                ctypesValue = value
-            self._params.append(ctypesValue)
-            bridgeFunc(self._ptr, *self._params)
-            self._params.pop()
+            setter = SetterFor(self._nodeTypeName, self._Caccessor, args.get("postfix", ""))
+            setter(self._ptr, self._params, value)
         except Exception as e:
-            oldAP = self._accessPath
+            oldAP = self.AccessPath()
             if args.get("reset", True):
                 self.Reset()
             raise AsnCoderError(
@@ -346,27 +432,44 @@ grep for the errorcode value inside ASN1SCC generated headers."""
 
 # OCTET STRING
 
+    def OctetStringGet(self, postfix):
+        try:
+            getter = GetterFor(self._nodeTypeName, self._Caccessor, postfix)
+            return getter(self._ptr, *self._params)
+        except Exception:
+            oldAP = self.AccessPath()
+            self.Reset()
+            raise AsnCoderError("The access path you used (%s) is not an OCTET STRING." % oldAP)
+
+    def GetBufferAddress(self):
+        return self.OctetStringGet("Buffer")
+
+    def GetBufferSize(self):
+        key = (self._nodeTypeName, self._Caccessor)
+        size = g_bufferSizes.get(key)
+        if size is None:
+            size = g_bufferSizes[key] = self.OctetStringGet("BufferSize")
+        return size
+
     def SetFromPyString(self, src):
+        src = FromPyString(src)
         strLength = len(src)
+        maxLength = self.GetBufferSize()
+        if strLength > maxLength:
+            oldAP = self.AccessPath()
+            self.Reset()
+            raise AsnCoderError(
+                "The string you tried to assign (%d bytes) doesn't fit in %s (at most %d bytes)." % (
+                    strLength, oldAP, maxLength))
         self.SetLength(strLength, False)
-        self._Caccessor += "_iDx"
-        accessPath = self._accessPath
-        for idx in range(0, strLength):
-            self._params.append(idx)
-            self._accessPath = accessPath + "[" + str(idx) + "]"
-            self.Set(ord(src[idx]), reset=False)
-            self._params.pop()
+        if strLength:
+            if not isinstance(src, bytes):
+                src = memoryview(src).tobytes()
+            memmove(self.GetBufferAddress(), src, strLength)
         self.Reset()
 
     def GetPyString(self):
-        retval = ""
         strLength = self.GetLength(False)
-        self._Caccessor += "_iDx"
-        accessPath = self._accessPath
-        for idx in range(0, strLength):
-            self._params.append(idx)
-            self._accessPath = accessPath + "[" + str(idx) + "]"
-            retval += chr(self.Get(reset=False))
-            self._params.pop()
+        retval = ToPyString(string_at(self.GetBufferAddress(), strLength) if strLength else b"")
         self.Reset()
         return retval
@@ -88,6 +88,8 @@ def OnStartup(unused_modelingLanguage: str, asnFile: str, outputDir: str, badTyp
     g_outputGetSetH.write('byte *GetBitstreamBuffer(BitStream *pBitStrm);\n')
     g_outputGetSetH.write('byte GetBufferByte(byte *p, size_t off);\n')
     g_outputGetSetH.write('void SetBufferByte(byte *p, size_t off, byte b);\n')
+    g_outputGetSetH.write('size_t GetBuffer(BitStream *pBitStrm, byte *dest, size_t maxLength);\n')
+    g_outputGetSetH.write('void SetBuffer(BitStream *pBitStrm, const byte *src, size_t length);\n')
     g_outputGetSetH.write('void ResetStream(BitStream *pStrm);\n')
     g_outputGetSetH.write('BitStream *CreateStream(size_t bufferSize);\n')
     g_outputGetSetH.write('void DestroyStream(BitStream *pBitStrm);\n\n')
@@ -112,6 +114,21 @@ def OnStartup(unused_modelingLanguage: str, asnFile: str, outputDir: str, badTyp
     g_outputGetSetC.write('    assert(p);\n')
     g_outputGetSetC.write('    p[off] = b;\n')
     g_outputGetSetC.write('}\n\n')
+    # Bulk versions of GetBufferByte/SetBufferByte: a single FFI call
+    # moves the whole encoded message to/from the Python side
+    g_outputGetSetC.write('size_t GetBuffer(BitStream *pBitStrm, byte *dest, size_t maxLength) {\n')
+    g_outputGetSetC.write('    size_t length = GetStreamCurrentLength(pBitStrm);\n')
+    g_outputGetSetC.write('    assert(dest);\n')
+    g_outputGetSetC.write('    if (length > maxLength)\n')
+    g_outputGetSetC.write('        length = maxLength;\n')
+    g_outputGetSetC.write('    memcpy(dest, pBitStrm->buf, length);\n')
+    g_outputGetSetC.write('    return length;\n')
+    g_outputGetSetC.write('}\n\n')
+    g_outputGetSetC.write('void SetBuffer(BitStream *pBitStrm, const byte *src, size_t length) {\n')
+    g_outputGetSetC.write('    assert(src);\n')
+    g_outputGetSetC.write('    assert(length <= (size_t)pBitStrm->count);\n')
+    g_outputGetSetC.write('    memcpy(pBitStrm->buf, src, length);\n')
+    g_outputGetSetC.write('}\n\n')
     g_outputGetSetC.write('void ResetStream(BitStream *pStrm) {\n')
     g_outputGetSetC.write('    assert(pStrm);\n')
     g_outputGetSetC.write('    assert(pStrm->count > 0);\n')
@@ -217,7 +234,7 @@ clean:
 
     retTypes = {}
     for line in open(outputDir + "%s_getset.c" % base):
-        if any(x in line for x in ['_Get(', '_GetLength']):
+        if any(x in line for x in ['_Get(', '_GetLength', '_GetBuffer']):
             retType, funcName = line.split()[0:2]
             funcName = funcName.split('(')[0]
             retTypes[funcName] = retType
@@ -255,7 +272,7 @@ def OnChoice(unused_nodeTypename: str, unused_node: AsnChoice, unused_leafTypeDi
 
 
 def OnShutdown(unused_badTypes: SetOfBadTypenames) -> None:
-    pass
+    g_outputFile.close()
 
 
 class Params(object):
@@ -329,6 +346,19 @@ def CommonBaseImpl(comment: str,
         g_outputGetSetC.write("}\n")
 
 
+def CommonBaseImplConstant(comment: str,
+                           ctype: str,
+                           path: str,
+                           params: Params,
+                           value: int,
+                           postfix: str) -> None:
+    g_outputGetSetH.write("\n/* %s */\n%s %s_Get%s(%s);\n" % (comment, ctype, path, postfix, params.GetDecl()))
+    g_outputGetSetC.write("\n/* %s */\n%s %s_Get%s(%s)\n" % (comment, ctype, path, postfix, params.GetDecl()))
+    g_outputGetSetC.write("{\n")
+    g_outputGetSetC.write("    return " + str(value) + ";\n")
+    g_outputGetSetC.write("}\n")
+
+
 # def CommonBaseImplSequenceFixed(comment, ctype, path, params, accessPathInC, node, postfix = ""):
 def CommonBaseImplSequenceFixed(comment: str,
                                 ctype: str,
@@ -377,6 +407,9 @@ def CreateGettersAndSetters(
         params.AddParam('int', "iDx", leafTypeDict)
         CommonBaseImpl("OCTETSTRING_bytes", "byte", path + "_iDx", params, accessPathInC + (".arr[" + params._vars[-1] + "]"), "")
         params.Pop()
+        # Address and capacity of the data, for bulk copies (GetPyString/SetFromPyString)
+        CommonBaseImpl("OCTETSTRING_buffer", "byte*", path, params, accessPathInC + ".arr[0]", "Buffer", returnPointer=True)
+        CommonBaseImplConstant("OCTETSTRING_capacity", "long", path, params, node._range[-1], "BufferSize")
     elif isinstance(node, AsnEnumerated):
         CommonBaseImpl("ENUMERATED", "int", path, params, accessPathInC)
     elif isinstance(node, (AsnSequence, AsnSet, AsnChoice)):
@@ -104,7 +104,7 @@ def OnChoice(unused_nodeTypename: str, unused_node: AsnChoice, unused_leafTypeDi
 
 
 def OnShutdown(unused_badTypes: SetOfBadTypenames) -> None:
-    pass
+    g_outputFile.close()
 
 
 def MapInteger(node: AsnInt) -> str:
@@ -360,5 +360,6 @@ def OnSetOf(nodeTypename: str, node: AsnSequenceOrSetOf, leafTypeDict: AST_Leaft
 
 def OnShutdown(unused_badTypes: SetOfBadTypenames) -> None:
     g_outputFile.write(g_doc.toprettyxml(indent="    ", encoding="UTF-8"))
+    g_outputFile.close()
 
 # vim: tabstop=8 expandtab shiftwidth=4 softtabstop=4
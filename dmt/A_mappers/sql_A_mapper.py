@@ -23,8 +23,9 @@ code generator A.'''
 
 import os
 import re
+import heapq
 
-from typing import List, Union, Set, IO, Any  # NOQA pylint: disable=unused-import
+from typing import List, Union, Set, IO, Any, Dict, Tuple  # NOQA pylint: disable=unused-import
 
 from ..commonPy.asnAST import (
     AsnMetaMember, AsnChoice, AsnSet, AsnSequence, AsnSequenceOf, AsnSetOf,
@@ -292,6 +293,78 @@ def CreateChoice(nodeTypename: str, node: AsnChoice, leafTypeDict: AST_Leaftypes
 g_bShutdownRun = False
 
 
+def DependencyOrder(
+        typenameList: List[str],
+        dependencyGraph: Dict[str, Dict[str, int]]) -> List[str]:  # pylint: disable=invalid-sequence-index
+    '''
+    Returns the types of typenameList ordered so that each one comes
+    after the ones it depends on (Kahn's algorithm).
+
+    The types that are ready to be emitted are kept in a heap, keyed by
+    (sweep, index in typenameList): this is the order in which they were
+    emitted when the list was repeatedly swept for types with no pending
+    dependencies - so the generated SQL stays the same.
+    '''
+    position = {t: i for i, t in enumerate(typenameList)}
+    pending = {}  # type: Dict[str, int]
+    dependents = {}  # type: Dict[str, List[str]]
+    for nodeTypename in typenameList:
+        dependencies = dependencyGraph.get(nodeTypename, {})
+        pending[nodeTypename] = len(dependencies)
+        for dependency in dependencies:
+            dependents.setdefault(dependency, []).append(nodeTypename)
+    ready = [(0, position[t]) for t in typenameList if pending[t] == 0]
+    result = []  # type: List[str]
+    while ready:
+        sweep, idx = heapq.heappop(ready)
+        nodeTypename = typenameList[idx]
+        result.append(nodeTypename)
+        for dependent in dependents.get(nodeTypename, []):
+            pending[dependent] -= 1
+            if pending[dependent] == 0:
+                otherIdx = position[dependent]
+                heapq.heappush(ready, (sweep if otherIdx > idx else sweep + 1, otherIdx))
+
+    blocked = [t for t in typenameList if pending[t] != 0]
+    if blocked:
+        cycle = FindCycle(blocked, dependencyGraph)
+        if cycle:
+            panic("SQL_A_mapper: circular type dependency: %s" % " -> ".join(cycle))
+        warn("SQL_A_mapper: no tables will be created for types depending on skipped ones: %s" %
+             ", ".join(blocked))
+    return result
+
+
+def FindCycle(
+        typenames: List[str],
+        dependencyGraph: Dict[str, Dict[str, int]]) -> List[str]:  # pylint: disable=invalid-sequence-index
+    '''Returns a dependency cycle among typenames (as a path that starts and ends
+    at the same type) or an empty list if there's none.'''
+    candidates = set(typenames)
+    visited = set()  # type: Set[str]
+    for start in typenames:
+        if start in visited:
+            continue
+        # Iterative DFS - the path holds the types currently being explored
+        path = [start]
+        onPath = {start: 0}
+        stack = [iter(sorted(dependencyGraph.get(start, {})))]
+        visited.add(start)
+        while stack:
+            dependency = next(stack[-1], None)
+            if dependency is None:
+                stack.pop()
+                del onPath[path.pop()]
+            elif dependency in onPath:
+                return path[onPath[dependency]:] + [dependency]
+            elif dependency in candidates and dependency not in visited:
+                visited.add(dependency)
+                onPath[dependency] = len(path)
+                path.append(dependency)
+                stack.append(iter(sorted(dependencyGraph.get(dependency, {}))))
+    return []
+
+
 def OnShutdown(badTypes: SetOfBadTypenames) -> None:
     global g_bShutdownRun
     if g_bShutdownRun:
@@ -303,56 +376,28 @@ def OnShutdown(badTypes: SetOfBadTypenames) -> None:
         g_outputDir + os.sep + g_uniqueStringOfASN1files + ".sql", 'w')
     d = g_asnFiles if isinstance(g_asnFiles, str) else '","'.join(g_asnFiles)
     g_sqlOutput.write('--  SQL statements for types used in "%s"\n' % d)
-    typenameList = []  # type: List[str]
-    for nodeTypename in sorted(list(g_innerTypes) + list(g_names.keys())):
-        if nodeTypename in badTypes:
-            continue
-        if nodeTypename not in typenameList:
-            typenameList.append(nodeTypename)
-    typesDoneSoFar = set()  # type: Set[str]
-
-    workRemains = True
-    while workRemains:
-        workRemains = False
-        for nodeTypename in typenameList:
-
-            # only emit for types with no more dependencies
-            if nodeTypename in g_dependencyGraph and \
-                    g_dependencyGraph[nodeTypename]:
-                continue
-
-            # only emit each type once
-            if nodeTypename in typesDoneSoFar:
-                continue
-            typesDoneSoFar.add(nodeTypename)
-
-            # if we process even one type, deps may be removed,
-            # so scan again next time
-            workRemains = True
-
-            # make sure we know what leaf type this node is
-            node = g_names[nodeTypename]
-            assert nodeTypename in g_leafTypeDict
-            leafType = g_leafTypeDict[nodeTypename]
-            if isinstance(node, AsnBasicNode):
-                CreateBasic(nodeTypename, node, g_leafTypeDict)
-            elif isinstance(node, (AsnSequence, AsnSet)):
-                CreateSequence(nodeTypename, node, g_leafTypeDict)
-            elif isinstance(node, AsnChoice):
-                CreateChoice(nodeTypename, node, g_leafTypeDict)
-            elif isinstance(node, (AsnSequenceOf, AsnSetOf)):
-                CreateSequenceOf(nodeTypename, node, g_leafTypeDict)
-            elif isinstance(node, AsnEnumerated):
-                CreateEnumerated(nodeTypename, node, g_leafTypeDict)
-            else:  # pragma: no cover
-                warn("Ignoring unsupported node type: %s (%s)" % (
-                    leafType, nodeTypename))  # pragma: no cover
-
-            # eliminate nodeTypename from dependency lists
-            for t in typenameList:
-                if t in g_dependencyGraph and \
-                        nodeTypename in g_dependencyGraph[t]:
-                    del g_dependencyGraph[t][nodeTypename]
+    typenameList = [
+        nodeTypename
+        for nodeTypename in sorted(set(g_innerTypes) | set(g_names.keys()))
+        if nodeTypename not in badTypes]
+    for nodeTypename in DependencyOrder(typenameList, g_dependencyGraph):
+        # make sure we know what leaf type this node is
+        node = g_names[nodeTypename]
+        assert nodeTypename in g_leafTypeDict
+        leafType = g_leafTypeDict[nodeTypename]
+        if isinstance(node, AsnBasicNode):
+            CreateBasic(nodeTypename, node, g_leafTypeDict)
+        elif isinstance(node, (AsnSequence, AsnSet)):
+            CreateSequence(nodeTypename, node, g_leafTypeDict)
+        elif isinstance(node, AsnChoice):
+            CreateChoice(nodeTypename, node, g_leafTypeDict)
+        elif isinstance(node, (AsnSequenceOf, AsnSetOf)):
+            CreateSequenceOf(nodeTypename, node, g_leafTypeDict)
+        elif isinstance(node, AsnEnumerated):
+            CreateEnumerated(nodeTypename, node, g_leafTypeDict)
+        else:  # pragma: no cover
+            warn("Ignoring unsupported node type: %s (%s)" % (
+                leafType, nodeTypename))  # pragma: no cover
 
     g_sqlOutput.close()
 
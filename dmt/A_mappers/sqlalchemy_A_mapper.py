@@ -209,6 +209,7 @@ class {cleanTypename}_SQL(Base):
     __table_args__ = (UniqueConstraint('iid'),)
     iid = Column(Integer, primary_key=True)
     data = Column({baseSqlType}{constraint})
+    _eagerRelations = ()
 '''.format(cleanTypename=cleanTypename,
            baseSqlType=baseSqlType,
            constraint=constraint))
@@ -220,19 +221,25 @@ class {cleanTypename}_SQL(Base):
         setter = "SetFromPyString"
 
     g_sqlalchemyOutput.write('''
+    _cache = None
+
     @staticmethod
     def loadFromDB(session, iid):
-        return session.query(
-            {cleanTypename}_SQL).filter({cleanTypename}_SQL.iid == iid).first()
+        return session.query({cleanTypename}_SQL).options(
+            *eagerLoadOptions({cleanTypename}_SQL)).filter(
+                {cleanTypename}_SQL.iid == iid).first()
+
+    @staticmethod
+    def loadManyFromDB(session, iids):
+        return loadManyFromDB(session, {cleanTypename}_SQL, iids)
 
     @property
     def asn1(self):
-        if hasattr(self, "_cache"):
-            return self._cache
-        pyObj = {cleanTypename}()
-        self.assignToASN1object(pyObj)
-        self._cache = pyObj
-        return pyObj
+        if self._cache is None:
+            pyObj = {cleanTypename}()
+            self.assignToASN1object(pyObj)
+            self._cache = pyObj
+        return self._cache
 
     def assignToASN1object(self, pyObj):
         pyObj.{setter}(self.data)
@@ -240,9 +247,12 @@ class {cleanTypename}_SQL(Base):
     def __init__(self, pyObj):
         self.data = pyObj.{getter}()
 
-    def save(self, session):
+    def save(self, session, commit=True):
         session.add(self)
-        session.commit()
+        if commit:
+            session.commit()
+        else:
+            session.flush()
         return self.iid
 
 '''.format(setter=setter, getter=getter,
@@ -288,31 +298,43 @@ class {cleanTypename}_SQL(Base):
     __tablename__ = '{cleanTypename}'
     __table_args__ = (UniqueConstraint('iid'),)
     iid = Column(Integer, primary_key=True)
+    _eagerRelations = ({eagerRelations})
 {choiceField}
+    _cache = None
+
     @staticmethod
     def loadFromDB(session, iid):
-        return session.query(
-            {cleanTypename}_SQL).filter({cleanTypename}_SQL.iid == iid).first()
+        return session.query({cleanTypename}_SQL).options(
+            *eagerLoadOptions({cleanTypename}_SQL)).filter(
+                {cleanTypename}_SQL.iid == iid).first()
+
+    @staticmethod
+    def loadManyFromDB(session, iids):
+        return loadManyFromDB(session, {cleanTypename}_SQL, iids)
 
     @property
     def asn1(self):
-        if hasattr(self, "_cache"):
-            return self._cache
-        pyObj = {cleanTypename}()
-        self.assignToASN1object(pyObj)
-        self._cache = pyObj
-        return pyObj
+        if self._cache is None:
+            pyObj = {cleanTypename}()
+            self.assignToASN1object(pyObj)
+            self._cache = pyObj
+        return self._cache
 
     def assignToASN1object(self, pyObj):
         state = pyObj.GetState()
         {assignMembers}
         pyObj.Reset(state)
 
-    def save(self, session):
+    def save(self, session, commit=True):
         session.add(self)
-        session.commit()
+        if commit:
+            session.commit()
+        else:
+            session.flush()
         return self.iid
 '''.format(cleanTypename=cleanTypename, choiceField=choiceField,
+           eagerRelations="".join(
+               "'" + CleanName(c[0]) + "', " for c in node._members).rstrip(),
            assignMembers="\n        ".join(memberAssignments)))
 
     nullable = "True" if isChoice else "False"
@@ -383,20 +405,27 @@ class {cleanTypename}_SQL(Base):
     {constants}
     iid = Column(Integer, primary_key=True)
     data = Column(Integer, CheckConstraint('{constraint}'), nullable=False)
+    _eagerRelations = ()
+
+    _cache = None
 
     @staticmethod
     def loadFromDB(session, iid):
-        return session.query(
-            {cleanTypename}_SQL).filter({cleanTypename}_SQL.iid == iid).first()
+        return session.query({cleanTypename}_SQL).options(
+            *eagerLoadOptions({cleanTypename}_SQL)).filter(
+                {cleanTypename}_SQL.iid == iid).first()
+
+    @staticmethod
+    def loadManyFromDB(session, iids):
+        return loadManyFromDB(session, {cleanTypename}_SQL, iids)
 
     @property
     def asn1(self):
-        if hasattr(self, "_cache"):
-            return self._cache
-        pyObj = {cleanTypename}()
-        self.assignToASN1object(pyObj)
-        self._cache = pyObj
-        return pyObj
+        if self._cache is None:
+            pyObj = {cleanTypename}()
+            self.assignToASN1object(pyObj)
+            self._cache = pyObj
+        return self._cache
 
     def assignToASN1object(self, pyObj):
         pyObj.Set(self.data)
@@ -404,9 +433,12 @@ class {cleanTypename}_SQL(Base):
     def __init__(self, pyObj):
         self.data = pyObj.Get()
 
-    def save(self, session):
+    def save(self, session, commit=True):
         session.add(self)
-        session.commit()
+        if commit:
+            session.commit()
+        else:
+            session.flush()
         return self.iid
 
 '''.format(cleanTypename=CleanName(nodeTypename),
@@ -446,10 +478,14 @@ class {cleanTypename}_indexes_SQL(Base):
     data = relationship(
         "{reftype}_SQL",
         foreign_keys=[fk_{reftype}_iid])
+    _eagerRelations = ('data',)
 
-    def save(self, session):
+    def save(self, session, commit=True):
         session.add(self)
-        session.commit()
+        if commit:
+            session.commit()
+        else:
+            session.flush()
         return self.iid
 '''.format(reftype=reftype,
            cleanTypename=cleanTypename,
@@ -466,20 +502,27 @@ class {cleanTypename}_indexes_SQL(Base):
 class {cleanTypename}_SQL(Base):
     __tablename__ = '{cleanTypename}'
     iid = Column(Integer, primary_key=True)
+    _eagerRelations = ('arrIndexes_{cleanTypename}',)
+
+    _cache = None
 
     @staticmethod
     def loadFromDB(session, iid):
-        return session.query(
-            {cleanTypename}_SQL).filter({cleanTypename}_SQL.iid == iid).first()
+        return session.query({cleanTypename}_SQL).options(
+            *eagerLoadOptions({cleanTypename}_SQL)).filter(
+                {cleanTypename}_SQL.iid == iid).first()
+
+    @staticmethod
+    def loadManyFromDB(session, iids):
+        return loadManyFromDB(session, {cleanTypename}_SQL, iids)
 
     @property
     def asn1(self):
-        if hasattr(self, "_cache"):
-            return self._cache
-        pyObj = {cleanTypename}()
-        self.assignToASN1object(pyObj)
-        self._cache = pyObj
-        return pyObj
+        if self._cache is None:
+            pyObj = {cleanTypename}()
+            self.assignToASN1object(pyObj)
+            self._cache = pyObj
+        return self._cache
 
     def assignToASN1object(self, pyObj):
         state = pyObj.GetState()
@@ -489,18 +532,21 @@ class {cleanTypename}_SQL(Base):
             idxObj.data.assignToASN1object(pyObj[idxObj.idx])
         pyObj.Reset(state)
 
-    def save(self, session):
+    def save(self, session, commit=True):
         session.add(self)
         for c in self._children:
             session.add(c[0])
             session.add(c[1])
-        session.commit()
+        if commit:
+            session.commit()
+        else:
+            session.flush()
         return self.iid
 
     def __init__(self, pyObj):
         self._children = []
         state = pyObj.GetState()
-        for i in xrange(pyObj.GetLength()):
+        for i in range(pyObj.GetLength()):
             pyObj.Reset(state)
             newIndex = {cleanTypename}_indexes_SQL()
             newIndex.idx = i
@@ -550,7 +596,10 @@ Base = declarative_base()
 
 from sqlalchemy import (Column, Integer, String, Boolean, Float,
                         ForeignKey, CheckConstraint, UniqueConstraint)
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, selectinload
+from sqlalchemy import inspect
+
+from itertools import islice
 
 from {d_cleaned} import (
     {types}
@@ -558,6 +607,76 @@ from {d_cleaned} import (
 
 import DV
 
+
+# The loader options of each _SQL class, computed on first use
+g_eagerLoadOptions = {{}}
+
+
+def eagerLoadOptions(cls, parentLoader=None):
+    """
+    Returns the options that make a query for cls load the whole tree
+    of rows under it (fields, SEQUENCE OF cells, their contents...)
+    with one SELECT ... IN per relationship, instead of lazily issuing
+    one query per row as the ASN.1 value is rebuilt.
+    """
+    if parentLoader is None and cls in g_eagerLoadOptions:
+        return g_eagerLoadOptions[cls]
+    options = []
+    for relation in cls._eagerRelations:
+        attribute = getattr(cls, relation)
+        if parentLoader is None:
+            loader = selectinload(attribute)
+        else:
+            loader = parentLoader.selectinload(attribute)
+        options.append(loader)
+        options.extend(eagerLoadOptions(attribute.property.mapper.class_, loader))
+    if parentLoader is None:
+        g_eagerLoadOptions[cls] = options
+    return options
+
+
+def loadManyFromDB(session, cls, iids, chunkSize=500):
+    """
+    Loads the cls rows with the given iids - and all the rows under them -
+    with a fixed number of queries per chunkSize iids. Returns them in
+    the order of iids (None for the ones that don't exist).
+    """
+    iids = list(iids)
+    found = {{}}
+    for i in range(0, len(iids), chunkSize):
+        for obj in session.query(cls).options(*eagerLoadOptions(cls)).filter(
+                cls.iid.in_(iids[i:i + chunkSize])):
+            found[obj.iid] = obj
+    return [found.get(iid) for iid in iids]
+
+
+def bulk_save(session, objects, batchSize=1000):
+    """
+    Saves the given new _SQL objects - and all the new rows they refer to,
+    including the detail rows of SEQUENCE OFs - committing once per
+    batchSize objects (instead of once per object, as save() does).
+    Returns the iids of the objects, assigned by the database.
+
+    Objects that are already in a session (i.e. that were saved or
+    loaded before) are rejected with a ValueError: bulk_save only
+    inserts rows, it never updates them.
+    """
+    iids = []
+    objects = iter(objects)
+    while True:
+        batch = list(islice(objects, batchSize))
+        if not batch:
+            return iids
+        for obj in batch:
+            if not inspect(obj).transient:
+                raise ValueError(
+                    "bulk_save: %s (iid %s) is not a new object" % (
+                        type(obj).__name__, obj.iid))
+        session.add_all(batch)
+        session.flush()
+        iids.extend(obj.iid for obj in batch)
+        session.commit()
+
 '''.format(d=d, d_cleaned=CleanName(d),
            types=", ".join(
                CleanName(x)
@@ -49,6 +49,8 @@ g_MySave = None
 g_MyThreadsInc = None
 g_MyThreadsH = None
 g_MyTelemetryActions = None
+g_MyTelemetryData = None
+g_MyTelemetryUpdates = None
 
 g_bStarted = False
 g_IDs = 20000
@@ -82,6 +84,8 @@ def WriteSourceFileStart() -> None:
 #include <iomanip>
 
 #include <mqueue.h>
+#include <poll.h>
+#include <errno.h>
 
 #include "debug_messages.h"
 #include "queue_manager.h"
@@ -291,6 +295,10 @@ public:
     g_MyThreadsH = open(g_outputDir + 'MyThreads.h', 'w')
     global g_MyTelemetryActions
     g_MyTelemetryActions = open(g_outputDir + "MyTelemetryActions.inc", 'w')
+    global g_MyTelemetryData
+    g_MyTelemetryData = open(g_outputDir + "MyTelemetryData.inc", 'w')
+    global g_MyTelemetryUpdates
+    g_MyTelemetryUpdates = open(g_outputDir + "MyTelemetryUpdates.inc", 'w')
     global g_SourceFile
     g_SourceFile = open(outputDir + 'telecmds.cpp', 'w')
     global g_asn_name
@@ -351,6 +359,8 @@ public:
     g_MyThreadsH.write("#define __MYTHREADSH__\n\n")
     g_MyThreadsH.write("#include \"wx/thread.h\"\n\n")
     g_MyThreadsH.write("#include \"PrintTypesAsASN1.h\"\n\n")
+    g_MyThreadsH.write("// The dialogs are refreshed with the latest TM data at most this often\n")
+    g_MyThreadsH.write("#define TM_REFRESH_MS 16\n\n")
 
 
 # Called once per RI (i.e. per SUBPROGRAM IMPLEMENTATION)
@@ -444,18 +454,53 @@ def OnStartup(
             g_MyThreadsInc.write("    void* message_data_received = malloc(mqstat.mq_msgsize);\n")
             g_MyThreadsInc.write("    int message_received_type = -1;\n")
             g_MyThreadsInc.write("    if (!message_data_received) { cout << \"Out of memory in queue Entry\\n\"; }\n")
+            g_MyThreadsInc.write("#include \"MyTelemetryData.inc\"\n")
+            g_MyThreadsInc.write("    bool bRefreshPending = false;\n")
+            g_MyThreadsInc.write("    long long lastRefresh = 0;\n")
+            g_MyThreadsInc.write("    struct pollfd pfd;\n")
+            g_MyThreadsInc.write("    pfd.fd = _queue_id;\n")
+            g_MyThreadsInc.write("    pfd.events = POLLIN;\n")
             g_MyThreadsInc.write("    while(1) {\n")
             g_MyThreadsInc.write("        if (TestDestroy()) break;\n")
-            g_MyThreadsInc.write("        message_received_type = -1;\n")
+            g_MyThreadsInc.write("        // Block until TMs arrive - waking up to check TestDestroy, and\n")
+            g_MyThreadsInc.write("        // to refresh the dialogs once TM_REFRESH_MS have passed.\n")
+            g_MyThreadsInc.write("        int timeout = 100;\n")
+            g_MyThreadsInc.write("        if (bRefreshPending) {\n")
+            g_MyThreadsInc.write("            long long elapsed = getTimeInMilliseconds() - lastRefresh;\n")
+            g_MyThreadsInc.write("            timeout = elapsed < TM_REFRESH_MS ? (int)(TM_REFRESH_MS - elapsed) : 0;\n")
+            g_MyThreadsInc.write("        }\n")
+            g_MyThreadsInc.write("        int ready;\n")
+            g_MyThreadsInc.write("        do {\n")
+            g_MyThreadsInc.write("            ready = poll(&pfd, 1, timeout);\n")
+            g_MyThreadsInc.write("        } while (ready == -1 && errno == EINTR);\n")
+            # A queue that can't be waited on anymore (closed, or broken) would
+            # be reported as ready forever - stop instead of spinning on it.
+            g_MyThreadsInc.write("        if (ready < 0 || (ready > 0 && (pfd.revents & (POLLERR | POLLNVAL)))) {\n")
+            g_MyThreadsInc.write("            cerr << \"Communication channel \" << QName << \" failed, no more TMs\" << endl;\n")
+            g_MyThreadsInc.write("            break;\n")
+            g_MyThreadsInc.write("        }\n")
+            g_MyThreadsInc.write("        if (ready > 0) {\n")
+            g_MyThreadsInc.write("            // Process all the pending TMs (but don't starve the dialogs)\n")
+            g_MyThreadsInc.write("            while(1) {\n")
+            g_MyThreadsInc.write("                message_received_type = -1;\n")
             # g_MyThreadsInc.write("        GUI_%s_read_data();\n" % cleanFVname)
-            g_MyThreadsInc.write("        retrieve_message_from_queue(_queue_id, mqstat.mq_msgsize, message_data_received, &message_received_type);\n")
-            g_MyThreadsInc.write("        if (message_received_type != -1) {\n")
-            g_MyThreadsInc.write("            //cout << \"Received telemetry of type\" << message_received_type << endl;\n")
-            g_MyThreadsInc.write("            switch(message_received_type) {\n")
+            g_MyThreadsInc.write("                retrieve_message_from_queue(_queue_id, mqstat.mq_msgsize, message_data_received, &message_received_type);\n")
+            g_MyThreadsInc.write("                if (message_received_type == -1) break;\n")
+            g_MyThreadsInc.write("                //cout << \"Received telemetry of type\" << message_received_type << endl;\n")
+            g_MyThreadsInc.write("                switch(message_received_type) {\n")
             g_MyThreadsInc.write("#include \"MyTelemetryActions.inc\"\n")
+            g_MyThreadsInc.write("                }\n")
+            g_MyThreadsInc.write("                if (bRefreshPending && getTimeInMilliseconds() - lastRefresh >= TM_REFRESH_MS) break;\n")
             g_MyThreadsInc.write("            }\n")
             g_MyThreadsInc.write("        }\n")
-            g_MyThreadsInc.write("        wxThread::Sleep(10);\n")
+            g_MyThreadsInc.write("        // Show the latest data of the TMs that arrived since the last refresh\n")
+            g_MyThreadsInc.write("        if (bRefreshPending && getTimeInMilliseconds() - lastRefresh >= TM_REFRESH_MS) {\n")
+            g_MyThreadsInc.write("            wxMutexGuiEnter();\n")
+            g_MyThreadsInc.write("#include \"MyTelemetryUpdates.inc\"\n")
+            g_MyThreadsInc.write("            wxMutexGuiLeave();\n")
+            g_MyThreadsInc.write("            bRefreshPending = false;\n")
+            g_MyThreadsInc.write("            lastRefresh = getTimeInMilliseconds();\n")
+            g_MyThreadsInc.write("        }\n")
             g_MyThreadsInc.write("    }\n")
             g_MyThreadsInc.write("    return NULL;\n")
             g_MyThreadsInc.write("}\n\n")
@@ -477,26 +522,32 @@ def OnStartup(
         g_MyTelemetryActions.write("            case i_%s:\n" % CleanSP)
         g_MyTelemetryActions.write("            {\n")
         g_MyTelemetryActions.write('                long long arrivalTime = getTimeInMilliseconds();\n')
-        g_MyTelemetryActions.write("                wxMutexGuiEnter();\n")
         g_MyTelemetryActions.write("                char *pData = (char *)message_data_received;\n")
+        g_MyTelemetryUpdates.write("            if (bChanged_%s) {\n" % CleanSP)
+        g_MyTelemetryUpdates.write("                bChanged_%s = false;\n" % CleanSP)
         names = asnParser.g_names
         leafTypeDict = asnParser.g_leafTypeDict
         for param in subProgram._params:
             node = names[param._signal._asnNodename]
             CleanParam = CleanName(param._id)
             CleanASNType = CleanName(param._signal._asnNodename)
+            # The latest data of each TM, kept until the next dialog refresh
+            g_MyTelemetryData.write("    static asn1Scc%s tm_%s_%s;\n" % (CleanASNType, CleanSP, CleanParam))
             g_MyTelemetryActions.write("                // Read the data for param %s\n" % param._id)
-            g_MyTelemetryActions.write("                asn1Scc%s var_%s;\n" % (CleanASNType, CleanParam))
+            g_MyTelemetryActions.write("                asn1Scc%s &var_%s = tm_%s_%s;\n" % (CleanASNType, CleanParam, CleanSP, CleanParam))
             g_MyTelemetryActions.write("                memcpy(&var_%s, pData, sizeof(var_%s));\n" % (CleanParam, CleanParam))
             g_MyTelemetryActions.write("                pData += sizeof(var_%s);\n" % CleanParam)
-            CopyDataFromASN1ToDlg(g_MyTelemetryActions, "_pFrame->", "var_" + CleanParam, "%s_%s" %
-                                  (CleanSP, CleanParam), node, leafTypeDict, names)
             g_MyTelemetryActions.write('                PrintASN1%s("TMDATA: %s::%s", &var_%s);\n' %
                                        (CleanASNType, CleanSP, CleanParam, CleanParam))
             g_MyTelemetryActions.write('                printf("\\n");\n')
-        g_MyTelemetryActions.write("                wxMutexGuiLeave();\n")
+            CopyDataFromASN1ToDlg(g_MyTelemetryUpdates, "_pFrame->", "tm_%s_%s" % (CleanSP, CleanParam), "%s_%s" %
+                                  (CleanSP, CleanParam), node, leafTypeDict, names)
+        g_MyTelemetryData.write("    static bool bChanged_%s = false;\n" % CleanSP)
+        g_MyTelemetryActions.write("                bChanged_%s = true;\n" % CleanSP)
+        g_MyTelemetryActions.write("                bRefreshPending = true;\n")
         g_MyTelemetryActions.write('                cout << "TM %s at " << arrivalTime << endl;\n' % CleanSP)
         g_MyTelemetryActions.write("            }\n")
+        g_MyTelemetryUpdates.write("            }\n")
         g_MyTelemetryActions.write("            break;\n")
 
 
@@ -1052,3 +1103,8 @@ def OnFinal() -> None:
         g_MyLoad.write("}\n")
     g_HeaderFile.write("\n#endif\n")
     g_MyThreadsH.write("\n#endif\n")
+    for f in [
+            g_HeaderFile, g_GnuplotFile, g_SourceFile, g_MyEvents, g_MyCreation, g_MyClickPrototypes,
+            g_MyControls, g_MyLoad, g_MySave, g_MyThreadsInc, g_MyThreadsH, g_MyTelemetryActions,
+            g_MyTelemetryData, g_MyTelemetryUpdates, g_MyAction]:
+        f.close()
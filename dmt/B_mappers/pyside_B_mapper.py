@@ -53,6 +53,183 @@ tm = {{}}
 errCodes = {{}}
 '''.format(fvname=FVname))
 
+    # The TM dispatcher, used by the expect() functions of all the TMs
+    dispatcher = open(outputDir + 'tm_dispatcher.py', 'w')
+    dispatcher.write('''#!/usr/bin/python
+\'\'\' Route the messages of a TM queue to per-message-kind waiters \'\'\'
+
+import collections
+import threading
+import time
+import Queue
+
+
+class Timeout(Exception):
+    \'\'\' No message arrived in time - skipped holds the ids of the messages
+        of other kinds that were consumed while waiting \'\'\'
+    def __init__(self, skipped):
+        Exception.__init__(self, 'Timeout expired')
+        self.skipped = skipped
+
+
+# Marks the messages that the reader thread has not decoded
+_UNDECODED = object()
+
+
+class Dispatcher(object):
+    \'\'\' Files the (msgId, data) messages of a queue per message kind, and
+        wakes up only the waiters interested in the kinds that arrived.
+        A reader thread drains the queue in batches, and decodes each batch
+        in bulk - per kind, with the decoders that the waiters registered -
+        before filing it \'\'\'
+    _dispatchers = {}
+    _dispatchersLock = threading.Lock()
+
+    @classmethod
+    def For(cls, Q):
+        \'\'\' Return the (single) dispatcher reading from Q \'\'\'
+        entry = cls._dispatchers.get(id(Q))
+        if entry is None:
+            with cls._dispatchersLock:
+                entry = cls._dispatchers.get(id(Q))
+                if entry is None:
+                    entry = cls._dispatchers[id(Q)] = (Q, cls(Q))
+                    entry[1]._reader.start()
+        return entry[1]
+
+    def __init__(self, Q):
+        self._Q = Q
+        self._lock = threading.Lock()
+        self._seq = 0
+        # The bulk decoders, per kind (see setDecoder)
+        self._decoders = {}
+        # Unconsumed (seq, rawData, decodedData) messages, per kind
+        self._pending = collections.defaultdict(collections.deque)
+        # Number of waiters per kind (None: any message), and the
+        # conditions they wait on
+        self._waiters = {}
+        self._conditions = {}
+        # The kind that each thread last waited for: it is not skipped
+        # while the thread lives, even between two of its get() calls -
+        # so threads that wait for different kinds don't drop each
+        # other's messages
+        self._claims = {}
+        self._reader = threading.Thread(
+            target=self._readLoop, name='tm_dispatcher')
+        self._reader.daemon = True
+
+    def setDecoder(self, kind, decoder):
+        \'\'\' From now on, the messages of this kind are decoded by the
+            reader thread: decoder gets a list of raw messages, and returns
+            the list of their decoded values \'\'\'
+        self._decoders[kind] = decoder
+
+    def _readLoop(self):
+        while True:
+            batch = [self._Q.get()]
+            while True:
+                try:
+                    batch.append(self._Q.get_nowait())
+                except Queue.Empty:
+                    break
+            # Decode (without holding the lock) each kind in one go
+            perKind = collections.defaultdict(list)
+            for msgId, data in batch:
+                perKind[msgId].append(data)
+            decoded = {}
+            for kind, rawData in perKind.items():
+                decoder = self._decoders.get(kind)
+                if decoder is not None:
+                    try:
+                        decoded[kind] = iter(decoder(rawData))
+                    except Exception:
+                        # Left to the waiter that takes them, so that
+                        # it gets the error
+                        pass
+            with self._lock:
+                for msgId, data in batch:
+                    self._seq += 1
+                    value = _UNDECODED
+                    if msgId in decoded:
+                        value = next(decoded[msgId])
+                    self._pending[msgId].append((self._seq, data, value))
+                for kind in set(perKind) | set([None]):
+                    if kind in self._waiters:
+                        self._conditions[kind].notify_all()
+            for _ in batch:
+                self._Q.task_done()
+
+    def _skip(self, beforeSeq):
+        # Drop the older messages that nobody is waiting for
+        if None in self._waiters:
+            return []
+        for thread in list(self._claims):
+            if not thread.is_alive():
+                del self._claims[thread]
+        claimed = set(self._claims.values())
+        skipped = []
+        for kind, pending in self._pending.items():
+            if kind in self._waiters or kind in claimed:
+                continue
+            while pending and pending[0][0] < beforeSeq:
+                skipped.append((pending.popleft()[0], kind))
+        return [kind for _, kind in sorted(skipped)]
+
+    def _value(self, kind, data, value):
+        if value is _UNDECODED:
+            decoder = self._decoders.get(kind)
+            value = data if decoder is None else decoder([data])[0]
+        return value
+
+    def _take(self, kind):
+        if kind is None:
+            heads = [(p[0][0], k) for k, p in self._pending.items() if p]
+            if not heads:
+                return None
+            msgId = min(heads)[1]
+            _, data, value = self._pending[msgId].popleft()
+            return msgId, self._value(msgId, data, value), []
+        pending = self._pending.get(kind)
+        if not pending:
+            return None
+        seq, data, value = pending.popleft()
+        return kind, self._value(kind, data, value), self._skip(seq)
+
+    def get(self, kind=None, timeout=None):
+        \'\'\' Return (msgId, data, skippedIds): the next message - or, if kind
+            is set, the next message of that kind - decoded if a decoder
+            was set for its kind. The older messages of kinds that no-one
+            else is waiting for are consumed, and their ids returned in
+            skippedIds. If nothing arrives within timeout seconds, raise
+            Timeout \'\'\'
+        deadline = None if timeout is None else time.time() + timeout
+        with self._lock:
+            if kind is None:
+                self._claims.pop(threading.current_thread(), None)
+            else:
+                self._claims[threading.current_thread()] = kind
+            self._waiters[kind] = self._waiters.get(kind, 0) + 1
+            if kind not in self._conditions:
+                self._conditions[kind] = threading.Condition(self._lock)
+            try:
+                while True:
+                    result = self._take(kind)
+                    if result is not None:
+                        return result
+                    remaining = None
+                    if deadline is not None:
+                        remaining = deadline - time.time()
+                        if remaining <= 0:
+                            raise Timeout([] if kind is None else
+                                          self._skip(self._seq + 1))
+                    self._conditions[kind].wait(remaining)
+            finally:
+                self._waiters[kind] -= 1
+                if not self._waiters[kind]:
+                    del self._waiters[kind]
+''')
+    dispatcher.close()
+
     global g_QUiFile
     g_QUiFile = open(outputDir + 'guilayout.ui', 'w')
     g_QUiFile.write('''<?xml version="1.0" encoding="UTF-8"?>
@@ -156,8 +333,8 @@ def OnStartup(
 
 import sys
 import ctypes
-import Queue
 import datamodel
+import tm_dispatcher
 import DV
 import Stubs
 try:
@@ -426,42 +603,53 @@ def decode_uPER(uPER_encodedBuffer):
         if modelingLanguage.lower() == "gui_pi":
             g_BackendFile.write('''
 
+def decode_TMs(rawTMs):
+    \'\'\' Decode a batch of msgQ messages (native encoding) \'\'\'
+    tms = []
+    for rawTM in rawTMs:
+        tm = ASN1.{asn1Type}()
+        tm.SetData(rawTM)
+        tms.append(tm)
+    return tms
+
+
 def decode_TM(rawTM):
     \'\'\' Decode a msgQ message (native encoding) \'\'\'
-    tm = ASN1.{asn1Type}()
-    tm.SetData(rawTM)
-    return tm
+    return decode_TMs([rawTM])[0]
 
 
 def expect(Q, VNvalue, ignoreOther=False, timeout=None):
     \'\'\' Wait for a specific message - optionally ignoring others \'\'\'
-    while True:
-        try:
-            (msgId, pDataFromMQ) = Q.get(block=True, timeout=timeout)
-        except Queue.Empty:
-            # Timeout expired
-            raise IOError('Timeout expired')
-        if msgId == tmId:
-            #expectedValue = '{{ {interfaceName} ' + VNvalue + ' }}'
-            expectedValue = VNvalue
-            nativeData = decode_TM(pDataFromMQ)
-            receivedValue = nativeData.GSER()
-            if asn1_python.compareVnValues(receivedValue, expectedValue):
-                Q.task_done()
-                return
-            else:
-                Q.task_done()
-                raise ValueError('Received {interfaceName} with wrong data: '\
+    # Messages are routed per kind (and the {interfaceName} ones are decoded
+    # by the reader thread of the dispatcher), so when ignoring others
+    # this only wakes up when a {interfaceName} arrives
+    dispatcher = tm_dispatcher.Dispatcher.For(Q)
+    dispatcher.setDecoder(tmId, decode_TMs)
+    try:
+        (msgId, nativeData, skipped) = dispatcher.get(
+            tmId if ignoreOther else None, timeout)
+    except tm_dispatcher.Timeout as e:
+        for otherId in e.skipped:
+            print 'Received other (%s), but still waiting for {interfaceName}'\
+ % str(otherId)
+        # Timeout expired
+        raise IOError('Timeout expired')
+    for otherId in skipped:
+        print 'Received other (%s), but still waiting for {interfaceName}'\
+ % str(otherId)
+    if msgId == tmId:
+        #expectedValue = '{{ {interfaceName} ' + VNvalue + ' }}'
+        expectedValue = VNvalue
+        receivedValue = nativeData.GSER()
+        if asn1_python.compareVnValues(receivedValue, expectedValue):
+            return
+        else:
+            raise ValueError('Received {interfaceName} with wrong data: '\
 + vn.format_gser(receivedValue))
-        elif not ignoreOther:
-            Q.task_done()
-            raise TypeError(
-                "Expected {interfaceName} (%s), but received other\
+    else:
+        raise TypeError(
+            "Expected {interfaceName} (%s), but received other\
  (%s)" % (str(tmId), str(msgId)))
-        else:
-            print 'Received other (%s), but still waiting for {interfaceName}'\
- % str(msgId)
-            Q.task_done()
 '''.format(asn1Type=CleanASNType, interfaceName=CleanSP.replace('_', '-')))
 
         elif modelingLanguage.lower() == "gui_ri":
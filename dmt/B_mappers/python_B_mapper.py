@@ -82,8 +82,11 @@ def OnStartup(modelingLanguage: str,
         g_headerPython.append('GetMsgQueueBufferSize.restype = ctypes.c_int')
         g_headerPython.append('RetrieveMessageFromQueue = PythonAccess.RetrieveMessageFromQueue')
         g_headerPython.append('RetrieveMessageFromQueue.restype = ctypes.c_int')
+        g_headerPython.append('WaitForMessageInQueue = PythonAccess.WaitForMessageInQueue')
+        g_headerPython.append('WaitForMessageInQueue.restype = ctypes.c_int')
 
-    # By offering OpenMsgQueueForReading, CloseMsgQueue, GetMsgQueueBufferSize and RetrieveMessageFromQueue,
+    # By offering OpenMsgQueueForReading, CloseMsgQueue, GetMsgQueueBufferSize, WaitForMessageInQueue
+    # and RetrieveMessageFromQueue,
     # the python scripts can receive TMs on their own (used in the msc2py code).
     # For TCs, that is not necessary, since SendTC... functions have already been generated (see below)
     global g_HeaderFile
@@ -95,6 +98,7 @@ def OnStartup(modelingLanguage: str,
         g_HeaderFile.write("int OpenMsgQueueForReading(char *queueName);\n")
         g_HeaderFile.write("void CloseMsgQueue(int queue_id);\n")
         g_HeaderFile.write("int GetMsgQueueBufferSize(int queue_id);\n")
+        g_HeaderFile.write("int WaitForMessageInQueue(int queue_id, int timeoutInMs);\n")
         g_HeaderFile.write("int RetrieveMessageFromQueue(int queue_id, int maxSize, byte *pBuf);\n")
 
     global g_SourceFile
@@ -102,8 +106,10 @@ def OnStartup(modelingLanguage: str,
         g_SourceFile = open(outputDir + "python/gui_api.c", "w")
         g_SourceFile.write('#include <stdio.h>\n')
         g_SourceFile.write('#include <string.h>\n')
+        g_SourceFile.write('#include <errno.h>\n')
         g_SourceFile.write('#include <unistd.h>\n')
         g_SourceFile.write('#include <sys/types.h>\n')
+        g_SourceFile.write('#include <poll.h>\n')
         g_SourceFile.write('#include <mqueue.h>\n\n')
         g_SourceFile.write('#include "%s.h"\n' % os.path.basename(os.path.splitext(asnFile)[0]))
         g_SourceFile.write('#include "%s_enums_def.h"\n' % cleanFVname)
@@ -122,6 +128,22 @@ def OnStartup(modelingLanguage: str,
         g_SourceFile.write("    mq_getattr(_queue_id, &mqstat);\n")
         g_SourceFile.write("    return mqstat.mq_msgsize;\n")
         g_SourceFile.write("}\n\n")
+        # Under Linux, message queue descriptors are file descriptors, so the
+        # callers can block until a message arrives, instead of polling.
+        # A queue that can't be waited on anymore (closed, or broken) is
+        # reported as an error (-1) - or else the callers would spin on it.
+        g_SourceFile.write("int WaitForMessageInQueue(int queue_id, int timeoutInMs)\n")
+        g_SourceFile.write("{\n    struct pollfd pfd;\n")
+        g_SourceFile.write("    int ret;\n")
+        g_SourceFile.write("    pfd.fd = queue_id;\n")
+        g_SourceFile.write("    pfd.events = POLLIN;\n")
+        g_SourceFile.write("    do {\n")
+        g_SourceFile.write("        ret = poll(&pfd, 1, timeoutInMs);\n")
+        g_SourceFile.write("    } while (ret == -1 && errno == EINTR);\n")
+        g_SourceFile.write("    if (ret > 0 && (pfd.revents & (POLLERR | POLLNVAL)))\n")
+        g_SourceFile.write("        return -1;\n")
+        g_SourceFile.write("    return ret;\n")
+        g_SourceFile.write("}\n\n")
         g_SourceFile.write("int RetrieveMessageFromQueue(int queue_id, int maxSize, byte *pBuf)\n")
         g_SourceFile.write("{\n")
         g_SourceFile.write("    int message_received_type = -1;\n")
@@ -152,11 +174,19 @@ def OnStartup(modelingLanguage: str,
             g_bodyPython.append('        bufferSize = GetMsgQueueBufferSize(self._msgQueue)')
             g_bodyPython.append('        self._pMem = ctypes.create_string_buffer(bufferSize).raw')
             g_bodyPython.append('        while not self._bDie:')
-            g_bodyPython.append('            self.messageReceivedType = RetrieveMessageFromQueue(self._msgQueue, bufferSize, self._pMem)')
-            g_bodyPython.append('            if self.messageReceivedType == -1:')
-            g_bodyPython.append('                time.sleep(0.01)')
+            g_bodyPython.append('            # Block until TMs arrive (waking up every 100ms to check _bDie),')
+            g_bodyPython.append('            # then process all the pending ones - unless the queue failed')
+            g_bodyPython.append('            ready = WaitForMessageInQueue(self._msgQueue, 100)')
+            g_bodyPython.append('            if ready < 0:')
+            g_bodyPython.append('                print "Communication channel over %%d_%s_PI_Python_queue failed, no more TMs\\n" %% os.geteuid()' % maybeFVname)
+            g_bodyPython.append('                break')
+            g_bodyPython.append('            if ready == 0:')
             g_bodyPython.append('                continue')
-            g_bodyPython.append('            ProcessTM(self)')
+            g_bodyPython.append('            while not self._bDie:')
+            g_bodyPython.append('                self.messageReceivedType = RetrieveMessageFromQueue(self._msgQueue, bufferSize, self._pMem)')
+            g_bodyPython.append('                if self.messageReceivedType == -1:')
+            g_bodyPython.append('                    break')
+            g_bodyPython.append('                ProcessTM(self)')
             g_footerPython.append('if __name__ == "__main__":')
             g_footerPython.append('    poll_' + cleanFVname + ' = Poll_' + cleanFVname + '()')
             g_footerPython.append('    poll_' + cleanFVname + '.start()')
@@ -285,3 +315,6 @@ def OnFinal() -> None:
         g_PythonFile.write('\n'.join(g_TMprocessors))
     g_PythonFile.write('\n\n')
     g_PythonFile.write('\n'.join(g_footerPython))
+    g_PythonFile.close()
+    g_HeaderFile.close()
+    g_SourceFile.close()
@@ -558,6 +558,8 @@ class SynchronousToolGlueGeneratorGeneric(Generic[TSource, TDestin]):
             self.ADA_HeaderFile.write(
                 'end %s;\n' %
                 self.CleanNameAsADAWants(sp._id + "_" + subProgramImplementation + "_wrapper"))
+            self.ADA_HeaderFile.close()
+            self.ADA_SourceFile.close()
 
         else:
             self.C_HeaderFile.write("void Execute_%s();\n" % self.CleanNameAsADAWants(sp._id + "_" + subProgramImplementation))
@@ -666,6 +668,10 @@ class SynchronousToolGlueGeneratorGeneric(Generic[TSource, TDestin]):
                 "end Ada_Execute_%s;\n\n" %
                 self.CleanNameAsADAWants(sp._id + "_" + subProgramImplementation))
             self.ADA_SourceFile.write('\nend %s;\n' % self.CleanNameAsADAWants(sp._id + "_" + subProgramImplementation))
+            self.C_HeaderFile.close()
+            self.C_SourceFile.close()
+            self.ADA_HeaderFile.close()
+            self.ADA_SourceFile.close()
 
 
 SynchronousToolGlueGenerator = SynchronousToolGlueGeneratorGeneric[str, str]
@@ -431,7 +431,7 @@ architecture archiapbwrapper2 of apbwrapper2 is
 {tab}{tab}1 => apb_iobar(paddr, pmask));
 {tab}
 {tab}--Type--{tab}
-{tab}type registers_type is array(63 downto 0) of std_logic_vector(31 downto 0);
+{tab}type registers_type is array(%(lastRegister)s downto 0) of std_logic_vector(31 downto 0);
 {tab}
 {tab}--StartCalculation/CompletedCalculation signals--
 %(startStopSignals)s
@@ -458,7 +458,7 @@ begin
 {tab}{tab}variable sel : std_logic;
 {tab}{tab}variable en : std_logic;
 {tab}{tab}variable wr : std_logic;
-{tab}{tab}variable add : std_logic_vector(7 downto 0);
+{tab}{tab}variable add : std_logic_vector(%(addressMSB)s downto 0);
 {tab}{tab}variable ind : integer;
 {tab}{tab}variable data_in : std_logic_vector(31 downto 0);
 {tab}{tab}variable regs : registers_type;
@@ -468,7 +468,7 @@ begin
 {tab}{tab}{tab}sel := '0';
 {tab}{tab}{tab}en := '0';
 {tab}{tab}{tab}wr := '0';
-{tab}{tab}{tab}add := x"00";
+{tab}{tab}{tab}add := (others => '0');
 {tab}{tab}{tab}ind := 0;
 {tab}{tab}{tab}data_in := x"00000000";
 {tab}{tab}{tab}regs := (others => (others => '0'));
@@ -480,10 +480,10 @@ begin
 {tab}{tab}{tab}sel := apbi.psel(pindex); -- APB slave selected
 {tab}{tab}{tab}en := apbi.penable; -- APB Slave action enabled
 {tab}{tab}{tab}wr := apbi.pwrite; -- Write action
-{tab}{tab}{tab}add := apbi.paddr(7 downto 0); -- 256 bytes address
+{tab}{tab}{tab}add := apbi.paddr(%(addressMSB)s downto 0); -- %(registerWindow)s bytes address
 {tab}{tab}{tab}data_in :=  apbi.pwdata; -- Receipt data to write
 {tab}{tab}{tab}
-{tab}{tab}{tab}ind := conv_integer(add(7 downto 2)); -- Registers index, read and write are possible only by step of 32 bits
+{tab}{tab}{tab}ind := conv_integer(add(%(addressMSB)s downto 2)); -- Registers index, read and write are possible only by step of 32 bits
 {tab}{tab}{tab}
 {tab}{tab}{tab}regs(0)(2) := %(pi)s_finish; -- Finish_compute is linked to bit 2 of Control/Command register
 {tab}{tab}{tab}regs(0)(1) := regs(0)(0) and (not regs(0)(2)); -- Computation is running if start_compute is true and finish_compute is true
@@ -582,7 +582,7 @@ component apbwrapper2 is
                 --Configuration information--
                 pindex : integer := 1;
                 paddr : integer := 1;
-                pmask : integer := 16#fff#
+                pmask : integer := 16#%(pmask)s#
                 );
         port(
                 --Bus signals--
@@ -807,7 +807,7 @@ begin
 {tab}port map (apbi, apbo(1), rstn,clkm);
 
 {tab}custom2 : apbwrapper2
-{tab}generic map (pindex => 2, paddr => 2)
+{tab}generic map (pindex => 2, paddr => %(paddr)s)
 {tab}port map (apbi, apbo(2), rstn,clkm);
 
 end;
@@ -41,7 +41,7 @@ import re
 import os
 import math
 
-from typing import cast, Union, List, Tuple, IO, Any  # NOQA pylint: disable=unused-import
+from typing import cast, Union, List, Tuple, IO, Any, Dict, Optional  # NOQA pylint: disable=unused-import
 
 from ..commonPy.utility import panic, panicWithCallStack
 from ..commonPy.asnAST import (
@@ -55,6 +55,7 @@ from ..commonPy.aadlAST import (
 )
 from ..commonPy.aadlAST import Param, ApLevelContainer  # NOQA pylint: disable=unused-import
 from ..commonPy import asnParser
+from ..commonPy import configMT
 
 from ..commonPy.recursiveMapper import RecursiveMapperGeneric
 from .synchronousTool import SynchronousToolGlueGeneratorGeneric
@@ -70,13 +71,27 @@ def CleanName(name: str) -> str:
     return re.sub(r'[^a-zA-Z0-9_]', '_', name)
 
 
+# RegistersAllocated results, per (type name, id of the AST node). The node
+# is stored alongside its result, so that its id can't be reused.
+g_registersAllocated = {}  # type: Dict[Tuple[Optional[str], int], Tuple[AsnNode, int]]
+
+
 def RegistersAllocated(node_or_str: Union[str, AsnNode]) -> int:
-    # The ESA FPGA needs alignment to 4 byte offsets
     names = asnParser.g_names
     if isinstance(node_or_str, str):
+        typename = node_or_str  # type: Optional[str]
         node = names[node_or_str]  # type: AsnNode
     else:
+        typename = None
         node = node_or_str
+    key = (typename, id(node))
+    if key not in g_registersAllocated:
+        g_registersAllocated[key] = (node, ComputeRegistersAllocated(node))
+    return g_registersAllocated[key][1]
+
+
+def ComputeRegistersAllocated(node: AsnNode) -> int:
+    # The ESA FPGA needs alignment to 4 byte offsets
     retValue = None
     if isinstance(node, AsnBasicNode):
         retValue = 0
@@ -117,12 +132,23 @@ def RegistersAllocated(node_or_str: Union[str, AsnNode]) -> int:
     elif isinstance(node, AsnEnumerated):
         retValue = 4
     elif isinstance(node, AsnMetaMember):
-        retValue = RegistersAllocated(names[node._containedType])
+        retValue = RegistersAllocated(node._containedType)
     else:  # pragma: no cover
         panicWithCallStack("unsupported %s (%s)" % (str(node.__class__), node.Location()))  # pragma: no cover
     return retValue
 
 
+def WrapperAPBAddress() -> int:
+    # The APB bridge decodes its slaves in 256 byte blocks, and the wrappers
+    # 0 and 1 use the first two. A larger register window spans a power-of-two
+    # number of blocks, so it must start at a multiple of that number.
+    return max(2, configMT.vhdlRegisterWindow // 256)
+
+
+def WrapperAPBMask() -> int:
+    return 0xfff & ~(configMT.vhdlRegisterWindow // 256 - 1)
+
+
 class VHDL_Circuit:
     allCircuits = []  # type: List[VHDL_Circuit]
     lookupSP = {}  # type: Dict[str, VHDL_Circuit]
@@ -140,12 +166,20 @@ class VHDL_Circuit:
         self._spCleanName = CleanName(sp._id)
         self._offset = VHDL_Circuit.currentOffset
         VHDL_Circuit.currentOffset += 4  # reserve one register for "start" signal
+        # The register map of the circuit: the offset and size (in bytes)
+        # of each parameter - used by all the mappers
         self._paramOffset = {}  # type: Dict[str, int]
+        self._paramSize = {}  # type: Dict[str, int]
         for p in sp._params:
             self._paramOffset[p._id] = VHDL_Circuit.currentOffset
-            VHDL_Circuit.currentOffset += RegistersAllocated(p._signal._asnNodename)
-        if VHDL_Circuit.currentOffset > 256:
-            panicWithCallStack("For the ESA FPGA, there is a limit of 63 registers (252/4) - your design required %d." % (VHDL_Circuit.currentOffset / 4))
+            self._paramSize[p._id] = RegistersAllocated(p._signal._asnNodename)
+            VHDL_Circuit.currentOffset += self._paramSize[p._id]
+        window = configMT.vhdlRegisterWindow
+        if VHDL_Circuit.currentOffset > window:
+            panicWithCallStack(
+                "For the ESA FPGA, there is a limit of %d registers (%d/4) - your design required %d.\n"
+                "Use -vhdlWindow to enlarge the register window." % (
+                    window // 4 - 1, window - 4, VHDL_Circuit.currentOffset // 4))
 
     def __str__(self) -> str:
         msg = "PI:%s\n" % self._sp._id  # pragma: no cover
@@ -451,12 +485,12 @@ class VHDLGlueGenerator(SynchronousToolGlueGeneratorGeneric[List[int], List[int]
 #define STATIC
 #endif
 
-#define BASE_ADDR  0x200
+#define BASE_ADDR  %s
 
 static int g_bFPGAexists = 0;
 static int g_bInitialized = 0;
 
-''')
+''' % hex(256 * WrapperAPBAddress()))
         self.g_FVname = subProgram._id
 
     def SourceVar(self, unused_nodeTypename: str, unused_encoding: str, unused_node: AsnNode, subProgram: ApLevelContainer, unused_subProgramImplementation: str, param: Param, unused_leafTypeDict: AST_Leaftypes, unused_names: AST_Lookup) -> List[int]:  # pylint: disable=invalid-sequence-index
@@ -656,8 +690,8 @@ class MapASN1ToVHDLreadinputdata(RecursiveMapperGeneric[List[int], str]):  # pyl
             bitStart = 31 - 8 * (realOffset % 4)
             bitEnd = bitStart - 7
             lines.append('%s(%d)(7 downto 0) <= regs(%d)(%d downto %d);' %
-                         (dstVHDL, i, realOffset / 4, bitStart, bitEnd))
-        reginfo[0] += (node._range[-1] + 3) / 4
+                         (dstVHDL, i, realOffset // 4, bitStart, bitEnd))
+        reginfo[0] += (node._range[-1] + 3) // 4
         return lines
 
     def MapEnumerated(self, reginfo: List[int], dstVHDL: str, _: AsnEnumerated, __: AST_Leaftypes, ___: AST_Lookup) -> List[str]:  # pylint: disable=invalid-sequence-index
@@ -728,8 +762,8 @@ class MapASN1ToVHDLwriteoutputdata(RecursiveMapperGeneric[List[int], str]):  # p
             bitStart = 31 - 8 * (realOffset % 4)
             bitEnd = bitStart - 7
             lines.append('regs(%d)(%d downto %d) := %s(%d)(7 downto 0);' %
-                         (realOffset / 4, bitStart, bitEnd, dstVHDL, i))
-        reginfo[0] += (node._range[-1] + 3) / 4
+                         (realOffset // 4, bitStart, bitEnd, dstVHDL, i))
+        reginfo[0] += (node._range[-1] + 3) // 4
         return lines
 
     def MapEnumerated(self, reginfo: List[int], dstVHDL: str, _: AsnEnumerated, __: AST_Leaftypes, ___: AST_Lookup) -> List[str]:  # pylint: disable=invalid-sequence-index
@@ -956,7 +990,12 @@ g_placeholders = {
     "connectionsToSystemC": '',
     "updateClockedPulses": '',
     "updatePulseHistories": '',
-    "numberOfInputRegisters": ''
+    "numberOfInputRegisters": '',
+    "lastRegister": '',
+    "registerWindow": '',
+    "addressMSB": '',
+    "paddr": '',
+    "pmask": ''
 }
 
 
@@ -1043,8 +1082,15 @@ def OnFinal() -> None:
     totalIn = 0
     for p in VHDL_Circuit.allCircuits[0]._sp._params:
         if isinstance(p, InParam) or isinstance(p, InOutParam):
-            totalIn += RegistersAllocated(p._signal._asnNodename)
-    AddToStr('numberOfInputRegisters', str(totalIn / 4))
+            totalIn += VHDL_Circuit.allCircuits[0]._paramSize[p._id]
+    AddToStr('numberOfInputRegisters', str(totalIn // 4))
+
+    window = configMT.vhdlRegisterWindow
+    AddToStr('lastRegister', str(window // 4 - 1))
+    AddToStr('registerWindow', str(window))
+    AddToStr('addressMSB', str(window.bit_length() - 2))
+    AddToStr('paddr', str(WrapperAPBAddress()))
+    AddToStr('pmask', '%03x' % WrapperAPBMask())
 
     for v in sorted(g_octStr):
         AddToStr('octStr', '  type octStr_%d is array (0 to %d) of std_logic_vector(7 downto 0);\n' %
@@ -1059,7 +1105,6 @@ def OnFinal() -> None:
 
         connectionsToSystemCLines = []
 
-        counter = cast(List[int], [int(c._offset + 4) / 4])  # type: List[int]  # pylint: disable=invalid-sequence-index
         for p in c._sp._params:
             node = VHDL_Circuit.names[p._signal._asnNodename]
             direction = "in " if isinstance(p, InParam) else "out "
@@ -1077,7 +1122,7 @@ def OnFinal() -> None:
             if isinstance(p, InParam):
                 readinputdataLines.extend(
                     readinputdataMapper.Map(
-                        counter, c._spCleanName + '_' + p._id, node, VHDL_Circuit.leafTypeDict, VHDL_Circuit.names))
+                        [c._paramOffset[p._id] // 4], c._spCleanName + '_' + p._id, node, VHDL_Circuit.leafTypeDict, VHDL_Circuit.names))
             else:
                 outputs.extend([c._spCleanName + '_' + x for x in outputsMapper.Map(p._id, 1, node, VHDL_Circuit.leafTypeDict, VHDL_Circuit.names)])
 
@@ -1088,7 +1133,7 @@ def OnFinal() -> None:
             if not isinstance(p, InParam):
                 writeoutputdataLines.extend(
                     writeoutputdataMapper.Map(
-                        counter, c._spCleanName + '_' + p._id, node, VHDL_Circuit.leafTypeDict, VHDL_Circuit.names))
+                        [c._paramOffset[p._id] // 4], c._spCleanName + '_' + p._id, node, VHDL_Circuit.leafTypeDict, VHDL_Circuit.names))
 
         completions.append(c._spCleanName + '_CalculationsComplete')
 
@@ -1190,6 +1235,9 @@ def OnFinal() -> None:
     AddToStr('outputs', ', '.join(outputs) + (', ' if len(outputs) else ''))
     AddToStr('completions', ', '.join(completions))
 
+    systemcHeader.close()
+    systemcBody.close()
+
     from . import vhdlTemplate
 
     os.mkdir(vhdlBackend.dir + "/VHDL")
@@ -82,7 +82,7 @@ import os
 import sys
 import distutils.spawn as spawn
 
-from typing import cast, Optional, Dict, List, Tuple, Any  # NOQA pylint: disable=unused-import
+from typing import cast, Optional, Dict, List, Tuple, Set, Any  # NOQA pylint: disable=unused-import
 
 # from importlib import import_module
 from .B_mappers import ada_B_mapper
@@ -107,7 +107,9 @@ from .commonPy.utility import panic, inform
 from .commonPy import verify
 from .commonPy.cleanupNodes import DiscoverBadTypes, SetOfBadTypenames
 from .commonPy.asnParser import Filename, Typename, AST_Lookup, AST_TypesOfFile, AST_Leaftypes  # NOQA pylint: disable=unused-import
-from .commonPy.asnAST import AsnNode  # NOQA pylint: disable=unused-import
+from .commonPy.asnAST import (  # NOQA pylint: disable=unused-import
+    AsnNode, AsnSequence, AsnSet, AsnChoice, AsnSequenceOf, AsnSetOf,
+    AsnMetaMember, AsnMetaType)
 from .commonPy.aadlAST import ApLevelContainer, Param  # NOQA pylint: disable=unused-import
 
 from . import B_mappers  # NOQA pylint: disable=unused-import
@@ -139,7 +141,16 @@ g_sync_mappers = {
 
 
 def ParseAADLfilesAndResolveSignals() -> None:
-    '''Invokes the ANTLR generated AADL parser, and resolves
+    '''Parses the AADL files in-process, and resolves all references
+to AADL Data types into the param._signal member of each SUBPROGRAM param.'''
+    if commonPy.configMT.useLegacyAADLParser:
+        ParseAADLfilesViaANTLR()
+    else:
+        commonPy.aadlParser.ParseAADLfilesAndResolveSignals(sys.argv[1:])
+
+
+def ParseAADLfilesViaANTLR() -> None:
+    '''Invokes the ANTLR generated AADL parser (under python2), and resolves
 all references to AAADL Data types into the param._signal member
 of each SUBPROGRAM param.'''
     import tempfile
@@ -287,6 +298,44 @@ def getAsyncBackend(modelingLanguage: str) -> Async_B_Mapper:
     return cast(Async_B_Mapper, g_async_mappers[modelingLanguage])
 
 
+# Maps the cleaned-up name of each ASN.1 type to its name in g_names
+# (built once, on the first call of LookupTypename)
+g_typenameIndex = {}  # type: Dict[str, str]
+
+
+def LookupTypename(nodeTypename: str) -> str:
+    names = commonPy.asnParser.g_names
+    if nodeTypename in names:
+        return nodeTypename
+    if not g_typenameIndex:
+        for typename in names:
+            g_typenameIndex.setdefault(commonPy.asnParser.CleanNameForAST(typename), typename)
+    cleanName = commonPy.asnParser.CleanNameForAST(nodeTypename)
+    if cleanName not in g_typenameIndex:
+        panic("There's no such type in the ASN.1 grammar: '%s'" % nodeTypename)  # pragma: no cover
+    return g_typenameIndex[cleanName]
+
+
+# The names of the types that a node refers to (directly, or via its inline children)
+def ReferencedTypenames(node: AsnNode) -> List[str]:  # pylint: disable=invalid-sequence-index
+    result = []  # type: List[str]
+    pending = [node]
+    while pending:
+        n = pending.pop()
+        if isinstance(n, (AsnSequence, AsnSet, AsnChoice)):
+            children = [x[1] for x in n._members]
+        elif isinstance(n, (AsnSequenceOf, AsnSetOf, AsnMetaMember, AsnMetaType)):
+            children = [n._containedType]
+        else:
+            continue
+        for child in children:
+            if isinstance(child, str):
+                result.append(child)
+            else:
+                pending.append(child)
+    return result
+
+
 def ProcessAsync(  # pylint: disable=dangerous-default-value
         modelingLanguage: str,
         asnFile: str,
@@ -294,7 +343,8 @@ def ProcessAsync(  # pylint: disable=dangerous-default-value
         maybeFVname: str,
         useOSS: bool,
         badTypes: SetOfBadTypenames,
-        loaded_languages_cache: List[str]=[]) -> Async_B_Mapper:  # pylint: disable=invalid-sequence-index
+        loaded_languages_cache: List[str]=[],  # pylint: disable=invalid-sequence-index
+        registered_types_cache: Set[Tuple[str, str]]=set()) -> Async_B_Mapper:  # pylint: disable=invalid-sequence-index
 
     backend = getAsyncBackend(modelingLanguage)
 
@@ -314,19 +364,31 @@ def ProcessAsync(  # pylint: disable=dangerous-default-value
         # we only generate "generic" encoders and decoders, not SP-specific ones.
         backend.OnStartup(modelingLanguage, asnFile, commonPy.configMT.outputDir, maybeFVname, useOSS)
 
+    names = commonPy.asnParser.g_names
+    leafTypeDict = commonPy.asnParser.g_leafTypeDict
+
     for param in sp._params:
         inform("Creating glue for param %s...", param._id)
         assert asnFile == param._signal._asnFilename
-        names = commonPy.asnParser.g_names
-        leafTypeDict = commonPy.asnParser.g_leafTypeDict
-
         inform("This param uses definitions from %s", asnFile)
-        for nodeTypename in names:
+
+        # Register the param's type and all the types it depends on - each
+        # one only once per backend. Types already registered had their
+        # dependencies registered too, so there's no need to revisit them.
+        pending = [LookupTypename(param._signal._asnNodename)]
+        while pending:
+            nodeTypename = pending.pop()
+            if (modelingLanguage, nodeTypename) in registered_types_cache:
+                continue
+            registered_types_cache.add((modelingLanguage, nodeTypename))
+
+            node = names[nodeTypename]
+            pending.extend(ReferencedTypenames(node))
+
             # Check if this type must be skipped
             if nodeTypename in badTypes:
                 continue
 
-            node = names[nodeTypename]
             inform("ASN.1 node is %s", nodeTypename)
 
             # First, make sure we know what leaf type this node is
@@ -446,7 +508,7 @@ def main() -> None:
         try:
             commonPy.configMT.outputDir = os.path.normpath(sys.argv[idx + 1]) + os.sep
         except:  # pragma: no cover
-            panic('Usage: %s [-v] [-verbose] [-useOSS] [-o dirname] input1.aadl [input2.aadl] ...\n' % sys.argv[0])  # pragma: no cover
+            panic('Usage: %s [-v] [-verbose] [-useOSS] [--no-cache] [-legacyParser] [-vhdlWindow bytes] [-o dirname] input1.aadl [input2.aadl] ...\n' % sys.argv[0])  # pragma: no cover
         del sys.argv[idx]
         del sys.argv[idx]
         if not os.path.isdir(commonPy.configMT.outputDir):
@@ -460,10 +522,28 @@ def main() -> None:
     useOSS = "-useOSS" in sys.argv
     if useOSS:
         sys.argv.remove("-useOSS")
+    if "--no-cache" in sys.argv:
+        commonPy.configMT.useCache = False
+        sys.argv.remove("--no-cache")
+    if "-legacyParser" in sys.argv:
+        commonPy.configMT.useLegacyAADLParser = True
+        sys.argv.remove("-legacyParser")
+    if sys.argv.count("-vhdlWindow") != 0:
+        idx = sys.argv.index("-vhdlWindow")
+        try:
+            window = int(sys.argv[idx + 1], 0)
+        except:  # pragma: no cover
+            panic('Usage: %s [-v] [-verbose] [-useOSS] [--no-cache] [-legacyParser] [-vhdlWindow bytes] [-o dirname] input1.aadl [input2.aadl] ...\n' % sys.argv[0])  # pragma: no cover
+        # The APB bridge maps 1MB; the wrappers 0 and 1 use its first 512 bytes
+        if window < 256 or window > 0x80000 or window & (window - 1):
+            panic("-vhdlWindow must be a power of two, between 256 and 524288 bytes (not %d)\n" % window)  # pragma: no cover
+        commonPy.configMT.vhdlRegisterWindow = window
+        del sys.argv[idx]
+        del sys.argv[idx]
 
     # No other options must remain in the cmd line...
     if len(sys.argv) < 2:
-        panic('Usage: %s [-v] [-verbose] [-useOSS] [-o dirname] input1.aadl [input2.aadl] ...\n' % sys.argv[0])  # pragma: no cover
+        panic('Usage: %s [-v] [-verbose] [-useOSS] [--no-cache] [-legacyParser] [-vhdlWindow bytes] [-o dirname] input1.aadl [input2.aadl] ...\n' % sys.argv[0])  # pragma: no cover
     commonPy.configMT.showCode = True
     for f in sys.argv[1:]:
         if not os.path.isfile(f):
@@ -489,8 +569,7 @@ def main() -> None:
     if asnFile is not None:
         inform("Checking that all base nodes have mandatory ranges set in %s..." % asnFile)
         names = commonPy.asnParser.g_names
-        for node in names.values():
-            verify.VerifyRanges(node, names)
+        verify.VerifyRangesOfTypes(list(names.keys()), names)
 
     SystemsAndImplementations = commonPy.aadlAST.g_subProgramImplementations[:]
     SystemsAndImplementations.extend(commonPy.aadlAST.g_threadImplementations[:])
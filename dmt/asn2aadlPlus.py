@@ -14,26 +14,38 @@ import shutil
 import getopt
 import tempfile
 import platform
+import hashlib
+import json
+import concurrent.futures
 from subprocess import Popen, PIPE
 import distutils.spawn as spawn
 
 from .commonPy import configMT
 from .commonPy import asnParser
+from .commonPy import nativeLayout
 from .commonPy import __version__
 
 from .commonPy.asnAST import (
     AsnBasicNode, AsnBool, AsnReal, AsnInt,
     AsnEnumerated, AsnString, AsnChoice, AsnSequence,
-    AsnSequenceOf, AsnSet, AsnSetOf)
+    AsnSequenceOf, AsnSet, AsnSetOf, DefinitionHash)
 
 
-from .commonPy.utility import inform, panic, mysystem
+from .commonPy.utility import inform, panic, warn, mysystem
 
 g_keepFiles = False
 g_privateHeapSize = -1
 g_platformCompilers = ['gcc']
+# Maximum number of concurrent compilations (-j)
+g_jobs = os.cpu_count() or 1
+# Measure the native sizes with the platform compilers (instead of nativeLayout)
+g_compileSizes = False
+# The ABIs that nativeLayout computes the native sizes for
+g_ABIs = ['LP64', 'ILP32']
 # Ada package names per type
 g_AdaPackageNameOfType = {}
+# How many measurements typeSizes.json keeps (the least recently used go first)
+g_maxCachedSizes = 100000
 
 
 def cleanNameAsAADLWants(name):
@@ -80,22 +92,57 @@ def verifyNodeRange(node):
                     % node.Location())
 
 
-def calculateForNativeAndASN1SCC(absASN1SCCpath, autosrc, names, inputFiles):
-    base = "ShowNativeBuffers"
+def getSizeCacheFile():
+    return os.path.join(asnParser.GetCacheDir(), "typeSizes.json")
 
-    acn = " -ACN " if any(x.lower().endswith(".acn") for x in inputFiles) else ""
-    inputASN1files = [x for x in inputFiles if not x.lower().endswith('.acn')]
 
-    # Spawn ASN1SCC.exe compiler
-    if platform.system() == "Windows":
-        mysystem("%s -wordSize 8 -c -uPER -o \"%s\" %s %s" % (absASN1SCCpath, autosrc, acn, '"' + '" "'.join(inputFiles) + '"'))
-        for line in os.popen("%s -AdaUses %s" % (absASN1SCCpath, '" "'.join(inputASN1files))):
-            g_AdaPackageNameOfType[line.split(':')[0]] = line.split(':')[1].rstrip()
-    else:
-        mysystem("mono %s -wordSize 8 -c -uPER -o \"%s\" %s %s" % (absASN1SCCpath, autosrc, acn, '"' + '" "'.join(inputFiles) + '"'))
-        for line in os.popen('mono %s -AdaUses "%s"' % (absASN1SCCpath, '" "'.join(inputASN1files))):
-            g_AdaPackageNameOfType[line.split(':')[0]] = line.split(':')[1].rstrip()
+def loadSizeCache():
+    '''Returns the sizes measured in previous runs (see calculateForNativeAndASN1SCC).'''
+    if not configMT.useCache:
+        return {}
+    try:
+        with open(getSizeCacheFile()) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def storeSizeCache(sizeCache, usedKeys):
+    '''Stores the sizes, in least recently used order: the ones of usedKeys go
+last - and beyond g_maxCachedSizes, the first ones are dropped.'''
+    if not configMT.useCache:
+        return
+    stored = {key: sizes for key, sizes in sizeCache.items() if key not in usedKeys}
+    stored.update((key, sizeCache[key]) for key in usedKeys if key in sizeCache)
+    if len(stored) > g_maxCachedSizes:
+        stored = dict(list(stored.items())[-g_maxCachedSizes:])
+    # Store atomically, so that concurrent invocations never see partial files
+    try:
+        os.makedirs(asnParser.GetCacheDir(), exist_ok=True)
+        (fd, tmpName) = tempfile.mkstemp(dir=asnParser.GetCacheDir())
+        with os.fdopen(fd, 'w') as f:
+            json.dump(stored, f)
+        os.replace(tmpName, getSizeCacheFile())
+    except OSError as e:  # pragma: no cover
+        warn("Failed to cache type sizes (%s)", str(e))  # pragma: no cover
+
+
+def toolIdentity(path):
+    st = os.stat(path)
+    return "%s:%r:%d" % (path, st.st_mtime, st.st_size)
 
+
+def layoutIdentity(abi):
+    '''The ABI, and a hash of the nativeLayout source (its rules and tables).'''
+    with open(nativeLayout.__file__, 'rb') as f:
+        return "layout:%s:%s" % (abi, hashlib.sha256(f.read()).hexdigest())
+
+
+def measureWithCompilers(autosrc, inputASN1files, acn, compilers, typesToProbe, names, namesDict):
+    '''Compiles probes for typesToProbe with each compiler, and returns (per compiler)
+the sizes that nm reports for them.'''
+    base = "ShowNativeBuffers"
+    measurements = []
     msgEncoderFile = open(autosrc + os.sep + base + ".stats.c", 'w')
 
     # msgEncoderFile.write('#include "DumpableTypes.h"\n')
@@ -103,6 +150,106 @@ def calculateForNativeAndASN1SCC(absASN1SCCpath, autosrc, names, inputFiles):
     for a in inputASN1files:
         msgEncoderFile.write('#include "%s.h"\n' % os.path.splitext(os.path.basename(a))[0])
 
+    for asnTypename in typesToProbe:
+        cleaned = cleanNameAsAsn1cWants(asnTypename)
+        msgEncoderFile.write('static %s sizeof_%s;\n' % (cleaned, cleaned))
+        msgEncoderFile.write('char bytesEncoding_%s[%s_REQUIRED_BYTES_FOR_ENCODING];\n' % (cleaned, cleaned))
+        if acn != "":
+            msgEncoderFile.write('char bytesAcnEncoding_%s[%s_REQUIRED_BYTES_FOR_ACN_ENCODING];\n' % (cleaned, cleaned))
+    msgEncoderFile.close()
+
+    cfiles = sorted(x for x in os.listdir(autosrc) if x.endswith(".c"))
+
+    # Each compiler places its objects in a folder of its own, so the
+    # translation units of all the compilers can be built concurrently.
+    def objDir(idx):
+        return os.path.join(autosrc, "%s.%d" % (base, idx))
+
+    def compileFile(idx, path_to_compiler, cfile):
+        obj = os.path.join(objDir(idx), os.path.splitext(cfile)[0] + ".o")
+        return mysystem('%s -c -std=c99 -I"%s" "%s" -o "%s" 2>"%s.err"' % (
+            path_to_compiler, autosrc, os.path.join(autosrc, cfile), obj, obj))
+
+    def readSizes(idx):
+        return os.popen('nm --print-size "%s"' % os.path.join(objDir(idx), base + ".stats.o")).readlines()
+
+    for idx in range(len(compilers)):
+        os.mkdir(objDir(idx))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=g_jobs) as pool:
+        builds = [
+            (cc, idx, cfile, pool.submit(compileFile, idx, path_to_compiler, cfile))
+            for idx, (cc, path_to_compiler) in enumerate(compilers)
+            for cfile in cfiles]
+        for cc, idx, cfile, build in builds:
+            if build.result() != 0:
+                panic("Compilation of generated sources failed - is %s installed?\n"
+                      "(report inside '%s')\n" % (
+                          cc, os.path.join(objDir(idx), os.path.splitext(cfile)[0] + ".o.err")))
+        symbolTables = list(pool.map(readSizes, range(len(compilers))))
+
+    for idx, symbolTable in enumerate(symbolTables):
+        measured = {asnTypename: {} for asnTypename in typesToProbe}
+        # Receive the size information for each value from the compiled object file
+        for line in symbolTable:
+            try:
+                (dummy, size, dummy2, msg) = line.split()
+            except ValueError:
+                # Ignore lines that are not well-formatted
+                continue
+
+            # Split the prefix (sizeof, bytesEncoding, bytesAcnEncoding)
+            prefix, asnType = msg.split('_', 1)
+            # get asn-type from cleaned type
+            asnType = namesDict[asnType]
+            assert asnType in list(names.keys())
+            measured[asnType][prefix] = int(size, 16)
+        measurements.append(measured)
+    return measurements
+
+
+def readEncodingSizes(autosrc, bWithACN):
+    '''Returns the *_REQUIRED_BYTES_FOR_(ACN_)ENCODING of the ASN1SCC-generated headers,
+keyed on the C typename.'''
+    encodingSizes = {}
+    for hfile in sorted(x for x in os.listdir(autosrc) if x.endswith(".h")):
+        with open(os.path.join(autosrc, hfile)) as f:
+            for m in re.finditer(r'^\s*#define\s+(\w+)_REQUIRED_BYTES_FOR_(ACN_)?ENCODING\s+(\d+)\s*$', f.read(), re.M):
+                if m.group(2) and not bWithACN:
+                    continue
+                prefix = "bytesAcnEncoding" if m.group(2) else "bytesEncoding"
+                encodingSizes.setdefault(m.group(1), {})[prefix] = int(m.group(3))
+    return encodingSizes
+
+
+def measureWithLayout(autosrc, acn, typesToProbe, names):
+    '''Returns (per ABI in g_ABIs) the native sizes computed by nativeLayout, and
+the encoding sizes that ASN1SCC placed in the headers.'''
+    measurements = []
+    encodingSizes = readEncodingSizes(autosrc, acn != "")
+    for abi in g_ABIs:
+        layoutMemo = {}
+        measured = {}
+        for asnTypename in typesToProbe:
+            cleaned = cleanNameAsAsn1cWants(asnTypename)
+            if cleaned not in encodingSizes:
+                panic("No %s_REQUIRED_BYTES_FOR_ENCODING found in the ASN1SCC-generated headers\n"
+                      "(use --compile-sizes to measure the sizes with the compilers)\n" % cleaned)
+            measured[asnTypename] = dict(encodingSizes[cleaned])
+            measured[asnTypename]['sizeof'] = nativeLayout.SizeOf(
+                asnTypename, names, nativeLayout.g_ABIs[abi], layoutMemo)
+        measurements.append(measured)
+    return measurements
+
+
+def calculateForNativeAndASN1SCC(absASN1SCCpath, autosrc, names, inputFiles):
+    acn = " -ACN " if any(x.lower().endswith(".acn") for x in inputFiles) else ""
+    inputASN1files = [x for x in inputFiles if not x.lower().endswith('.acn')]
+    asn1scc = absASN1SCCpath if platform.system() == "Windows" else "mono " + absASN1SCCpath
+    asn1sccFlags = "-wordSize 8 -c -uPER"
+
+    for line in os.popen('%s -AdaUses "%s"' % (asn1scc, '" "'.join(inputASN1files))):
+        g_AdaPackageNameOfType[line.split(':')[0]] = line.split(':')[1].rstrip()
+
     uniqueASNfiles = {}
     for asnFile in inputASN1files:
         tmpNames = {}
@@ -117,19 +264,6 @@ def calculateForNativeAndASN1SCC(absASN1SCCpath, autosrc, names, inputFiles):
     configMT.outputDir = autosrc + os.sep
     # dumpable.CreateDumpableCtypes(uniqueASNfiles)
 
-    for asnTypename in list(names.keys()):
-        node = names[asnTypename]
-        if node._isArtificial:
-            continue
-        cleaned = cleanNameAsAsn1cWants(asnTypename)
-        msgEncoderFile.write('static %s sizeof_%s;\n' % (cleaned, cleaned))
-        msgEncoderFile.write('char bytesEncoding_%s[%s_REQUIRED_BYTES_FOR_ENCODING];\n' % (cleaned, cleaned))
-        if acn != "":
-            msgEncoderFile.write('char bytesAcnEncoding_%s[%s_REQUIRED_BYTES_FOR_ACN_ENCODING];\n' % (cleaned, cleaned))
-    msgEncoderFile.close()
-
-    # Code generation - asn1c part
-
     # Create a dictionary to lookup the asn-types from their corresponding c-type
     namesDict = {}
     for asnTypename in list(names.keys()):
@@ -138,48 +272,71 @@ def calculateForNativeAndASN1SCC(absASN1SCCpath, autosrc, names, inputFiles):
             continue
         namesDict[cleanNameAsAsn1cWants(asnTypename)] = asnTypename
 
-    # Get a list of all available compilers
-    global g_platformCompilers
-    try:
-        pipe = Popen("find-supported-compilers", stdout=PIPE).stdout
-        g_platformCompilers = pipe.read().splitlines()
-    except OSError as err:
-        print('Not running in a TASTE environment: {}\nUsing GCC only for computing sizeofs'.format(str(err)))
-        g_platformCompilers = ['gcc']
-    # Get the maximum size of each asn1type from all platform compilers
-    messageSizes = {}
-    for cc in g_platformCompilers:
-        # Compile the generated C-file with each compiler
-        pwd = os.getcwd()
-        os.chdir(autosrc)
-        path_to_compiler = spawn.find_executable(cc.decode('utf-8'))
-        if path_to_compiler is None:
-            continue
-
-        for cfile in os.listdir("."):
-            if cfile.endswith(".c"):
-                if mysystem('%s -c -std=c99 -I. "%s" 2>"%s.stats.err"' % (path_to_compiler, cfile, base)) != 0:
-                    panic("Compilation of generated sources failed - is %s installed?\n"
-                          "(report inside '%s')\n" % (cc, os.path.join(autosrc, base + ".stats.err")))
-
-        os.chdir(pwd)
-
-        # Receive the size information for each value from the compiled object file
-        for line in os.popen("nm --print-size " + autosrc + os.sep + base + ".stats.o").readlines():
-            try:
-                (dummy, size, dummy2, msg) = line.split()
-            except ValueError:
-                # Ignore lines that are not well-formatted
-                continue
+    if g_compileSizes:
+        # Get a list of all available compilers
+        global g_platformCompilers
+        try:
+            pipe = Popen("find-supported-compilers", stdout=PIPE).stdout
+            g_platformCompilers = pipe.read().splitlines()
+        except OSError as err:
+            print('Not running in a TASTE environment: {}\nUsing GCC only for computing sizeofs'.format(str(err)))
+            g_platformCompilers = ['gcc']
+        compilers = []
+        for cc in g_platformCompilers:
+            if isinstance(cc, bytes):
+                cc = cc.decode('utf-8')
+            path_to_compiler = spawn.find_executable(cc)
+            if path_to_compiler is not None:
+                compilers.append((cc, path_to_compiler))
+        probeKeys = [toolIdentity(path_to_compiler) for _, path_to_compiler in compilers]
+    else:
+        # The native sizes are computed by nativeLayout, one ABI at a time
+        probeKeys = [layoutIdentity(abi) for abi in g_ABIs]
+
+    # The sizes measured for a type only change if its definition (or that
+    # of a type it depends on) changes, or if the compiler (or ABI), ASN1SCC
+    # or the ACN files change - so they are cached under a hash of all of these.
+    h = hashlib.sha256()
+    h.update((toolIdentity(absASN1SCCpath) + asn1sccFlags + acn).encode('utf-8'))
+    for acnFile in sorted(x for x in inputFiles if x.lower().endswith('.acn')):
+        with open(acnFile, 'rb') as f:
+            h.update(f.read())
+    commonKey = h.hexdigest()
+    memo = {}
+    cacheKeys = {}
+    for idx, probeKey in enumerate(probeKeys):
+        for asnTypename in namesDict.values():
+            cacheKeys[idx, asnTypename] = hashlib.sha256((
+                commonKey + probeKey +
+                DefinitionHash(asnTypename, names, memo)).encode('utf-8')).hexdigest()
+    sizeCache = loadSizeCache()
+    typesToProbe = sorted(set(
+        asnTypename
+        for (_, asnTypename), key in cacheKeys.items()
+        if key not in sizeCache))
+
+    if typesToProbe:
+        if configMT.useCache:
+            inform("Measuring the sizes of %d types (the rest are cached)...", len(typesToProbe))
+
+        # Spawn ASN1SCC.exe compiler
+        mysystem("%s %s -o \"%s\" %s %s" % (asn1scc, asn1sccFlags, autosrc, acn, '"' + '" "'.join(inputFiles) + '"'))
+
+        if g_compileSizes:
+            measurements = measureWithCompilers(autosrc, inputASN1files, acn, compilers, typesToProbe, names, namesDict)
+        else:
+            measurements = measureWithLayout(autosrc, acn, typesToProbe, names)
+        for idx, measured in enumerate(measurements):
+            for asnTypename, sizes in measured.items():
+                sizeCache[cacheKeys[idx, asnTypename]] = sizes
+        storeSizeCache(sizeCache, set(cacheKeys.values()))
 
-            # Remove prefix
-            asnType = msg.split('_', 1)[1]
-            # get asn-type from cleaned type
-            asnType = namesDict[asnType]
-            assert asnType in list(names.keys())
-            # Find maximum
-            messageSizes.setdefault(asnType, 0)
-            messageSizes[asnType] = max(int(size, 16), messageSizes[asnType])
+    # Get the maximum size of each asn1type from all platform compilers (or ABIs)
+    messageSizes = {}
+    for (_, asnTypename), key in cacheKeys.items():
+        for size in sizeCache[key].values():
+            messageSizes.setdefault(asnTypename, 0)
+            messageSizes[asnTypename] = max(size, messageSizes[asnTypename])
 
     return messageSizes
 
@@ -208,6 +365,11 @@ Where <files> is a list of ASN.1 and ACN files, and options can be:
     -v, --version   Show version number
     -d, --debug	    Enable debug output
     -p, --platform  Comma seperated list of platform compilers (default: gcc)
+    -j, --jobs N    Run up to N compilations in parallel (default: CPU count)
+    --abi ABIs      Comma seperated list of ABIs to compute native sizes for
+                    (default: LP64,ILP32)
+    --compile-sizes Measure native sizes with the platform compilers instead
+    --no-cache      Don't reuse cached ASN1SCC outputs and type sizes
     -h, --help	    This help message""")
 
 
@@ -220,6 +382,9 @@ def main():
 
     global g_keepFiles
     global g_privateHeapSize
+    global g_jobs
+    global g_compileSizes
+    global g_ABIs
 
     # Backwards compatibility - the '-acn' option is no longer necessary
     # (we auto-detect ACN files via their extension)
@@ -231,7 +396,7 @@ def main():
         sys.argv[ofs] = '--aadlv2'
 
     try:
-        optlist, args = getopt.gnu_getopt(sys.argv[1:], "hvkadt:", ['help', 'version', 'keep', 'aadlv2', 'debug', 'platform=', 'test='])
+        optlist, args = getopt.gnu_getopt(sys.argv[1:], "hvkadt:j:", ['help', 'version', 'keep', 'aadlv2', 'debug', 'platform=', 'test=', 'no-cache', 'jobs=', 'abi=', 'compile-sizes'])
     except:
         usage()
 
@@ -254,6 +419,22 @@ def main():
             g_keepFiles = True
         elif opt in ("-t", "--test"):
             g_privateHeapSize = int(arg)
+        elif opt == "--no-cache":
+            configMT.useCache = False
+        elif opt in ("-j", "--jobs"):
+            try:
+                g_jobs = int(arg)
+            except ValueError:
+                usage()
+            if g_jobs < 1:
+                usage()
+        elif opt == "--abi":
+            g_ABIs = arg.split(',')
+            for abi in g_ABIs:
+                if abi not in nativeLayout.g_ABIs:
+                    panic("Unknown ABI '%s' (supported: %s)" % (abi, ", ".join(sorted(nativeLayout.g_ABIs))))
+        elif opt == "--compile-sizes":
+            g_compileSizes = True
 
     if len(args) < 2:
         usage()
@@ -37,11 +37,18 @@ declarations (e.g. SCADE/Lustre, Matlab/Simulink statements, etc).
 import os
 import sys
 import copy
+import json
+import shutil
+import hashlib
+import tempfile
+import multiprocessing
+import multiprocessing.connection
+import distutils.spawn as spawn
 
-from typing import cast, Dict, Tuple, Any  # NOQA pylint: disable=unused-import
+from typing import cast, Dict, List, Tuple, Set, Any  # NOQA pylint: disable=unused-import
 
 from .commonPy import configMT, asnParser, cleanupNodes, verify
-from .commonPy.utility import inform, panic
+from .commonPy.utility import inform, warn, panic
 from .commonPy.asnParser import Filename, Typename, AST_Lookup, AST_TypesOfFile, AST_Leaftypes  # NOQA pylint: disable=unused-import
 from .commonPy.asnAST import AsnNode  # NOQA pylint: disable=unused-import
 
@@ -68,6 +75,9 @@ def usage(argsToTools: Dict[str, str]) -> None:
     '''Print usage instructions.'''
     msg = 'Usage: %s <options> input1.asn1 [input2.asn1]...\nWhere options are:\n'
     msg += '\t-verbose\t\tDisplay more debug output\n'
+    msg += '\t--no-cache\t\tDo not reuse cached ASN1SCC outputs, and regenerate\n'
+    msg += '\t\t\t\teven the outputs that are up to date\n'
+    msg += '\t-j N\t\t\tRun the selected backends in up to N worker processes\n'
     msg += '\t-o dirname\t\tDirectory to place generated files\nAnd one of:\n'
     for opt in sorted(argsToTools.keys()):
         msg += '\t-' + opt + ' (for ' + argsToTools[opt][0].upper() + argsToTools[opt][1:] + ')\n'
@@ -96,6 +106,239 @@ def getBackend(modelingLanguage: str) -> A_Mapper:
     return cast(A_Mapper, backends[modelingLanguage])
 
 
+# Backends that write the same files in the output directory (ASN1SCC
+# outputs, Simulink_DataView_asn.m) must not run concurrently: under -j,
+# they are placed in the same worker, and run in the usual order.
+g_sharedOutputs = {
+    'C': 'ASN1SCC',
+    'ada': 'ASN1SCC',
+    'qgenada': 'ASN1SCC',
+    'vdm': 'ASN1SCC',
+    'Simulink': 'Simulink_DataView_asn.m',
+    'qgenc': 'Simulink_DataView_asn.m',
+}
+
+# Each output directory keeps a manifest of what the backends generated in it:
+# for every backend, the key of its inputs and the hashes of its output files.
+# Backends whose key and outputs are unchanged are not run again.
+g_manifestFilename = ".asn2dataModel.manifest"
+
+# The SMP2 backend writes its .pkg file in the current folder, outside the
+# output directory - so its outputs can't be tracked, and it always runs.
+g_alwaysRegenerated = ['smp2']
+
+
+def FileHash(filename: str) -> str:
+    h = hashlib.sha256()
+    with open(filename, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def ComputeBackendKeys(asnFiles: List[str], modelingLanguages: List[str]) -> Dict[str, str]:  # pylint: disable=invalid-sequence-index
+    '''Returns, for each backend, the hash of everything its outputs depend on:
+the ASN.1 inputs, the identity (mtime/size) of ASN1SCC and of the DMT sources
+(which covers the DMT version), the current folder and the backend's name.'''
+    dmtFiles = []  # type: List[str]
+    for root, dirs, files in os.walk(os.path.dirname(os.path.abspath(__file__))):
+        dirs[:] = sorted(d for d in dirs if d != '__pycache__')
+        dmtFiles.extend(os.path.join(root, f) for f in sorted(files))
+    inputsKey = asnParser.ComputeCacheKey(
+        asnFiles,
+        [spawn.find_executable('asn1.exe') or ''] + dmtFiles,
+        "asn2dataModel %s %s" % (os.getcwd(), sys.argv[0].endswith('.py')))
+    return {
+        modelingLanguage: hashlib.sha256((inputsKey + modelingLanguage).encode('utf-8')).hexdigest()
+        for modelingLanguage in modelingLanguages}
+
+
+def LoadManifest(outputDir: str) -> Dict[str, Any]:
+    try:
+        with open(os.path.join(outputDir, g_manifestFilename)) as f:
+            manifest = json.load(f)
+        return manifest if isinstance(manifest, dict) else {}
+    except (OSError, ValueError):
+        return {}
+
+
+def StoreManifest(outputDir: str, manifest: Dict[str, Any]) -> None:
+    '''Stores the manifest atomically - and only if it changed.'''
+    if manifest == LoadManifest(outputDir):
+        return
+    try:
+        (fd, tmpName) = tempfile.mkstemp(dir=outputDir, prefix=g_manifestFilename)
+        with os.fdopen(fd, 'w') as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+        os.replace(tmpName, os.path.join(outputDir, g_manifestFilename))
+    except OSError as e:  # pragma: no cover
+        warn("Failed to store the manifest of %s (%s)", outputDir, str(e))  # pragma: no cover
+
+
+def IsUpToDate(modelingLanguage: str, key: str, manifest: Dict[str, Any], outputDir: str) -> bool:
+    '''True if the backend already generated its outputs from the same inputs,
+and they are still there, unmodified.'''
+    entry = manifest.get(modelingLanguage)
+    if not isinstance(entry, dict) or entry.get('key') != key or not entry.get('files'):
+        return False
+    for outputFile, fileHash in entry['files'].items():
+        outputFile = os.path.join(outputDir, outputFile)
+        if not os.path.isfile(outputFile) or FileHash(outputFile) != fileHash:
+            return False
+    return True
+
+
+def PublishOutputs(stagingDir: str, outputDir: str) -> Dict[str, str]:
+    '''Moves the files that a backend generated in stagingDir to outputDir -
+but only those whose contents differ from what is already there, leaving
+the rest untouched (mtimes included). The move is atomic (os.replace).
+Returns the hashes of the outputs, indexed by their path in outputDir.'''
+    # The backend was told that its output directory is stagingDir/out - so
+    # a file in stagingDir itself was meant to go to the parent of outputDir
+    stagedOutputDir = os.path.join(stagingDir, 'out')
+    outputs = {}  # type: Dict[str, str]
+    for root, _, files in os.walk(stagingDir):
+        for f in sorted(files):
+            stagedFile = os.path.join(root, f)
+            outputFile = os.path.relpath(stagedFile, stagedOutputDir)
+            target = os.path.normpath(os.path.join(outputDir, outputFile))
+            outputs[outputFile] = FileHash(stagedFile)
+            if os.path.isfile(target) and FileHash(target) == outputs[outputFile]:
+                continue
+            os.makedirs(os.path.dirname(os.path.abspath(target)), exist_ok=True)
+            os.replace(stagedFile, target)
+    return outputs
+
+
+def RemoveStaleOutputs(modelingLanguage: str, outputs: Dict[str, str], manifest: Dict[str, Any], outputDir: str) -> None:
+    '''Removes the files that the backend generated in a previous run (as
+recorded in the manifest) but not in this one (outputs) - unless another
+backend generated them too, or they were modified since.'''
+    entry = manifest.get(modelingLanguage)
+    if not isinstance(entry, dict) or not isinstance(entry.get('files'), dict):
+        return
+    generatedByOthers = set()  # type: Set[str]
+    for otherLanguage, otherEntry in manifest.items():
+        if otherLanguage != modelingLanguage and isinstance(otherEntry, dict) and isinstance(otherEntry.get('files'), dict):
+            generatedByOthers.update(otherEntry['files'])
+    for outputFile, fileHash in entry['files'].items():
+        if outputFile in outputs or outputFile in generatedByOthers:
+            continue
+        target = os.path.normpath(os.path.join(outputDir, outputFile))
+        if os.path.isfile(target) and FileHash(target) == fileHash:
+            inform("Removing %s (no longer generated by the %s backend)...", target, modelingLanguage)
+            os.unlink(target)
+
+
+def RunBackend(
+        modelingLanguage: str,
+        uniqueASNfiles: Dict[Filename, Tuple[AST_Lookup, List[AsnNode], AST_Leaftypes]],
+        badTypes: cleanupNodes.SetOfBadTypenames) -> None:
+    backend = getBackend(modelingLanguage)
+
+    # For some languages we want to pass the complete list of ASN.1 files to ASN1SCC,
+    # instead of working per type:
+    if modelingLanguage.lower() in ["c", "ada", "smp2", "qgenc", "qgenada"]:
+        backend.OnStartup(modelingLanguage, list(uniqueASNfiles.keys()), configMT.outputDir, badTypes)
+        backend.OnShutdown(badTypes)
+        return
+
+    # Work on each ASN.1 file's types
+    for asnFile in uniqueASNfiles:
+        if 'OnStartup' in dir(backend):
+            backend.OnStartup(modelingLanguage, asnFile, configMT.outputDir, badTypes)
+
+        leafTypeDict = uniqueASNfiles[asnFile][2]
+
+        inform("Executing mappings for types inside %s...", asnFile)
+        names = uniqueASNfiles[asnFile][0]
+        for nodeTypename in sorted(names):
+            # Check if this type must be skipped
+            if nodeTypename in badTypes:
+                continue
+            node = names[nodeTypename]
+            inform("Processing %s (%s)...", nodeTypename, modelingLanguage)
+
+            # First, make sure we know what leaf type this node is
+            assert nodeTypename in leafTypeDict
+
+            leafType = leafTypeDict[nodeTypename]
+            if leafType in ['BOOLEAN', 'INTEGER', 'REAL', 'OCTET STRING']:
+                processor = backend.OnBasic
+            elif leafType == 'SEQUENCE':
+                processor = backend.OnSequence
+            elif leafType == 'SET':
+                processor = backend.OnSet  # pragma: no cover
+            elif leafType == 'CHOICE':
+                processor = backend.OnChoice
+            elif leafType == 'SEQUENCEOF':
+                processor = backend.OnSequenceOf
+            elif leafType == 'SETOF':
+                processor = backend.OnSetOf  # pragma: no cover
+            elif leafType == 'ENUMERATED':
+                processor = backend.OnEnumerated
+            else:  # pragma: no cover
+                panic("Unexpected type of element: %s" % leafType)  # pragma: no cover
+            processor(nodeTypename, node, leafTypeDict)
+
+        if 'OnShutdown' in dir(backend):
+            backend.OnShutdown(badTypes)
+
+
+def RunBackendInStagingDir(
+        modelingLanguage: str,
+        stagingDir: str,
+        uniqueASNfiles: Dict[Filename, Tuple[AST_Lookup, List[AsnNode], AST_Leaftypes]],
+        badTypes: cleanupNodes.SetOfBadTypenames) -> None:
+    '''Runs the backend with stagingDir/out as its output directory
+(see PublishOutputs).'''
+    outputDir = configMT.outputDir
+    configMT.outputDir = os.path.join(stagingDir, 'out') + os.sep
+    try:
+        RunBackend(modelingLanguage, uniqueASNfiles, badTypes)
+    finally:
+        configMT.outputDir = outputDir
+
+
+def RunBackendsInParallel(
+        modelingLanguages: List[str],
+        stagingDirs: Dict[str, str],
+        uniqueASNfiles: Dict[Filename, Tuple[AST_Lookup, List[AsnNode], AST_Leaftypes]],
+        badTypes: cleanupNodes.SetOfBadTypenames,
+        maxWorkers: int) -> List[str]:
+    '''Runs each backend in a forked process of its own, with at most
+maxWorkers of them running at the same time. The workers inherit the
+already parsed AST (copy-on-write), and the changes the backends make to
+it or to their module globals stay in their own process - so each backend
+always starts from the same state, regardless of maxWorkers.
+Returns the backends that failed.'''
+    groups = {}  # type: Dict[str, List[str]]
+    for modelingLanguage in modelingLanguages:
+        key = g_sharedOutputs.get(modelingLanguage, getBackend(modelingLanguage).__name__)
+        groups.setdefault(key, []).append(modelingLanguage)
+
+    def worker(languages: List[str]) -> None:  # pylint: disable=invalid-sequence-index
+        for modelingLanguage in languages:
+            RunBackendInStagingDir(modelingLanguage, stagingDirs[modelingLanguage], uniqueASNfiles, badTypes)
+
+    ctx = multiprocessing.get_context('fork')
+    pending = list(groups.values())
+    running = {}  # type: Dict[Any, Tuple[Any, List[str]]]
+    failed = []  # type: List[str]
+    while pending or running:
+        while pending and len(running) < maxWorkers:
+            languages = pending.pop(0)
+            p = ctx.Process(target=worker, args=(languages,))
+            p.start()
+            running[p.sentinel] = (p, languages)
+        for sentinel in multiprocessing.connection.wait(list(running.keys())):
+            p, languages = running.pop(sentinel)
+            p.join()
+            if p.exitcode != 0:
+                failed.extend(languages)
+    return failed
+
+
 def main() -> None:
     if "-v" in sys.argv:
         import pkg_resources  # pragma: no cover
@@ -142,6 +385,20 @@ def main() -> None:
     if "-verbose" in sys.argv:
         configMT.verbose = True
         sys.argv.remove("-verbose")
+    if "--no-cache" in sys.argv:
+        configMT.useCache = False
+        sys.argv.remove("--no-cache")
+    maxWorkers = 0
+    if sys.argv.count("-j") != 0:
+        idx = sys.argv.index("-j")
+        try:
+            maxWorkers = int(sys.argv[idx + 1])
+        except:   # pragma: no cover
+            usage(argsToTools)  # pragma: no cover
+        if maxWorkers < 1:
+            usage(argsToTools)  # pragma: no cover
+        del sys.argv[idx]
+        del sys.argv[idx]
     for i in argsToTools:
         if "-" + i in sys.argv:
             toolSelected[i] = True
@@ -158,10 +415,31 @@ def main() -> None:
         if not os.path.isfile(f):
             panic("'%s' is not a file!\n" % f)  # pragma: no cover
 
-    uniqueFilenames = list(set(sys.argv[1:]))
+    uniqueFilenames = sorted(set(sys.argv[1:]))
+    modelingLanguages = [
+        modelingLanguage
+        for arg, modelingLanguage in argsToTools.items()
+        if toolSelected[arg]]
+
+    # Skip the backends whose outputs are up to date
+    outputDir = configMT.outputDir
+    keys = ComputeBackendKeys(uniqueFilenames, modelingLanguages)
+    manifest = LoadManifest(outputDir)
+    outdated = []  # type: List[str]
+    for modelingLanguage in modelingLanguages:
+        if configMT.useCache and modelingLanguage not in g_alwaysRegenerated and \
+                IsUpToDate(modelingLanguage, keys[modelingLanguage], manifest, outputDir):
+            inform("The %s outputs in %s are up to date.", modelingLanguage, outputDir)
+        else:
+            outdated.append(modelingLanguage)
+    if not outdated:
+        return
+
+    asnParser.g_keepXMLAST = 'OG' in outdated
     asnParser.ParseAsnFileList(uniqueFilenames)
 
     uniqueASNfiles = {}  # type: Dict[Filename, Tuple[AST_Lookup, List[AsnNode], AST_Leaftypes]]
+    leafTypeDict = copy.copy(asnParser.g_leafTypeDict)  # map from Typename to leafType
     for asnFile in uniqueFilenames:
         tmpNames = {}  # type: AST_Lookup
         for name in asnParser.g_typesOfFile[asnFile]:
@@ -170,11 +448,10 @@ def main() -> None:
         uniqueASNfiles[asnFile] = (
             copy.copy(tmpNames),                            # map Typename to type definition class from asnAST
             copy.copy(asnParser.g_astOfFile[asnFile]),    # list of nameless type definitions
-            copy.copy(asnParser.g_leafTypeDict))   # map from Typename to leafType
+            leafTypeDict)                                   # the backends only read it - no need to copy it per file
 
         inform("Checking that all base nodes have mandatory ranges set in %s..." % asnFile)
-        for node in list(tmpNames.values()):
-            verify.VerifyRanges(node, asnParser.g_names)
+        verify.VerifyRangesOfTypes(list(tmpNames.keys()), asnParser.g_names)
 
     if configMT.debugParser:
         sys.exit(0)  # pragma: no cover
@@ -182,59 +459,36 @@ def main() -> None:
     # If some AST nodes must be skipped (for any reason), go learn about them
     badTypes = cleanupNodes.DiscoverBadTypes()
 
-    # For each ASN.1 grammar file referenced in the system level description
-    for arg, modelingLanguage in argsToTools.items():
-        if not toolSelected[arg]:
-            continue
-        backend = getBackend(modelingLanguage)
+    # The backends write in staging directories (inside the output directory,
+    # so that their outputs can be moved from there atomically) - and only
+    # the outputs that changed are then moved to the output directory.
+    stagingDirs = {}  # type: Dict[str, str]
+
+    def Publish(modelingLanguage: str) -> None:
+        outputs = PublishOutputs(stagingDirs[modelingLanguage], outputDir)
+        RemoveStaleOutputs(modelingLanguage, outputs, manifest, outputDir)
+        manifest[modelingLanguage] = {'key': keys[modelingLanguage], 'files': outputs}
+
+    try:
+        for modelingLanguage in outdated:
+            stagingDirs[modelingLanguage] = tempfile.mkdtemp(dir=outputDir, prefix=".asn2dataModel-")
+            os.mkdir(os.path.join(stagingDirs[modelingLanguage], 'out'))
+        if maxWorkers:
+            failed = RunBackendsInParallel(outdated, stagingDirs, uniqueASNfiles, badTypes, maxWorkers)
+            for modelingLanguage in outdated:
+                if modelingLanguage not in failed:
+                    Publish(modelingLanguage)
+            if failed:
+                panic("The backend(s) for %s failed." % ", ".join(failed))
+        else:
+            for modelingLanguage in outdated:
+                RunBackendInStagingDir(modelingLanguage, stagingDirs[modelingLanguage], uniqueASNfiles, badTypes)
+                Publish(modelingLanguage)
+    finally:
+        StoreManifest(outputDir, manifest)
+        for stagingDir in stagingDirs.values():
+            shutil.rmtree(stagingDir, ignore_errors=True)
 
-        # For some languages we want to pass the complete list of ASN.1 files to ASN1SCC,
-        # instead of working per type:
-        if modelingLanguage.lower() in ["c", "ada", "smp2", "qgenc", "qgenada"]:
-            backend.OnStartup(modelingLanguage, list(uniqueASNfiles.keys()), configMT.outputDir, badTypes)
-            backend.OnShutdown(badTypes)
-            continue  # bug in coverage.py...  # pragma: no cover
-
-        # Work on each ASN.1 file's types
-        for asnFile in uniqueASNfiles:
-            if 'OnStartup' in dir(backend):
-                backend.OnStartup(modelingLanguage, asnFile, configMT.outputDir, badTypes)
-
-            leafTypeDict = uniqueASNfiles[asnFile][2]
-
-            inform("Executing mappings for types inside %s...", asnFile)
-            names = uniqueASNfiles[asnFile][0]
-            for nodeTypename in sorted(names):
-                # Check if this type must be skipped
-                if nodeTypename in badTypes:
-                    continue
-                node = names[nodeTypename]
-                inform("Processing %s (%s)...", nodeTypename, modelingLanguage)
-
-                # First, make sure we know what leaf type this node is
-                assert nodeTypename in leafTypeDict
-
-                leafType = leafTypeDict[nodeTypename]
-                if leafType in ['BOOLEAN', 'INTEGER', 'REAL', 'OCTET STRING']:
-                    processor = backend.OnBasic
-                elif leafType == 'SEQUENCE':
-                    processor = backend.OnSequence
-                elif leafType == 'SET':
-                    processor = backend.OnSet  # pragma: no cover
-                elif leafType == 'CHOICE':
-                    processor = backend.OnChoice
-                elif leafType == 'SEQUENCEOF':
-                    processor = backend.OnSequenceOf
-                elif leafType == 'SETOF':
-                    processor = backend.OnSetOf  # pragma: no cover
-                elif leafType == 'ENUMERATED':
-                    processor = backend.OnEnumerated
-                else:  # pragma: no cover
-                    panic("Unexpected type of element: %s" % leafType)  # pragma: no cover
-                processor(nodeTypename, node, leafTypeDict)
-
-            if 'OnShutdown' in dir(backend):
-                backend.OnShutdown(badTypes)
 
 if __name__ == "__main__":
     if "-pdb" in sys.argv:
@@ -109,8 +109,7 @@ def main() -> None:
     asn1files = sys.argv[1:]
     asnParser.ParseAsnFileList(asn1files)
     names = asnParser.g_names
-    for node in names.values():
-        verify.VerifyRanges(node, names)
+    verify.VerifyRangesOfTypes(list(names.keys()), names)
 
     # If some AST nodes must be skipped (for any reason), go learn about them
     badTypes = DiscoverBadTypes()
@@ -9,6 +9,7 @@ from . import configMT
 from . import asnParser
 from . import asnAST
 from . import aadlAST
+from . import aadlParser
 from . import utility
 from . import createInternalTypes
 from . import verify
@@ -30,4 +31,6 @@ def print_version() -> None:
           "   aadl2glueC      - TASTE B Mappers (from ASN.1+AADL to glue code)\n"
           "   msgPrinter      - Generate serializers of ASN.1 instances\n"
           "   msgPrinterASN1  - Generate serializers of ASN.1 instances (other encodings)\n"
-          "   smp2asn         - SMP2 to ASN.1 converter\n".format(__version__))
+          "   smp2asn         - SMP2 to ASN.1 converter\n\n"
+          "Run 'dmt serve' to keep DMT loaded in the background: the tools above\n"
+          "(except smp2asn) are then run by it, and start much faster.\n".format(__version__))
@@ -45,6 +45,9 @@ g_subProgramImplementations = []  # type: List[Tuple[str,str,str,str]]
 g_processImplementations = []  # type: List[Tuple[str,str,str,str]]
 g_threadImplementations = []  # type: List[Tuple[str,str,str,str]]
 
+g_signals = {}  # type: Dict[str, Signal]
+g_systems = {}  # type: Dict[str, List[str]]
+
 # AST classes
 
 
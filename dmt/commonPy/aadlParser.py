@@ -0,0 +1,628 @@
+#
+# (C) Semantix Information Technologies.
+#
+# Semantix Information Technologies is licensing the code of the
+# Data Modelling Tools (DMT) in the following dual-license mode:
+#
+# Commercial Developer License:
+#       The DMT Commercial Developer License is the suggested version
+# to use for the development of proprietary and/or commercial software.
+# This version is for developers/companies who do not want to comply
+# with the terms of the GNU Lesser General Public License version 3.
+#
+# GNU LLGPL v. 2.1:
+#       This version of DMT is the one to use for the development of
+# applications, when you are willing to comply with the terms of the
+# GNU Lesser General Public License version 3.
+#
+# Note that in both cases, there are no charges (royalties) for the
+# generated code.
+#
+'''
+AADL Parser
+
+This module parses the subset of AADL that the B mappers use, i.e.
+subprogram/thread/process/system types and implementations, their
+features (parameters and ports), their connections, their
+Source_Language/FV_Name properties, and the DATA types that refer
+to ASN.1 types. The results are placed directly in the globals of
+the aadlAST module (g_apLevelContainers, g_signals, etc).
+
+It follows the actions of the ANTLR2 grammar in commonPy2/aadl.g,
+but runs in-process under Python 3 (no python2 spawn, no pickling).
+Constructs that the B mappers don't need (flows, modes, calls,
+subcomponents, property sets, annexes, etc) are skipped.
+'''
+
+import re
+
+from typing import List, Dict, Tuple, Optional, Any  # NOQA pylint: disable=unused-import
+
+from . import configMT
+from . import aadlAST
+from .aadlAST import (
+    AadlParameter, AadlSubProgramFeature, AadlPropertyAssociationNoModes,
+    AadlPort, AadlEventPort, AadlEventDataPort, AadlThreadFeature,
+    AadlProcessFeature, AadlContainedPropertyAssociation, Signal,
+    InParam, OutParam, InOutParam, UniquePortIdentifier, ApLevelContainer,
+    Connection
+)
+from .utility import panic, inform
+
+
+g_tokenizer = re.compile(r'''
+    (?P<newline>\r\n|\r|\n) |
+    (?P<ws>[ \t\f]+) |
+    (?P<comment>--[^\r\n]*) |
+    (?P<annex>\{\*\*.*?\*\*\}) |
+    (?P<string>"(?:\\.|[^"\\])*") |
+    (?P<number>[0-9][0-9_]*
+        (?:\#[0-9a-fA-F_]+\#(?:[eE]\+?[0-9]+)? |
+           (?:\.(?!\.)[0-9][0-9_]*)?(?:[eE][+-]?[0-9]+)?)) |
+    (?P<ident>[A-Za-z][A-Za-z0-9_]*) |
+    (?P<punct>\+=>|->>|\]->|->|-\[|=>|::|\.\.|[(){}:+\-*;,.\#])
+''', re.VERBOSE | re.DOTALL)
+
+g_keywords = set([
+    'access', 'and', 'all', 'annex', 'applies', 'binding', 'aadlboolean',
+    'bus', 'calls', 'classifier', 'reference', 'connections', 'constant',
+    'data', 'delta', 'device', 'end', 'enumeration', 'event', 'extends',
+    'false', 'features', 'flow', 'flows', 'group', 'implementation', 'in',
+    'inherit', 'initial', 'aadlinteger', 'inverse', 'is', 'list', 'memory',
+    'mode', 'modes', 'none', 'not', 'of', 'or', 'out', 'package',
+    'parameter', 'path', 'port', 'private', 'process', 'processor',
+    'properties', 'property', 'provides', 'public', 'range', 'aadlreal',
+    'refined', 'refines', 'requires', 'server', 'set', 'sink', 'source',
+    'aadlstring', 'subcomponents', 'subprogram', 'system', 'thread', 'to',
+    'transitions', 'true', 'type', 'units', 'value'])
+
+# The clauses that can appear inside a component type or implementation
+g_sectionKeywords = set([
+    'features', 'flows', 'properties', 'connections', 'subcomponents',
+    'calls', 'modes', 'refines'])
+
+g_componentCategories = set([
+    'thread', 'system', 'data', 'subprogram', 'process', 'processor',
+    'memory', 'bus', 'device'])
+
+
+class Token:
+    def __init__(self, kind: str, text: str, line: int) -> None:
+        self._kind = kind
+        self._text = text
+        self._line = line
+        self._lower = text.lower() if kind == 'ident' else text
+
+    def IsKeyword(self, *words: str) -> bool:
+        return self._kind == 'ident' and self._lower in words
+
+    def IsIdent(self) -> bool:
+        return self._kind == 'ident' and self._lower not in g_keywords
+
+    def __repr__(self) -> str:
+        return self._text
+
+
+Statement = List[Token]  # pylint: disable=invalid-sequence-index
+
+
+class AadlSyntaxError(Exception):
+    def __init__(self, filename: str, line: int, msg: str) -> None:
+        Exception.__init__(self, "Error in file '%s', line %d: %s" % (filename, line, msg))
+
+
+def Tokenize(filename: str, data: str) -> List[Token]:  # pylint: disable=invalid-sequence-index
+    tokens = []  # type: List[Token]
+    line = 1
+    pos = 0
+    while pos < len(data):
+        m = g_tokenizer.match(data, pos)
+        if m is None:
+            raise AadlSyntaxError(filename, line, "unexpected character '%s'" % data[pos])
+        kind = m.lastgroup
+        text = m.group(kind)
+        if kind == 'newline':
+            line += 1
+        elif kind == 'annex':
+            tokens.append(Token(kind, text, line))
+            line += len(re.findall(r'\r\n|\r|\n', text))
+        elif kind not in ('ws', 'comment'):
+            tokens.append(Token(kind, text, line))
+        pos = m.end()
+    return tokens
+
+
+class Parser:
+    '''Recursive descent parser over the token list of a single AADL file.
+The current package is kept in the session dictionary, since (like in the
+ANTLR grammar) it carries over from one input file to the next.'''
+
+    def __init__(self, filename: str, tokens: List[Token], session: Dict[str, str]) -> None:  # pylint: disable=invalid-sequence-index
+        self._filename = filename
+        self._tokens = tokens
+        self._pos = 0
+        self._session = session
+
+    def Error(self, msg: str, tok: Optional[Token]=None) -> AadlSyntaxError:
+        if tok is None:
+            tok = self.Peek()
+        line = tok._line if tok is not None else (self._tokens[-1]._line if self._tokens else 0)
+        return AadlSyntaxError(self._filename, line, msg)
+
+    def Peek(self, offset: int=0) -> Optional[Token]:
+        idx = self._pos + offset
+        return self._tokens[idx] if idx < len(self._tokens) else None
+
+    def PeekKeyword(self, *words: str) -> bool:
+        tok = self.Peek()
+        return tok is not None and tok.IsKeyword(*words)
+
+    def Next(self) -> Token:
+        tok = self.Peek()
+        if tok is None:
+            raise self.Error("unexpected end of file")
+        self._pos += 1
+        return tok
+
+    def Expect(self, text: str) -> Token:
+        tok = self.Next()
+        if tok._lower != text:
+            raise self.Error("expected '%s', found '%s'" % (text, tok._text), tok)
+        return tok
+
+    def ExpectIdent(self) -> Token:
+        tok = self.Next()
+        if not tok.IsIdent():
+            raise self.Error("expected an identifier, found '%s'" % tok._text, tok)
+        return tok
+
+    def SkipQualifiedName(self) -> None:
+        self.ExpectIdent()
+        while self.Peek() is not None and self.Peek()._text in ('::', '.'):
+            self.Next()
+            self.ExpectIdent()
+
+    def ReadStatement(self) -> Statement:
+        '''Reads all tokens up to the next ';' that is outside parentheses
+and curly braces (the ';' is consumed, but not returned).'''
+        stmt = []  # type: Statement
+        depth = 0
+        while True:
+            tok = self.Next()
+            if tok._text in ('(', '{'):
+                depth += 1
+            elif tok._text in (')', '}'):
+                depth -= 1
+            elif tok._text == ';' and depth == 0:
+                return stmt
+            stmt.append(tok)
+
+    def ReadSection(self) -> List[Statement]:  # pylint: disable=invalid-sequence-index
+        statements = []  # type: List[Statement]
+        while True:
+            tok = self.Peek()
+            if tok is None or tok.IsKeyword('end', 'annex', 'extends') or tok.IsKeyword(*g_sectionKeywords):
+                return statements
+            stmt = self.ReadStatement()
+            if not (len(stmt) == 1 and stmt[0].IsKeyword('none')):
+                statements.append(stmt)
+
+    def SkipUntilEndOf(self, name: str) -> None:
+        while True:
+            tok = self.Next()
+            if tok.IsKeyword('end') and self.Peek() is not None and self.Peek()._lower == name.lower():
+                self.Next()
+                self.Expect(';')
+                return
+
+    def Parse(self) -> None:
+        while self.Peek() is not None:
+            self.ParseDeclaration()
+
+    def ParseDeclaration(self) -> None:
+        tok = self.Peek()
+        if tok.IsKeyword('package'):
+            self.Next()
+            pkg = self.ExpectIdent()._text
+            while self.Peek() is not None and self.Peek()._text == '::':
+                self.Next()
+                pkg += "::" + self.ExpectIdent()._text
+            self._session['package'] = pkg
+        elif tok.IsKeyword('public', 'private'):
+            self.Next()
+        elif tok.IsKeyword('end'):
+            # end of package
+            self.Next()
+            self.SkipQualifiedName()
+            self.Expect(';')
+        elif tok.IsKeyword('properties'):
+            # package-level property associations
+            self.Next()
+            self.ReadSection()
+        elif tok.IsKeyword('property'):
+            self.Next()
+            self.Expect('set')
+            self.SkipUntilEndOf(self.ExpectIdent()._text)
+        elif tok.IsKeyword('port') and self.Peek(1) is not None and self.Peek(1).IsKeyword('group'):
+            self.Next()
+            self.Next()
+            self.SkipUntilEndOf(self.ExpectIdent()._text)
+        elif tok.IsKeyword('annex'):
+            self.ReadStatement()
+        elif tok.IsKeyword(*g_componentCategories):
+            self.ParseComponent()
+        else:
+            raise self.Error("unexpected '%s'" % tok._text)
+
+    def ParseComponent(self) -> None:
+        categoryTok = self.Next()
+        category = categoryTok._lower
+        if category == 'thread' and self.PeekKeyword('group'):
+            self.Next()
+            category = 'thread group'
+        bImplementation = self.PeekKeyword('implementation')
+        if bImplementation:
+            self.Next()
+        typeid = self.ExpectIdent()
+        defid = None  # type: Optional[Token]
+        if bImplementation:
+            self.Expect('.')
+            defid = self.ExpectIdent()
+
+        sections = {}  # type: Dict[str, List[Statement]]
+        while not self.PeekKeyword('end'):
+            tok = self.Next()
+            if tok.IsKeyword('extends'):
+                self.SkipQualifiedName()
+            elif tok.IsKeyword('annex'):
+                self.ReadStatement()
+            elif tok.IsKeyword(*g_sectionKeywords):
+                if tok.IsKeyword('refines'):
+                    self.Expect('type')
+                sections.setdefault(tok._lower, []).extend(self.ReadSection())
+            else:
+                raise self.Error("unexpected '%s' in %s %s" % (tok._text, category, typeid._text), tok)
+        self.Expect('end')
+        self.SkipQualifiedName()
+        self.Expect(';')
+
+        if bImplementation:
+            self.OnImplementation(category, typeid, defid, sections)
+        else:
+            self.OnType(category, typeid, sections)
+
+    ##################################################
+    # Property associations, classifiers and features
+    ##################################################
+
+    def ParseClassifier(self, stmt: Statement, i: int) -> Tuple[Optional[str], int]:
+        '''Parses "(pkg::)* type (.impl)?" starting at stmt[i].
+Returns the classifier (as "pkg::type") and the index after it.'''
+        if i >= len(stmt) or not stmt[i].IsIdent():
+            return None, i
+        ptid = None  # type: Optional[Token]
+        while i + 2 < len(stmt) and stmt[i + 1]._text == '::':
+            ptid = stmt[i]
+            i += 2
+        tid = stmt[i]
+        i += 1
+        if i + 1 < len(stmt) and stmt[i]._text == '.' and stmt[i + 1].IsIdent():
+            i += 2
+        if ptid is not None:
+            return ptid._text + "::" + tid._text, i
+        return self._session['package'] + "::" + tid._text, i
+
+    def EvaluateTerm(self, toks: Statement) -> Any:
+        '''Returns the value of a (non-boolean) property term, in the
+same form as the ANTLR grammar did (strings keep their quotes,
+numbers are returned as text without sign and unit).'''
+        if not toks:
+            return None
+        first = toks[0]
+        if first._kind == 'string':
+            return first._text
+        if first._kind == 'number':
+            return first._text
+        if first._text in ('+', '-') and len(toks) > 1 and toks[1]._kind == 'number':
+            return toks[1]._text
+        if first.IsKeyword(*g_componentCategories):
+            i = 2 if IsThreadGroup(toks) else 1
+            return self.ParseClassifier(toks, i)[0]
+        if first.IsIdent() and (len(toks) == 1 or toks[1]._text not in ('::', '.')):
+            return first._text  # an enumeration literal
+        return None
+
+    def EvaluatePropertyValue(self, toks: Statement) -> Any:
+        if toks and toks[0]._text == '(':
+            depth = 0
+            for idx, tok in enumerate(toks):
+                if tok._text in ('(', '{'):
+                    depth += 1
+                elif tok._text in (')', '}'):
+                    depth -= 1
+                    if depth == 0:
+                        if idx != len(toks) - 1:
+                            return None  # e.g. a boolean expression
+                        break
+                elif tok._text == ',' and depth == 1:
+                    return None  # lists are not evaluated
+            return self.EvaluateTerm(toks[1:-1])
+        return self.EvaluateTerm(toks)
+
+    def ParsePropertyAssociation(self, stmt: Statement) -> Tuple[str, Any]:
+        i = 0
+        if len(stmt) > 2 and stmt[1]._text == '::':
+            i = 2
+        if len(stmt) < i + 2 or stmt[i]._kind != 'ident' or stmt[i + 1]._text not in ('=>', '+=>'):
+            raise self.Error("invalid property association", stmt[0] if stmt else None)
+        name = stmt[i]._text
+        i += 2
+        while i < len(stmt) and stmt[i].IsKeyword('constant', 'access'):
+            i += 1
+        end = i
+        depth = 0
+        while end < len(stmt):
+            tok = stmt[end]
+            if tok._text in ('(', '{'):
+                depth += 1
+            elif tok._text in (')', '}'):
+                depth -= 1
+            elif depth == 0 and tok.IsKeyword('applies', 'in'):
+                break
+            end += 1
+        return name, self.EvaluatePropertyValue(stmt[i:end])
+
+    def ParseCurlyProperties(self, stmt: Statement, i: int) -> List[AadlPropertyAssociationNoModes]:  # pylint: disable=invalid-sequence-index
+        '''Parses the "{ name => value; ... }" that may follow a feature.'''
+        result = []  # type: List[AadlPropertyAssociationNoModes]
+        if i >= len(stmt) or stmt[i]._text != '{':
+            return result
+        current = []  # type: Statement
+        depth = 0
+        for tok in stmt[i + 1:]:
+            if tok._text in ('(', '{'):
+                depth += 1
+            elif tok._text in (')', '}'):
+                if depth == 0:
+                    break
+                depth -= 1
+            elif tok._text == ';' and depth == 0:
+                name, value = self.ParsePropertyAssociation(current)
+                result.append(AadlPropertyAssociationNoModes(name, value))
+                current = []
+                continue
+            current.append(tok)
+        return result
+
+    def ParseFeature(self, stmt: Statement) -> Tuple[str, Any]:
+        '''Returns the feature id, and either an AadlParameter, an
+AadlPort/AadlEventDataPort/AadlEventPort, or None (for the features
+that the B mappers don't care about).'''
+        if len(stmt) < 3 or stmt[1]._text != ':':
+            raise self.Error("invalid feature", stmt[0] if stmt else None)
+        iid = stmt[0]._text
+        i = 2
+        if stmt[i].IsKeyword('refined'):
+            i += 2
+        direction = None  # type: Optional[str]
+        if stmt[i].IsKeyword('in') and i + 1 < len(stmt) and stmt[i + 1].IsKeyword('out'):
+            direction = "INOUT"
+            i += 2
+        elif stmt[i].IsKeyword('in'):
+            direction = "IN"
+            i += 1
+        elif stmt[i].IsKeyword('out'):
+            direction = "OUT"
+            i += 1
+        if direction is None or i >= len(stmt):
+            return iid, None
+        if stmt[i].IsKeyword('parameter'):
+            classifier, i = self.ParseClassifier(stmt, i + 1)
+            if classifier is None:
+                return iid, None
+            param = AadlParameter(direction, classifier)
+            param._encoding = "UPER"
+            cpa = self.ParseCurlyProperties(stmt, i)
+            encodings = [x._propertyExpressionOrList for x in cpa if x._name.lower()[-8:] == "encoding"]
+            if len(encodings) == 1 and encodings[0] is not None:
+                param._encoding = encodings[0].capitalize()
+            return iid, param
+        kinds = [x._lower for x in stmt[i:i + 3]]
+        port = None  # type: Any
+        if kinds == ['event', 'data', 'port']:
+            classifier, i = self.ParseClassifier(stmt, i + 3)
+            port = AadlEventDataPort(direction, classifier) if classifier is not None else None
+        elif kinds[:2] == ['data', 'port']:
+            classifier, i = self.ParseClassifier(stmt, i + 2)
+            port = AadlPort(direction, classifier) if classifier is not None else None
+        elif kinds[:2] == ['event', 'port']:
+            i += 2
+            port = AadlEventPort(direction, None)
+        if port is None:
+            return iid, None
+        port._encoding = "UPER"
+        cpa = self.ParseCurlyProperties(stmt, i)
+        encodings = [x._propertyExpressionOrList for x in cpa if x._name.lower()[-8:] == "encoding"]
+        if len(encodings) == 1 and encodings[0] is not None:
+            port._encoding = encodings[0].capitalize()
+        calledSubprograms = [x._propertyExpressionOrList for x in cpa if x._name.lower() == "rcmoperation"]
+        if len(calledSubprograms) == 1 and isinstance(port, AadlEventPort) and calledSubprograms[0] is not None:
+            port._sp = calledSubprograms[0][2:]
+        return iid, port
+
+    def ParsePortIdentifier(self, stmt: Statement, i: int) -> Tuple[UniquePortIdentifier, int]:
+        if i + 2 < len(stmt) and stmt[i + 1]._text == '.':
+            return UniquePortIdentifier(stmt[i]._text, stmt[i + 2]._text), i + 3
+        if i < len(stmt):
+            return UniquePortIdentifier(None, stmt[i]._text), i + 1
+        raise self.Error("missing port identifier", stmt[-1])
+
+    def ParseConnection(self, stmt: Statement) -> Optional[Connection]:
+        i = 0
+        if len(stmt) > 1 and stmt[1]._text == ':':
+            if len(stmt) > 2 and stmt[2].IsKeyword('refined'):
+                return None  # connection refinements are not supported
+            i = 2
+        for kind in [['event', 'data', 'port'], ['data', 'port'], ['event', 'port'],
+                     ['parameter'], ['bus', 'access'], ['data', 'access'], ['port', 'group']]:
+            if [x._lower for x in stmt[i:i + len(kind)]] == kind:
+                i += len(kind)
+                break
+        else:
+            raise self.Error("unsupported connection", stmt[i] if i < len(stmt) else None)
+        u1, i = self.ParsePortIdentifier(stmt, i)
+        if i >= len(stmt) or stmt[i]._text not in ('->', '->>'):
+            raise self.Error("expected '->' in connection", stmt[-1])
+        u2, i = self.ParsePortIdentifier(stmt, i + 1)
+        return Connection(u1, u2)
+
+    ##################################################
+    # The actions of the ANTLR grammar
+    ##################################################
+
+    def OnType(self, category: str, typeid: Token, sections: Dict[str, List[Statement]]) -> None:  # pylint: disable=invalid-sequence-index
+        spName = typeid._text
+        if category == 'data':
+            if 'properties' in sections:
+                self.OnDataType(typeid, sections['properties'])
+            return
+        if category == 'system':
+            if 'features' in sections:
+                features = [self.ParseFeature(x)[1] for x in sections['features']]
+                aadlAST.g_systems[spName] = [
+                    x._sp for x in features
+                    if isinstance(x, AadlEventPort) and x._direction == "OUT"]
+            return
+        if category not in ['subprogram', 'thread', 'process']:
+            return
+        if category != 'subprogram' and configMT.g_bOnlySubprograms:
+            return
+
+        sp = ApLevelContainer(spName)
+        aadlAST.g_apLevelContainers[spName] = sp
+        for stmt in sections.get('features', []):
+            iid, feature = self.ParseFeature(stmt)
+            if category == 'subprogram':
+                if not isinstance(feature, AadlParameter):
+                    continue
+                spFeature = AadlSubProgramFeature(iid, feature)
+                source = spFeature._parameter
+            else:
+                if not isinstance(feature, AadlPort):
+                    continue
+                if category == 'thread':
+                    source = AadlThreadFeature(iid, feature)._port
+                else:
+                    source = AadlProcessFeature(iid, feature)._port
+            signal = aadlAST.g_signals.get(source._type, source._type)
+            if source._direction == "IN":
+                param = InParam(spName, iid, signal, source)
+            elif source._direction == "OUT":
+                param = OutParam(spName, iid, signal, source)
+            else:
+                param = InOutParam(spName, iid, signal, source)
+            sp.AddParam(param)
+        for stmt in sections.get('properties', []):
+            name, value = self.ParsePropertyAssociation(stmt)
+            if name[-15:].lower() == "source_language" and value is not None:
+                sp.SetLanguage(value.replace("\"", ""))
+
+    def OnDataType(self, typeid: Token, properties: List[Statement]) -> None:  # pylint: disable=invalid-sequence-index
+        asnFilename = ""
+        asnNodename = ""
+        asnSize = -1
+        for stmt in properties:
+            name, value = self.ParsePropertyAssociation(stmt)
+            if name.lower() == "source_text" and value is not None:
+                asnFilename = value[1:-1]
+            elif name.lower() == "type_source_name" and value is not None:
+                asnNodename = value[1:-1]
+            elif name.lower() == "source_data_size":
+                try:
+                    asnSize = int(value)
+                except (TypeError, ValueError):
+                    panic("Line %d: DATA (%s) must have source_data_size be declared as [0-9]B (not '%s')" % (
+                        stmt[0]._line, typeid._text, value))
+        if asnFilename != "" and asnNodename != "" and asnSize != -1:
+            s = Signal(asnFilename, asnNodename, asnSize)
+            aadlAST.g_signals[typeid._text] = s
+            aadlAST.g_signals[self._session['package'] + "::" + typeid._text] = s
+        else:
+            panic("Line %d: DATA (%s) must have Source_Text, Type_Source_Name and Source_Data_Size" % (
+                typeid._line, typeid._text))
+
+    def OnImplementation(
+            self,
+            category: str,
+            typeid: Token,
+            defid: Token,
+            sections: Dict[str, List[Statement]]) -> None:  # pylint: disable=invalid-sequence-index
+        registry = {
+            'subprogram': aadlAST.g_subProgramImplementations,
+            'thread': aadlAST.g_threadImplementations,
+            'process': aadlAST.g_processImplementations,
+        }  # type: Dict[str, List[Any]]
+        if category not in registry:
+            return
+        if category != 'subprogram' and configMT.g_bOnlySubprograms:
+            return
+        spName = typeid._text
+        if spName not in aadlAST.g_apLevelContainers:
+            panic("Line %d: %s (%s) must first be declared before it is implemented" % (
+                typeid._line, category.capitalize(), spName))
+        sp = aadlAST.g_apLevelContainers[spName]
+        implementation = [spName, defid._text, sp._language, ""]
+        registry[category].append(implementation)
+        for stmt in sections.get('connections', []):
+            conn = self.ParseConnection(stmt)
+            if conn is None or conn._from._portId is None or conn._to._portId is None:
+                continue  # One of _from,_to are connection_refinements (unsupported)
+            sp.AddConnection(conn._from, conn._to)
+        for stmt in sections.get('properties', []):
+            assoc = AadlContainedPropertyAssociation(*self.ParsePropertyAssociation(stmt))
+            if assoc._value is None:
+                continue
+            if assoc._name[-15:].lower() == "source_language":
+                implementation[2] = assoc._value.replace("\"", "")
+            if assoc._name[-15:].lower() == "fv_name":
+                implementation[3] = assoc._value.replace("\"", "")
+
+
+def IsThreadGroup(toks: Statement) -> bool:
+    return len(toks) > 1 and toks[0].IsKeyword('thread') and toks[1].IsKeyword('group')
+
+
+def ClearAST() -> None:
+    aadlAST.g_apLevelContainers.clear()
+    aadlAST.g_signals.clear()
+    aadlAST.g_systems.clear()
+    del aadlAST.g_subProgramImplementations[:]
+    del aadlAST.g_processImplementations[:]
+    del aadlAST.g_threadImplementations[:]
+
+
+def ParseAADLfilesAndResolveSignals(listOfFilenames: List[str]) -> None:  # pylint: disable=invalid-sequence-index
+    '''Parses the AADL files, and resolves all references to AADL Data
+types into the param._signal member of each SUBPROGRAM param.'''
+    ClearAST()
+    session = {'package': ''}
+    for aadlFilename in listOfFilenames:
+        inform("Parsing %s...", aadlFilename)
+        try:
+            with open(aadlFilename, 'r') as f:
+                data = f.read()
+            Parser(aadlFilename, Tokenize(aadlFilename, data), session).Parse()
+        except AadlSyntaxError as e:
+            panic(str(e))
+
+    # Resolve signal definitions over all input AADL files
+    for subProgramName, subProgram in aadlAST.g_apLevelContainers.items():
+        inform("Resolving data definitions in subprogram %s..." % subProgramName)
+        for param in subProgram._params:
+            if not isinstance(param._signal, Signal):
+                if param._signal not in aadlAST.g_signals:
+                    panic("Unknown data type %s in the definition of %s!\n" % (
+                        param._signal, subProgramName))  # pragma: no cover
+                param._signal = aadlAST.g_signals[param._signal]
+
+# vim: tabstop=8 expandtab shiftwidth=4 softtabstop=4
@@ -75,6 +75,9 @@
 #                     |        AsnMetaMember        |
 #                     +-----------------------------+
 
+import sys
+import hashlib
+
 from typing import List, Union, Dict, Any  # NOQA pylint: disable=unused-import
 
 from . import utility
@@ -84,11 +87,24 @@ AsnSequenceOrSet = Union['AsnSequence', 'AsnSet']
 AsnSequenceOrSetOf = Union['AsnSequenceOf', 'AsnSetOf']
 
 
+def Intern(s: Any) -> Any:
+    '''Grammars with thousands of types repeat the same filenames and
+type names over and over - keep only one copy of each of them.'''
+    return sys.intern(s) if isinstance(s, str) else s
+
+
+# All the node classes declare __slots__, so that the (many thousands of)
+# AST nodes don't carry a per-instance __dict__. Slots that are never set
+# raise AttributeError, just like missing attributes did before - so the
+# hasattr(node, "_Min") checks in asnParser keep working. Note that the
+# mappers set _isArtificial, _pseudoname, _containedType, etc. after
+# construction: any new attribute must be added to the relevant __slots__.
 class AsnNode(object):
+    __slots__ = ('_leafType', '_asnFilename', '_lineno', '_isArtificial', '_name')
 
     def __init__(self, asnFilename: str) -> None:
         self._leafType = "unknown"
-        self._asnFilename = asnFilename
+        self._asnFilename = Intern(asnFilename)
         self._lineno = -1
         self._isArtificial = False
 
@@ -103,11 +119,15 @@ class AsnNode(object):
 
 
 class AsnBasicNode(AsnNode):
+    __slots__ = ()
+
     def __init__(self, asnFilename: str) -> None:
         AsnNode.__init__(self, asnFilename)
 
 
 class AsnComplexNode(AsnNode):
+    __slots__ = ()
+
     def __init__(self, asnFilename: str) -> None:
         AsnNode.__init__(self, asnFilename)
 
@@ -137,6 +157,7 @@ Members:
     _name : the name of the type (or var)
     _bDefaultValue : one of True,False,None.
 '''
+    __slots__ = ('_bDefaultValue',)
     validOptions = ['bDefaultValue', 'lineno', 'asnFilename']
 
     def __init__(self, **args: Any) -> None:
@@ -169,6 +190,7 @@ Members:
     _range : a tuple containing the valid range for the integer or []
     _iDefaultValue : either None, or the default value for this integer
 '''
+    __slots__ = ('_range', '_iDefaultValue')
     validOptions = ['range', 'iDefaultValue', 'lineno', 'asnFilename']
 
     def __init__(self, **args: Any) -> None:
@@ -212,6 +234,7 @@ Members:
                       Or [].
     _dbDefaultValue : either None, or the default value for this real
 '''
+    __slots__ = ('_range', '_mantissaRange', '_baseRange', '_exponentRange', '_dbDefaultValue')
     validOptions = ['range', 'mantissa', 'base', 'exponent', 'defaultValue', 'lineno', 'asnFilename']
 
     def __init__(self, **args: Any) -> None:
@@ -263,6 +286,7 @@ Members:
     _name : the name of the type (or var)
     _range : a tuple containing the allowed string size or []
 '''
+    __slots__ = ('_range', '_pseudoname')
     validOptions = ['range', 'lineno', 'asnFilename']
 
     def __init__(self, **args: Any) -> None:
@@ -299,6 +323,7 @@ Members:
 
 class AsnOctetString(AsnString):
     '''This class stores the semantic content of an ASN.1 OCTET STRING.'''
+    __slots__ = ()
 
     def __init__(self, **args: Any) -> None:
         AsnString.__init__(self, **args)
@@ -315,6 +340,7 @@ class AsnOctetString(AsnString):
 
 class AsnUTF8String(AsnString):
     '''This class stores the semantic content of an ASN.1 UTF8String.'''
+    __slots__ = ()
 
     def __init__(self, **args: Any) -> None:
         AsnString.__init__(self, **args)  # pragma: no cover
@@ -324,6 +350,7 @@ class AsnUTF8String(AsnString):
 
 class AsnAsciiString(AsnString):
     '''This class stores the semantic content of an ASN.1 AsciiString.'''
+    __slots__ = ()
 
     def __init__(self, **args: Any) -> None:
         AsnString.__init__(self, **args)  # pragma: no cover
@@ -333,6 +360,7 @@ class AsnAsciiString(AsnString):
 
 class AsnNumberString(AsnString):
     '''This class stores the semantic content of an ASN.1 NumberString.'''
+    __slots__ = ()
 
     def __init__(self, **args: Any) -> None:
         AsnString.__init__(self, **args)  # pragma: no cover
@@ -342,6 +370,7 @@ class AsnNumberString(AsnString):
 
 class AsnVisibleString(AsnString):
     '''This class stores the semantic content of an ASN.1 VisibleString.'''
+    __slots__ = ()
 
     def __init__(self, **args: Any) -> None:
         AsnString.__init__(self, **args)  # pragma: no cover
@@ -351,6 +380,7 @@ class AsnVisibleString(AsnString):
 
 class AsnPrintableString(AsnString):
     '''This class stores the semantic content of an ASN.1 PrintableString.'''
+    __slots__ = ()
 
     def __init__(self, **args: Any) -> None:
         AsnString.__init__(self, **args)  # pragma: no cover
@@ -374,6 +404,7 @@ Members:
     _default : if one of the values of the enumeration is the default,
                it is contained in this member
 '''
+    __slots__ = ('_members', '_default', '_pseudoname')
     validOptions = ['members', 'default', 'lineno', 'asnFilename']
 
     def __init__(self, **args: Any) -> None:
@@ -464,6 +495,7 @@ Members:
                   two elements: the name of the variable and the
                   type itself (as an AsnInt, AsnReal, ... or an AsnMetaMember).
 '''
+    __slots__ = ('_members',)
     validOptions = ['members', 'lineno', 'asnFilename']
 
     def __init__(self, **args: Any) -> None:
@@ -506,6 +538,7 @@ Members:
 
 
 class AsnSet(AsnComplexNode):
+    __slots__ = ('_members',)
 
     def __init__(self, **args: Any) -> None:
         AsnComplexNode.__init__(self, args.get('asnFilename', ''))
@@ -555,6 +588,7 @@ Members:
                   two elements: the name of the variable and the
                   type itself (as an AsnInt, AsnReal, ... or an AsnMetaMember).
 '''
+    __slots__ = ('_members',)
     validOptions = ['members', 'lineno', 'asnFilename']
 
     def __init__(self, **args: Any) -> None:
@@ -633,6 +667,7 @@ Members:
     _containedType : the contained element (either a string or AsnNode)
     _range : [] or a tuple with the allowed size range.
 '''
+    __slots__ = ('_range', '_containedType')
     validOptions = ['range', 'containedType', 'lineno', 'asnFilename']
 
     def __init__(self, **args: Any) -> None:
@@ -667,6 +702,7 @@ Members:
 
 
 class AsnSetOf(AsnComplexNode):
+    __slots__ = ('_range', '_containedType')
 
     def __init__(self, **args: Any) -> None:
         AsnComplexNode.__init__(self, args.get('asnFilename', ''))
@@ -706,12 +742,13 @@ CHOICE or SEQUENCE.
 Members:
     _containedType : the contained element as a string (type name)
 '''
+    __slots__ = ('_containedType', '_Min', '_Max')
     validOptions = ['containedType', 'Min', 'Max', 'lineno', 'asnFilename']
 
     def __init__(self, **args: Any) -> None:
         AsnNode.__init__(self, args.get('asnFilename', ''))
-        self._leafType = args.get('containedType', None)
-        self._containedType = args.get('containedType', None)
+        self._leafType = Intern(args.get('containedType', None))
+        self._containedType = self._leafType
         self._lineno = args.get('lineno', None)
         self._Min = args.get('Min', None)
         self._Max = args.get('Max', None)
@@ -738,12 +775,13 @@ e.g.:
     _name contains 'MyNewType'
     _containedType contains 'MyOldType'
 '''
+    __slots__ = ('_containedType', '_Min', '_Max')
     validOptions = ['containedType', 'Min', 'Max', 'lineno', 'asnFilename']
 
     def __init__(self, **args: Any) -> None:
         AsnNode.__init__(self, args.get('asnFilename', ''))
-        self._leafType = args.get('containedType', None)
-        self._containedType = args.get('containedType', None)
+        self._leafType = Intern(args.get('containedType', None))
+        self._containedType = self._leafType
         self._lineno = args.get('lineno', None)
         self._Min = args.get('Min', None)
         self._Max = args.get('Max', None)
@@ -759,6 +797,112 @@ e.g.:
         assert self._leafType is not None   # pragma: no cover
         return result  # pragma: no cover
 
+
+def CommonRangeFingerprintPerSMP2(r: List[int]) -> Any:  # pylint: disable=invalid-sequence-index
+    '''The part of the ranges that CommonIdenticalRangePerSMP2 looks at.'''
+    if len(r) == 2 and r[0] == r[1]:
+        r = [r[0]]
+    if len(r) > 2:
+        return ('?',)  # pragma: no cover
+    return (len(r), r[-1]) if r else (0,)
+
+
+def FingerprintPerSMP2(node_or_str: Union[str, AsnNode], typeDict: Lookup, memo: Dict[int, Any]) -> Any:
+    '''Returns a hashable summary of a type, with the guarantee that types
+that are IdenticalPerSMP2 have the same fingerprint (the reverse is not
+true - types with the same fingerprint may still be different).
+
+SEQUENCE/SET/CHOICE are only compared on the kind of their first member
+(in name order): CommonIdenticalCheck zips the members, so a type without
+members is identical to all of them. Those return ('MEMBERS',) - as do all
+the nested ones. Types that can't be fingerprinted return None.
+The memo maps node ids to the fingerprints computed so far.'''
+    node = node_or_str
+    while isinstance(node, (str, AsnMetaMember)):
+        if isinstance(node, AsnMetaMember):
+            node = node._containedType
+        elif node not in typeDict:
+            utility.panic("There's no such type in typename dictionary: '%s'" % node)
+        else:
+            node = typeDict[node]
+    if id(node) in memo:
+        return memo[id(node)]
+    memo[id(node)] = None  # guards against recursive types
+
+    def nested(n: Union[str, AsnNode]) -> Any:
+        fp = FingerprintPerSMP2(n, typeDict, memo)
+        return ('MEMBERS',) if fp is not None and fp[0] == 'MEMBERS' else fp
+
+    fp = None  # type: Any
+    if isinstance(node, AsnBool):
+        fp = ('BOOLEAN',)
+    elif isinstance(node, AsnInt):
+        fp = ('INTEGER', CommonRangeFingerprintPerSMP2(node._range))
+    elif isinstance(node, AsnReal):
+        fp = ('REAL', CommonRangeFingerprintPerSMP2(node._range))
+    elif isinstance(node, AsnString):
+        fp = ('STRING', CommonRangeFingerprintPerSMP2(node._range))
+    elif isinstance(node, AsnEnumerated):
+        fp = ('ENUMERATED', tuple(sorted(tuple(x) for x in node._members)))
+    elif isinstance(node, (AsnSequence, AsnSet, AsnChoice)):
+        if node._members:
+            first = nested(sorted(node._members, key=lambda x: x[0])[0][1])
+            fp = ('MEMBERS', first) if first is not None else None
+        else:
+            fp = ('MEMBERS',)
+    elif isinstance(node, (AsnSequenceOf, AsnSetOf)):
+        contained = nested(node._containedType)
+        if contained is not None:
+            fp = ('ARRAY', CommonRangeFingerprintPerSMP2(node._range), contained)
+    memo[id(node)] = fp
+    return fp
+
+
+def DefinitionHash(node_or_str: Union[str, AsnNode], typeDict: Lookup, memo: Dict[str, str]) -> str:
+    '''Returns a hex digest of everything in a type's definition - including
+the definitions of all the types it references, transitively. Line numbers
+and filenames are left out, so moving a type around in the grammar doesn't
+change its digest; editing it (or anything it depends on) does.
+The memo maps typenames to the digests computed so far.'''
+    if isinstance(node_or_str, str):
+        if node_or_str in memo:
+            return memo[node_or_str]
+        if node_or_str not in typeDict:
+            utility.panic("There's no such type in typename dictionary: '%s'" % node_or_str)
+        memo[node_or_str] = "recursive:" + node_or_str  # guards against recursive types
+        memo[node_or_str] = DefinitionHash(typeDict[node_or_str], typeDict, memo)
+        return memo[node_or_str]
+
+    h = hashlib.sha256()
+
+    def feed(value: Any) -> None:
+        if isinstance(value, AsnNode):
+            h.update(DefinitionHash(value, typeDict, memo).encode('utf-8'))
+        elif isinstance(value, (list, tuple)):
+            h.update(b'[')
+            for v in value:
+                feed(v)
+            h.update(b']')
+        else:
+            h.update(repr(value).encode('utf-8') + b'\0')
+
+    node = node_or_str
+    h.update(node.__class__.__name__.encode('utf-8') + b'\0')
+    skipped = ['_lineno', '_asnFilename', '_isArtificial']
+    if isinstance(node, (AsnMetaMember, AsnMetaType)):
+        skipped.append('_leafType')   # same as _containedType
+    for slot in sorted(set(s for cls in type(node).__mro__ for s in getattr(cls, '__slots__', ()))):
+        if slot in skipped or not hasattr(node, slot):
+            continue
+        value = getattr(node, slot)
+        h.update(slot.encode('utf-8') + b'=')
+        if slot == '_containedType' and isinstance(value, str):
+            h.update(b'ref:' + DefinitionHash(value, typeDict, memo).encode('utf-8'))
+        else:
+            feed(value)
+    return h.hexdigest()
+
+
 # Helper functions
 
 
@@ -45,14 +45,19 @@ ASN.1 Parser
 This module parses ASN.1 grammars and creates an abstract syntax tree (AST)
 inside configMT.inputCodeAST, for use with the code generators.
 '''
+import io
 import os
 import sys
 import copy
+import pickle
+import shutil
+import hashlib
 import tempfile
 import re
 import distutils.spawn as spawn
 
 import xml.sax  # type: ignore
+import xml.etree.ElementTree as ElementTree
 from typing import IO, TypeVar, Type, Optional, Callable, Union, List, Dict, Tuple, Any  # NOQA pylint: disable=W0611
 
 from . import configMT
@@ -86,6 +91,19 @@ g_modules = {}       # type: AST_Modules
 
 g_checkedSoFarForKeywords = {}  # type: Dict[str, int]
 
+# The globals that ParseAsnFileList fills in
+g_parsedASTGlobals = [
+    'g_names', 'g_typesOfFile', 'g_leafTypeDict', 'g_astOfFile', 'g_modules',
+    'g_checkedSoFarForKeywords', 'g_metatypes']
+
+# Used by the DMT daemon ("dmt serve"): snapshots of already parsed ASTs,
+# keyed by the hash of their inputs - and a callback to report new ones
+g_parsedASTs = {}  # type: Dict[str, bytes]
+g_onParsed = None  # type: Optional[Callable[[str, bytes], None]]
+
+# How many bytes of ASN1SCC outputs the cache keeps (the least recently used go first)
+g_maxCachedXMLBytes = 256 * 1024 * 1024
+
 g_invalidKeywords = [
     "active", "adding", "all", "alternative", "and", "any", "as", "atleast", "axioms", "block", "call", "channel", "comment", "connect", "connection", "constant", "constants", "create", "dcl", "decision", "default", "else", "endalternative", "endblock", "endchannel", "endconnection", "enddecision", "endgenerator", "endmacro", "endnewtype", "endoperator", "endpackage", "endprocedure", "endprocess", "endrefinement", "endselect", "endservice", "endstate", "endsubstructure", "endsyntype", "endsystem", "env", "error", "export", "exported", "external", "fi", "finalized", "for", "fpar", "from", "gate", "generator", "if", "import", "imported", "in", "inherits", "input", "interface", "join", "literal", "literals", "macro", "macrodefinition", "macroid", "map", "mod", "nameclass", "newtype", "nextstate", "nodelay", "noequality", "none", "not", "now", "offspring", "operator", "operators", "or", "ordering", "out", "output", "package", "parent", "priority", "procedure", "process", "provided", "redefined", "referenced", "refinement", "rem", "remote", "reset", "return", "returns", "revealed", "reverse", "save", "select", "self", "sender", "service", "set", "signal", "signallist", "signalroute", "signalset", "spelling", "start", "state", "stop", "struct", "substructure", "synonym", "syntype", "system", "task", "then", "this", "timer", "to", "type", "use", "via", "view", "viewed", "virtual", "with", "xor", "end", "i", "j", "auto", "const",
     # From Nicolas Gillet/Astrium for SCADE
@@ -378,49 +396,171 @@ def CheckForInvalidKeywords(node_or_str: Union[str, AsnNode]) -> None:
                 CheckForInvalidKeywords(g_names[node._containedType])
 
 
+def GetCacheDir() -> str:
+    '''Returns the folder where ASN1SCC outputs are cached ($XDG_CACHE_HOME/dmt).'''
+    cacheHome = os.environ.get('XDG_CACHE_HOME', '')
+    if cacheHome == '':
+        cacheHome = os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cacheHome, 'dmt')
+
+
+def ComputeCacheKey(listOfFilenames: List[str], tools: List[str], flags: str) -> str:  # pylint: disable=invalid-sequence-index
+    '''Hashes everything that affects ASN1SCC's output: the names and contents
+of the input files, the identity (mtime/size) of the ASN1SCC binary and its
+templates, and the command line flags.'''
+    h = hashlib.sha256()
+    for f in sorted(listOfFilenames):
+        h.update(f.encode('utf-8') + b'\0')
+        with open(f, 'rb') as inputFile:
+            h.update(inputFile.read())
+        h.update(b'\0')
+    for tool in tools:
+        if os.path.exists(tool):
+            st = os.stat(tool)
+            h.update(("%s:%r:%d\0" % (tool, st.st_mtime, st.st_size)).encode('utf-8'))
+    h.update(flags.encode('utf-8'))
+    return h.hexdigest()
+
+
+def PruneXMLCache() -> None:
+    '''Removes the least recently used (cached) ASN1SCC outputs, until the
+rest fit in g_maxCachedXMLBytes - but always keeps the most recent one.'''
+    cachedXMLs = []
+    for filename in os.listdir(GetCacheDir()):
+        if filename.endswith('.xml'):
+            try:
+                st = os.stat(os.path.join(GetCacheDir(), filename))
+                cachedXMLs.append((st.st_mtime, st.st_size, filename))
+            except OSError:  # pragma: no cover
+                pass  # pragma: no cover
+    totalSize = 0
+    for idx, (_, size, filename) in enumerate(sorted(cachedXMLs, reverse=True)):
+        totalSize += size
+        if idx > 0 and totalSize > g_maxCachedXMLBytes:
+            try:
+                os.unlink(os.path.join(GetCacheDir(), filename))
+            except OSError:  # pragma: no cover
+                pass  # pragma: no cover
+
+
+def InvokeASN1SCC(mono: str, asn1SccPath: str, astVersion: int, xmlAST: str, listOfFilenames: List[str]) -> int:  # pylint: disable=invalid-sequence-index
+    '''Spawns ASN1SCC to create the XML AST (of the requested AST version) in xmlAST.
+If an identical invocation was done before, the cached XML is copied instead
+(unless caching is disabled via configMT.useCache).'''
+    asn1SccDir = os.path.dirname(os.path.abspath(asn1SccPath))
+    flags = "-customStg xml.stg -customStgAstVerion %d" % astVersion
+    cachedXML = None  # type: Optional[str]
+    if configMT.useCache:
+        key = ComputeCacheKey(
+            listOfFilenames, [asn1SccPath, asn1SccDir + "/xml.stg"], mono + flags)
+        cachedXML = os.path.join(GetCacheDir(), key + ".xml")
+        if os.path.isfile(cachedXML):
+            utility.inform("Using cached ASN1SCC output (%s)...", cachedXML)
+            shutil.copyfile(cachedXML, xmlAST)
+            # (its mtime is the time it was last used - see PruneXMLCache)
+            try:
+                os.utime(cachedXML)
+            except OSError:  # pragma: no cover
+                pass  # pragma: no cover
+            return 0
+    spawnResult = os.system(
+        mono + "\"" + asn1SccPath + "\" -customStg \"" + asn1SccDir + "/xml.stg:" + xmlAST +
+        "\" -customStgAstVerion " + str(astVersion) + " \"" + "\" \"".join(listOfFilenames) + "\"")
+    if spawnResult == 0 and cachedXML is not None and os.path.isfile(xmlAST):
+        # Store atomically, so that concurrent DMT invocations never see partial files
+        try:
+            os.makedirs(GetCacheDir(), exist_ok=True)
+            (fd, tmpName) = tempfile.mkstemp(dir=GetCacheDir())
+            os.close(fd)
+            shutil.copyfile(xmlAST, tmpName)
+            os.replace(tmpName, cachedXML)
+            PruneXMLCache()
+        except OSError as e:  # pragma: no cover
+            utility.warn("Failed to cache ASN1SCC output (%s)", str(e))  # pragma: no cover
+    return spawnResult
+
+
 def ParseAsnFileList(listOfFilenames: List[str]) -> None:  # pylint: disable=invalid-sequence-index
     asn1SccPath = spawn.find_executable('asn1.exe')
     if asn1SccPath is None:
         utility.panic("ASN1SCC seems not installed on your system (asn1.exe not found in PATH).\n")
     else:
+        mono = "mono " if sys.argv[0].endswith('.py') and sys.platform.startswith('linux') else ""
+        key = None  # type: Optional[str]
+        if g_parsedASTs or g_onParsed is not None:
+            key = ComputeCacheKey(
+                listOfFilenames,
+                [asn1SccPath, os.path.dirname(os.path.abspath(asn1SccPath)) + "/xml.stg"],
+                mono + "ParseAsnFileList")
+            if key in g_parsedASTs and not g_keepXMLAST:
+                utility.inform("Using the already parsed AST (DMT daemon)...")
+                RestoreParsedAST(g_parsedASTs[key])
+                return
         (dummy, xmlAST) = tempfile.mkstemp()
         os.fdopen(dummy).close()
-        # spawnResult = os.system("mono \""+asn1SccPath+"\" -ast \""+xmlAST+"\" \"" + "\" \"".join(listOfFilenames) + "\"")
-        asn1SccDir = os.path.dirname(os.path.abspath(asn1SccPath))
-        mono = "mono " if sys.argv[0].endswith('.py') and sys.platform.startswith('linux') else ""
-        spawnResult = os.system(mono + "\"" + asn1SccPath + "\" -customStg \"" + asn1SccDir + "/xml.stg:" + xmlAST + "\" -customStgAstVerion 4 \"" + "\" \"".join(listOfFilenames) + "\"")
-        if spawnResult != 0:
-            errCode = spawnResult / 256
-            if errCode == 1:
-                utility.panic("ASN1SCC reported syntax errors. Aborting...")
-            elif errCode == 2:
-                utility.panic("ASN1SCC reported semantic errors (or mono failed). Aborting...")
-            elif errCode == 3:
-                utility.panic("ASN1SCC reported internal error. Contact Semantix with this input. Aborting...")
-            elif errCode == 4:
-                utility.panic("ASN1SCC reported usage error. Aborting...")
-            else:
-                utility.panic("ASN1SCC generic error. Contact Semantix with this input. Aborting...")
-        ParseASN1SCC_AST(xmlAST)
-        os.unlink(xmlAST)
-        g_names.update(g_names)
-        g_leafTypeDict.update(g_leafTypeDict)
-        g_checkedSoFarForKeywords.update(g_checkedSoFarForKeywords)
-        g_typesOfFile.update(g_typesOfFile)
-
-        # We also need to mark the artificial types -
-        # So spawn the custom type output at level 1 (unfiltered)
-        # and mark any types not inside it as artificial.
-        os.system(mono + "\"" + asn1SccPath + "\" -customStg \"" + asn1SccDir + "/xml.stg:" + xmlAST + "2\" -customStgAstVerion 1 \"" + "\" \"".join(listOfFilenames) + "\"")
-        realTypes = {}
-        for line in os.popen("grep  'ExportedType\>' \"" + xmlAST + "2\"").readlines():  # pylint: disable=anomalous-backslash-in-string
-            line = re.sub(r'^.*Name="', '', line.strip())
-            line = re.sub(r'" />$', '', line)
-            realTypes[line] = 1
-        os.unlink(xmlAST + "2")
-        for nodeTypename in list(g_names.keys()):
-            if nodeTypename not in realTypes:
-                g_names[nodeTypename]._isArtificial = True
+        try:
+            ParseAsnFileListViaASN1SCC(mono, asn1SccPath, xmlAST, listOfFilenames)
+        finally:
+            # The XML AST (if needed at all) is kept in memory - so the files
+            # go now, even if we are a forked child ending via os._exit
+            for f in [xmlAST, xmlAST + "2"]:
+                if os.path.exists(f):
+                    os.unlink(f)
+        if key is not None and g_onParsed is not None:
+            g_onParsed(key, SnapshotParsedAST())
+
+
+def ParseAsnFileListViaASN1SCC(mono: str, asn1SccPath: str, xmlAST: str, listOfFilenames: List[str]) -> None:  # pylint: disable=invalid-sequence-index
+    # spawnResult = os.system("mono \""+asn1SccPath+"\" -ast \""+xmlAST+"\" \"" + "\" \"".join(listOfFilenames) + "\"")
+    spawnResult = InvokeASN1SCC(mono, asn1SccPath, 4, xmlAST, listOfFilenames)
+    if spawnResult != 0:
+        errCode = spawnResult / 256
+        if errCode == 1:
+            utility.panic("ASN1SCC reported syntax errors. Aborting...")
+        elif errCode == 2:
+            utility.panic("ASN1SCC reported semantic errors (or mono failed). Aborting...")
+        elif errCode == 3:
+            utility.panic("ASN1SCC reported internal error. Contact Semantix with this input. Aborting...")
+        elif errCode == 4:
+            utility.panic("ASN1SCC reported usage error. Aborting...")
+        else:
+            utility.panic("ASN1SCC generic error. Contact Semantix with this input. Aborting...")
+    ParseASN1SCC_AST(xmlAST)
+    g_names.update(g_names)
+    g_leafTypeDict.update(g_leafTypeDict)
+    g_checkedSoFarForKeywords.update(g_checkedSoFarForKeywords)
+    g_typesOfFile.update(g_typesOfFile)
+
+    # We also need to mark the artificial types -
+    # So spawn the custom type output at level 1 (unfiltered)
+    # and mark any types not inside it as artificial.
+    InvokeASN1SCC(mono, asn1SccPath, 1, xmlAST + "2", listOfFilenames)
+    realTypes = {}
+    for line in os.popen("grep  'ExportedType\>' \"" + xmlAST + "2\"").readlines():  # pylint: disable=anomalous-backslash-in-string
+        line = re.sub(r'^.*Name="', '', line.strip())
+        line = re.sub(r'" />$', '', line)
+        realTypes[line] = 1
+    for nodeTypename in list(g_names.keys()):
+        if nodeTypename not in realTypes:
+            g_names[nodeTypename]._isArtificial = True
+
+
+def SnapshotParsedAST() -> bytes:
+    '''Serializes the parser's globals that ParseAsnFileList leaves behind
+(the XML AST is not part of it - see g_keepXMLAST).'''
+    state = {name: globals()[name] for name in g_parsedASTGlobals}
+    return pickle.dumps(state, pickle.HIGHEST_PROTOCOL)
+
+
+def RestoreParsedAST(snapshot: bytes) -> None:
+    '''The reverse of SnapshotParsedAST - as if ParseAsnFileList just ran.'''
+    global g_xmlASTrootNode, g_xmlASTdata
+    state = pickle.loads(snapshot)
+    for name, value in state.items():
+        globals()[name].clear()
+        globals()[name].update(value)
+    g_xmlASTrootNode = None
+    g_xmlASTdata = None
 
 
 def Dump() -> None:
@@ -449,6 +589,12 @@ def test_asn1() -> None:
 
 
 g_xmlASTrootNode = None
+g_xmlASTdata = None  # type: Optional[bytes]
+
+# Only the tools that re-create the grammar from the XML AST (the OG
+# backend, via PrintGrammarFromAST) need it after parsing: they set this
+# before calling ParseAsnFileList, and the XML data are then kept in memory.
+g_keepXMLAST = False
 
 g_lineno = -1
 
@@ -497,19 +643,19 @@ Action = Callable[[Element], Any]
 
 def VisitAll(node: Element, expectedType: str, action: Action) -> List[Any]:  # pylint: disable=invalid-sequence-index
     results = []  # type: List[Any]
-    if node is not None:
+
+    def visit(node: Element) -> None:
         if node._name == expectedType:
-            results = [action(node)]
+            results.append(action(node))
         for child in node._children:
-            results += VisitAll(child, expectedType, action)
+            visit(child)
+    if node is not None:
+        visit(node)
     return results
 
 
 def GetAttr(node: Element, attrName: str) -> Optional[Any]:
-    if attrName not in list(node._attrs.keys()):
-        return None
-    else:
-        return node._attrs[attrName]
+    return node._attrs.get(attrName, None)
 
 
 def GetChild(node: Element, childName: str) -> Optional[Element]:
@@ -702,6 +848,10 @@ def CommonSeqSetChoice(
             enumID = GetAttr(x, "EnumID")
             myMembers.append([GetAttr(x, "VarName"), GenericFactory(newModule, GetChild(x, "Type"))])
             myMembers[-1].append(enumID)
+            if childTypeName == "SequenceOrSetChild":
+                # The mappers ignore it, but ASN1SCC's C types still carry the 'exist' flags
+                # (CHOICE members keep their EnumID last - the mappers use it as c[-1])
+                myMembers[-1].append(opti == "True")
     for tup in myMembers:
         if isinstance(tup[1], AsnMetaType):
             asnMetaMember = AsnMetaMember(
@@ -776,33 +926,29 @@ def VisitTypeAssignment(newModule: Module, xmlTypeAssignment: Element) -> Tuple[
         GenericFactory(newModule, xmlType))
 
 
-def VisitAsn1Module(xmlAsn1File: Element, xmlModule: Element, modules: List[Module]) -> None:  # pylint: disable=invalid-sequence-index
-    newModule = Module()
-    newModule._id = GetAttr(xmlModule, "ID")
-    newModule._asnFilename = GetAttr(xmlAsn1File, "FileName")
-    newModule._exportedTypes = VisitAll(
-        GetChild(xmlModule, "ExportedTypes"), "ExportedType",
-        lambda x: GetAttr(x, "Name"))
-
-    newModule._exportedVariables = VisitAll(
-        GetChild(xmlModule, "ExportedVariables"), "ExportedVariable",
-        lambda x: GetAttr(x, "Name"))
-
-    newModule._importedModules = VisitAll(
-        GetChild(xmlModule, "ImportedModules"), "ImportedModule",
-        lambda x: (
-            GetAttr(x, "ID"),
-            VisitAll(GetChild(x, "ImportedTypes"), "ImportedType",
-                     lambda y: GetAttr(y, "Name")),
-            VisitAll(GetChild(x, "ImportedVariables"), "ImportedVariable",
-                     lambda y: GetAttr(y, "Name")),
+def VisitModuleHeader(newModule: Module, xmlHeader: Element) -> None:
+    if xmlHeader._name == "ExportedTypes":
+        newModule._exportedTypes = VisitAll(
+            xmlHeader, "ExportedType",
+            lambda x: GetAttr(x, "Name"))
+    elif xmlHeader._name == "ExportedVariables":
+        newModule._exportedVariables = VisitAll(
+            xmlHeader, "ExportedVariable",
+            lambda x: GetAttr(x, "Name"))
+    elif xmlHeader._name == "ImportedModules":
+        newModule._importedModules = VisitAll(
+            xmlHeader, "ImportedModule",
+            lambda x: (
+                GetAttr(x, "ID"),
+                VisitAll(GetChild(x, "ImportedTypes"), "ImportedType",
+                         lambda y: GetAttr(y, "Name")),
+                VisitAll(GetChild(x, "ImportedVariables"), "ImportedVariable",
+                         lambda y: GetAttr(y, "Name")),
+            )
         )
-    )
 
-    newModule._typeAssignments = VisitAll(
-        GetChild(xmlModule, "TypeAssignments"), "TypeAssignment",
-        lambda x: VisitTypeAssignment(newModule, x))
 
+def RegisterAsn1Module(newModule: Module, modules: List[Module]) -> None:  # pylint: disable=invalid-sequence-index
     g_typesOfFile.setdefault(newModule._asnFilename, [])
     g_typesOfFile[newModule._asnFilename].extend(
         [x for x, _ in newModule._typeAssignments])
@@ -814,25 +960,81 @@ def VisitAsn1Module(xmlAsn1File: Element, xmlModule: Element, modules: List[Modu
     modules.append(newModule)
 
 
-def ParseASN1SCC_AST(filename: str) -> None:
+def LoadXMLTree(filename: Union[str, IO[bytes]]) -> Element:
+    '''Loads the complete (generic) XML tree of an ASN1SCC AST file.'''
     parser = xml.sax.make_parser()
     handler = InputFormatXMLHandler()
     parser.setContentHandler(handler)
     # parser.setFeature("http://xml.org/sax/features/validation", True)
     parser.parse(filename)
+    return handler._root
+
+
+def ElementFromET(etElem: Any) -> Element:
+    newElement = Element(etElem.tag, etElem.attrib)
+    newElement._children = [ElementFromET(x) for x in etElem]
+    return newElement
+
+
+def StreamAsn1Modules(filename: Union[str, IO[bytes]], modules: List[Module]) -> None:  # pylint: disable=invalid-sequence-index
+    '''Single pass over the ASN1SCC XML AST, that creates the AsnNodes
+of each TypeAssignment as soon as its closing tag is seen - and then
+discards the XML elements. Only the (small) subtree of one TypeAssignment
+is ever held in memory; references to other types are kept as names,
+and are resolved via g_names in VerifyAndFixAST.'''
+    stack = []  # type: List[Any]
+    xmlAsn1File = None  # type: Optional[Element]
+    newModule = None  # type: Optional[Module]
+    for event, etElem in ElementTree.iterparse(filename, events=('start', 'end')):
+        if event == 'start':
+            if not stack and etElem.tag != "ASN1AST":
+                utility.panic("You must use an XML file that contains one ASN1AST node")  # pragma: no cover
+            stack.append(etElem)
+            if etElem.tag == "Asn1File":
+                xmlAsn1File = Element(etElem.tag, etElem.attrib)
+            elif etElem.tag == "Asn1Module" and xmlAsn1File is not None:
+                newModule = Module()
+                newModule._id = etElem.get("ID")
+                newModule._asnFilename = GetAttr(xmlAsn1File, "FileName")
+                newModule._exportedTypes = []
+                newModule._exportedVariables = []
+                newModule._importedModules = []
+                newModule._typeAssignments = []
+            continue
 
-    if len(handler._root._children) != 1 or handler._root._children[0]._name != "ASN1AST":
-        utility.panic("You must use an XML file that contains one ASN1AST node")  # pragma: no cover
+        stack.pop()
+        parent = stack[-1] if stack else None
+        if newModule is None or parent is None:
+            continue
+        tag = etElem.tag
+        if tag == "TypeAssignment" and "TypeAssignments" in (x.tag for x in stack):
+            newModule._typeAssignments.append(
+                VisitTypeAssignment(newModule, ElementFromET(etElem)))
+        elif tag in ["ExportedTypes", "ExportedVariables", "ImportedModules"] and parent.tag == "Asn1Module":
+            VisitModuleHeader(newModule, ElementFromET(etElem))
+        elif tag == "Asn1Module":
+            RegisterAsn1Module(newModule, modules)
+            newModule = None
+        else:
+            continue
+        # we are done with this element - drop it from its parent
+        etElem.clear()
+        if len(parent) and parent[-1] is etElem:
+            del parent[-1]
 
-    # Travel("", handler._roots[0])
+
+def ParseASN1SCC_AST(filename: str) -> None:
     modules = []  # type: List[Module]
-    VisitAll(
-        handler._root._children[0], "Asn1File",
-        lambda x: VisitAll(x, "Asn1Module",
-                           lambda y: VisitAsn1Module(x, y, modules)))
+    StreamAsn1Modules(filename, modules)
 
-    global g_xmlASTrootNode
-    g_xmlASTrootNode = handler._root
+    # The generic XML tree is only built on demand (PrintGrammarFromAST) -
+    # from the XML AST, kept in memory (the file may be temporary)
+    global g_xmlASTrootNode, g_xmlASTdata
+    g_xmlASTrootNode = None
+    g_xmlASTdata = None
+    if g_keepXMLAST:
+        with open(filename, 'rb') as f:
+            g_xmlASTdata = f.read()
 
     g_names.clear()
     g_checkedSoFarForKeywords.clear()
@@ -955,6 +1157,11 @@ def PrintType(f: IO[Any], xmlType: Element, indent: str, nameCleaner: Callable[[
 
 
 def PrintGrammarFromAST(f: IO[Any], nameCleaner: Callable[[str], str]=SimpleCleaner) -> None:
+    global g_xmlASTrootNode
+    if g_xmlASTrootNode is None:
+        if g_xmlASTdata is None:
+            utility.panic("PrintGrammarFromAST: The XML AST was not kept (see g_keepXMLAST)")  # pragma: no cover
+        g_xmlASTrootNode = LoadXMLTree(io.BytesIO(g_xmlASTdata))
     ourtypeAssignments = []
     VisitAll(
         g_xmlASTrootNode._children[0], "Asn1File",
@@ -981,6 +1188,8 @@ def test_xml() -> None:
         sys.stderr.write("Missing or invalid path provided!\n")
         sys.exit(1)
 
+    global g_keepXMLAST
+    g_keepXMLAST = True
     ParseASN1SCC_AST(sys.argv[1])
     Dump()
     print("\nRe-created grammar:\n\n")
@@ -43,3 +43,7 @@ debugParser = False
 verbose = False
 showCode = False
 outputDir = "." + os.sep
+useCache = True
+useLegacyAADLParser = False
+# Size (in bytes) of the memory-mapped register window of the VHDL circuits
+vhdlRegisterWindow = 256
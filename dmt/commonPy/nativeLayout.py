@@ -0,0 +1,176 @@
+# (C) Semantix Information Technologies.
+#
+# Semantix Information Technologies is licensing the code of the
+# Data Modelling Tools (DMT) in the following dual-license mode:
+#
+# Commercial Developer License:
+#       The DMT Commercial Developer License is the appropriate version
+# to use for the development of proprietary and/or commercial software.
+# This version is for developers/companies who do not want to share
+# the source code they develop with others or otherwise comply with the
+# terms of the GNU Lesser General Public License version 3.
+#
+# GNU LGPL v. 2.1:
+#       This version of DMT is the one to use for the development of
+# non-commercial applications, when you are willing to comply
+# with the terms of the GNU Lesser General Public License version 3.
+#
+# The features of the two licenses are summarized below:
+#
+#                       Commercial
+#                       Developer               LGPL
+#                       License
+#
+# License cost          License fee charged     No license fee
+#
+# Must provide source
+# code changes to DMT   No, modifications can   Yes, all source code
+#                       be closed               must be provided back
+#
+# Can create            Yes, that is,           No, applications are subject
+# proprietary           no source code needs    to the LGPL and all source code
+# applications          to be disclosed         must be made available
+#
+# Support               Yes, 12 months of       No, but available separately
+#                       premium technical       for purchase
+#                       support
+#
+# Charge for Runtimes   None                    None
+#
+'''
+Computes the sizes of the C types that ASN1SCC generates, without
+compiling them.
+
+This mirrors ASN1SCC's C mapping (for "-wordSize 8"):
+
+    BOOLEAN               flag (a C99 bool)
+    INTEGER               asn1SccSint / asn1SccUint (64 bits)
+    REAL                  asn1Real (a double)
+    ENUMERATED            a C enum
+    OCTET STRING          struct { int nCount; byte arr[max]; }
+    IA5String             char [max+1]
+    SEQUENCE OF           struct { int nCount; <elem> arr[max]; }
+    SEQUENCE              struct { <fields>; struct { unsigned int opt:1; ... } exist; }
+    CHOICE                struct { <enum> kind; union { <fields>; } u; }
+
+(the nCount is only there when the size is variable, and the exist
+struct only when there are OPTIONAL fields)
+...and lays them out per the alignment rules of the given ABI.
+'''
+
+from typing import Dict, List, Tuple, Union  # NOQA pylint: disable=unused-import
+
+from . import utility
+from .asnAST import (
+    AsnNode, AsnBool, AsnInt, AsnReal, AsnEnumerated, AsnString,
+    AsnOctetString, AsnSequence, AsnSet, AsnChoice, AsnSequenceOf,
+    AsnSetOf, AsnMetaMember, AsnMetaType, Lookup, isSequenceVariable)
+
+# A C type is described by its (size, alignment) - the alignment being
+# the one it gets when it is placed inside a struct.
+Layout = Tuple[int, int]
+
+# The (size, alignment) of the primitive types used by the C mapping.
+# ILP32 is the i386 System V ABI, where 64-bit types are only 4-byte
+# aligned inside structs; the 32-bit ABIs that align them to 8 bytes
+# (ARM EABI, SPARC, PowerPC) lay ASN1SCC's types out just like LP64.
+g_ABIs = {
+    'LP64': {
+        'flag': (1, 1), 'byte': (1, 1), 'char': (1, 1), 'int': (4, 4),
+        'asn1SccSint': (8, 8), 'asn1Real': (8, 8), 'unsigned int': (4, 4),
+    },
+    'ILP32': {
+        'flag': (1, 1), 'byte': (1, 1), 'char': (1, 1), 'int': (4, 4),
+        'asn1SccSint': (8, 4), 'asn1Real': (8, 4), 'unsigned int': (4, 4),
+    },
+}  # type: Dict[str, Dict[str, Layout]]
+
+
+def AlignUp(offset: int, alignment: int) -> int:
+    return (offset + alignment - 1) // alignment * alignment
+
+
+def StructLayout(fields: List[Layout]) -> Layout:  # pylint: disable=invalid-sequence-index
+    offset, alignment = 0, 1
+    for fieldSize, fieldAlignment in fields:
+        offset = AlignUp(offset, fieldAlignment) + fieldSize
+        alignment = max(alignment, fieldAlignment)
+    return AlignUp(offset, alignment), alignment
+
+
+def UnionLayout(fields: List[Layout]) -> Layout:  # pylint: disable=invalid-sequence-index
+    size = max((x[0] for x in fields), default=0)
+    alignment = max((x[1] for x in fields), default=1)
+    return AlignUp(size, alignment), alignment
+
+
+def ArrayLayout(element: Layout, count: int) -> Layout:
+    return element[0] * count, element[1]
+
+
+def EnumLayout(values: List[int], abi: Dict[str, Layout]) -> Layout:  # pylint: disable=invalid-sequence-index
+    # GCC picks the smallest of int/unsigned int that holds all the values,
+    # and only then a 64-bit type
+    if all(-2 ** 31 <= x < 2 ** 31 for x in values) or all(0 <= x < 2 ** 32 for x in values):
+        return abi['int']
+    return abi['asn1SccSint']
+
+
+def GetLayout(
+        node_or_str: Union[str, AsnNode],
+        names: Lookup,
+        abi: Dict[str, Layout],
+        memo: Dict[str, Layout]) -> Layout:
+    '''Returns the (size, alignment) of the C type generated for a type.
+The memo maps typenames to the layouts computed so far (for one ABI).'''
+    if isinstance(node_or_str, str):
+        if node_or_str not in memo:
+            if node_or_str not in names:
+                utility.panic("There's no such type in typename dictionary: '%s'" % node_or_str)  # pragma: no cover
+            memo[node_or_str] = GetLayout(names[node_or_str], names, abi, memo)
+        return memo[node_or_str]
+
+    node = node_or_str
+    if isinstance(node, (AsnMetaMember, AsnMetaType)):
+        return GetLayout(node._containedType, names, abi, memo)
+    elif isinstance(node, AsnBool):
+        return abi['flag']
+    elif isinstance(node, AsnInt):
+        return abi['asn1SccSint']
+    elif isinstance(node, AsnReal):
+        return abi['asn1Real']
+    elif isinstance(node, AsnEnumerated):
+        return EnumLayout([int(x[1]) for x in node._members], abi)
+    elif isinstance(node, AsnOctetString):
+        fields = [abi['int']] if isSequenceVariable(node) else []
+        return StructLayout(fields + [ArrayLayout(abi['byte'], node._range[-1])])
+    elif isinstance(node, AsnString):
+        return ArrayLayout(abi['char'], node._range[-1] + 1)
+    elif isinstance(node, (AsnSequenceOf, AsnSetOf)):
+        fields = [abi['int']] if isSequenceVariable(node) else []
+        element = GetLayout(node._containedType, names, abi, memo)
+        return StructLayout(fields + [ArrayLayout(element, node._range[-1])])
+    elif isinstance(node, (AsnSequence, AsnSet)):
+        fields = [GetLayout(x[1], names, abi, memo) for x in node._members]
+        optionals = sum(1 for x in node._members if len(x) > 3 and x[3])
+        if optionals:
+            # the exist struct: one 'unsigned int x:1' bitfield per OPTIONAL field
+            unsignedSize, unsignedAlignment = abi['unsigned int']
+            bitsPerUnsigned = 8 * unsignedSize
+            fields.append((
+                unsignedSize * ((optionals + bitsPerUnsigned - 1) // bitsPerUnsigned),
+                unsignedAlignment))
+        return StructLayout(fields)
+    elif isinstance(node, AsnChoice):
+        union = UnionLayout([GetLayout(x[1], names, abi, memo) for x in node._members])
+        # the 'kind' enum lists <T>_NONE and one <field>_PRESENT per member
+        return StructLayout([EnumLayout([0, len(node._members)], abi), union])
+    utility.panic("Can't compute the C layout of %s (%s)" % (
+        node.__class__.__name__, node.Location()))  # pragma: no cover
+
+
+def SizeOf(typename: str, names: Lookup, abi: Dict[str, Layout], memo: Dict[str, Layout]) -> int:
+    '''Returns sizeof() the C type that ASN1SCC generates for typename.'''
+    return GetLayout(typename, names, abi, memo)[0]
+
+# vim: tabstop=8 expandtab shiftwidth=4 softtabstop=4
@@ -23,7 +23,7 @@ This module checks that all ASN.1 types are using the appropriate
 constraint (ASSERT-wise).
 '''
 
-from typing import Dict, Union  # NOQA
+from typing import Dict, List, Tuple, Union, Optional  # NOQA
 
 from .utility import panic
 
@@ -31,74 +31,127 @@ from . import asnAST
 from .asnAST import AsnNode
 
 
-def VerifyNodeRange(node: AsnNode) -> None:
-    '''This function checks that
-- INTEGERs
-- REALs
-- STRINGs
-- and SEQUENCE/SET OFs
+# The types that were already verified - so that types shared by many
+# others (e.g. a T-Int used in hundreds of SEQUENCEs) are only checked
+# once, and not once per path that leads to them. Named types are keyed
+# on their name, inline ones on their id; the node itself is kept as
+# the value, to notice a different AST being passed under the same name.
+g_verifiedTypes = {}  # type: Dict[str, AsnNode]
+g_verifiedNodes = {}  # type: Dict[int, AsnNode]
 
-...are equipped with the necessary range constructs.
-If they are not, a runtime error is generated, with a report
-on the exact location of the offending type in the ASN.1 grammar.'''
+
+def NodeRangeError(node: AsnNode) -> Optional[str]:
+    '''Returns the description of the missing (or invalid) range
+construct of the node, or None if there's nothing wrong with it.'''
     if isinstance(node, asnAST.AsnInt):
         if not node._range:
-            panic("INTEGER (in %s) must have a range constraint inside ASN.1,\n"
-                  "or else we might lose accuracy during runtime!" % node.Location())
+            return ("INTEGER (in %s) must have a range constraint inside ASN.1,\n"
+                    "or else we might lose accuracy during runtime!" % node.Location())
 
     elif isinstance(node, asnAST.AsnReal):
         if not node._range:
-            panic("REAL (in %s) must have a range constraint inside ASN.1,\n"
-                  "or else we might lose accuracy during runtime!" % node.Location())
+            return ("REAL (in %s) must have a range constraint inside ASN.1,\n"
+                    "or else we might lose accuracy during runtime!" % node.Location())
         else:
             # ASN1SCC uses C double for ASN.1 REAL.
             # this allows values from -1.7976931348623157E308 to 1.7976931348623157E308
             if node._range[0] < -1.7976931348623157E308:
-                panic("REAL (in %s) must have a low limit >= -1.7976931348623157E308\n" %
-                      node.Location())
+                return ("REAL (in %s) must have a low limit >= -1.7976931348623157E308\n" %
+                        node.Location())
             if node._range[1] > 1.7976931348623157E308:
-                panic("REAL (in %s) must have a high limit <= 1.7976931348623157E308\n" %
-                      node.Location())
+                return ("REAL (in %s) must have a high limit <= 1.7976931348623157E308\n" %
+                        node.Location())
 
     elif isinstance(node, asnAST.AsnString):
         if not node._range:
-            panic("string (in %s) must have SIZE range set!\n" % node.Location())
+            return "string (in %s) must have SIZE range set!\n" % node.Location()
 
     elif isinstance(node, (asnAST.AsnSequenceOf, asnAST.AsnSetOf)):
         if not node._range:
-            panic("SequenceOf (in %s) must have SIZE range set!\n" % node.Location())
+            return "SequenceOf (in %s) must have SIZE range set!\n" % node.Location()
 
     elif isinstance(node, asnAST.AsnEnumerated):
         if any(x[1] is None for x in node._members):
-            panic("ENUMERATED must have integer value for each enum! (%s)" % node.Location())
+            return "ENUMERATED must have integer value for each enum! (%s)" % node.Location()
+    return None
+
+
+def VerifyNodeRange(node: AsnNode) -> None:
+    '''This function checks that
+- INTEGERs
+- REALs
+- STRINGs
+- and SEQUENCE/SET OFs
+
+...are equipped with the necessary range constructs.
+If they are not, a runtime error is generated, with a report
+on the exact location of the offending type in the ASN.1 grammar.'''
+    error = NodeRangeError(node)
+    if error is not None:
+        panic(error)
 
 
 def VerifyRanges(node_or_str: Union[str, AsnNode], names: Dict[str, AsnNode]) -> None:
-    '''This function recursively traverses the AST,
-calling VerifyNodeRange for each Node.'''
-    if isinstance(node_or_str, str):
-        node = names[node_or_str]  # type: AsnNode
-    else:
-        node = node_or_str
-    if isinstance(node, asnAST.AsnMetaMember):
-        node = names[node._containedType]
-
-    if isinstance(node, asnAST.AsnBasicNode):
-        VerifyNodeRange(node)
-    elif isinstance(node, (asnAST.AsnSequence, asnAST.AsnChoice, asnAST.AsnSet)):
-        # Bug fixed in ASN1SCC - this check is no longer needed
-        # if 0 == len(node._members):
-        #     panic(
-        #         "Empty SEQUENCE/SETs are not allowed. Please add at least one field in (%s)\n"
-        #         % node.Location())
-        for child in node._members:
-            VerifyRanges(child[1], names)
-    elif isinstance(node, (asnAST.AsnSequenceOf, asnAST.AsnSetOf)):
-        VerifyNodeRange(node)
-        VerifyRanges(node._containedType, names)
-    elif isinstance(node, asnAST.AsnEnumerated):
-        VerifyNodeRange(node)
-    else:
-        panic("VerifyRanges: Unexpected %s\n" % str(node))
+    '''This function traverses the AST, calling NodeRangeError once
+for each (named or inline) type that is reachable from node_or_str.'''
+    VerifyRangesOfTypes([node_or_str], names)
+
+
+def VerifyRangesOfTypes(nodes_or_strs: List[Union[str, AsnNode]], names: Dict[str, AsnNode]) -> None:  # pylint: disable=invalid-sequence-index
+    '''Like VerifyRanges, for many types at once: all the errors are
+reported together, each one along with all the places (Typename.field)
+that refer to the offending type.'''
+    errors = {}  # type: Dict[int, Tuple[str, List[str]]]
+
+    def visit(node_or_str: Union[str, AsnNode], where: str, referrer: Optional[str]) -> None:
+        if isinstance(node_or_str, asnAST.AsnMetaMember):
+            node_or_str = node_or_str._containedType
+        if isinstance(node_or_str, str):
+            where = node_or_str
+            node = names[node_or_str]  # type: AsnNode
+            seen = g_verifiedTypes.get(node_or_str, None) is node
+            g_verifiedTypes[node_or_str] = node
+        else:
+            node = node_or_str
+            seen = g_verifiedNodes.get(id(node), None) is node
+            g_verifiedNodes[id(node)] = node
+        if seen:
+            if id(node) in errors and referrer is not None:
+                errors[id(node)][1].append(referrer)
+            return
+
+        def check(node: AsnNode) -> None:
+            error = NodeRangeError(node)
+            if error is not None:
+                errors[id(node)] = (error, [referrer] if referrer is not None else [])
+
+        if isinstance(node, asnAST.AsnBasicNode):
+            check(node)
+        elif isinstance(node, (asnAST.AsnSequence, asnAST.AsnChoice, asnAST.AsnSet)):
+            # Bug fixed in ASN1SCC - this check is no longer needed
+            # if 0 == len(node._members):
+            #     panic(
+            #         "Empty SEQUENCE/SETs are not allowed. Please add at least one field in (%s)\n"
+            #         % node.Location())
+            for child in node._members:
+                visit(child[1], where + "." + child[0], where + "." + child[0])
+        elif isinstance(node, (asnAST.AsnSequenceOf, asnAST.AsnSetOf)):
+            check(node)
+            visit(node._containedType, where + "[]", where + "[]")
+        elif isinstance(node, asnAST.AsnEnumerated):
+            check(node)
+        else:
+            panic("VerifyRanges: Unexpected %s\n" % str(node))
+
+    for node_or_str in nodes_or_strs:
+        visit(node_or_str, "", None)
+    if errors:
+        report = []
+        for error, referrers in errors.values():
+            error = error.rstrip("\n")
+            if referrers:
+                error += "\n(used in: %s)" % ", ".join(referrers)
+            report.append(error)
+        panic("\n\n".join(report))
 
 # vim: tabstop=8 expandtab shiftwidth=4 softtabstop=4
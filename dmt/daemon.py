@@ -0,0 +1,317 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+'''
+The DMT daemon ("dmt serve") and its client.
+
+The daemon keeps the DMT tools imported and the ASN.1 ASTs they parsed
+in memory; it listens on a UNIX domain socket, and runs the tools on
+behalf of "dmt <tool> args..." (the tools' own console scripts don't use
+it). Each request is served by a forked child, so the module globals of
+the tools always start from a clean slate. The client passes its
+stdin/stdout/stderr over the socket, so the output of the tools goes
+where it would go without the daemon.
+
+The "dmt" console script enters through this module - which is why it
+only imports from the standard library (importing DMT itself is what
+takes most of the time of a short tool invocation).
+'''
+import os
+import sys
+import json
+import stat
+import array
+import struct
+import socket
+import tempfile
+import importlib
+
+from typing import Optional, Dict, List  # NOQA pylint: disable=unused-import
+
+# The tools that can be run by the daemon (name -> module)
+g_tools = {
+    'asn2aadlPlus': 'dmt.asn2aadlPlus',
+    'asn2dataModel': 'dmt.asn2dataModel',
+    'aadl2glueC': 'dmt.aadl2glueC',
+    'msgPrinter': 'dmt.msgPrinter',
+    'msgPrinterASN1': 'dmt.msgPrinterASN1',
+}
+
+# How many parsed ASTs the daemon keeps in memory
+g_maxParsedASTs = 16
+
+
+def SocketPath() -> str:
+    '''The daemon's socket: $DMT_SOCKET, or dmt-<uid>.sock inside
+$XDG_RUNTIME_DIR - or, without one, inside a private (0700) dmt-<uid>
+folder in the temporary folder (see IsPrivateDir).'''
+    path = os.environ.get('DMT_SOCKET', '')
+    if path == '':
+        runtimeDir = os.environ.get('XDG_RUNTIME_DIR', '')
+        if runtimeDir == '':
+            runtimeDir = os.path.join(tempfile.gettempdir(), 'dmt-%d' % os.getuid())
+        path = os.path.join(runtimeDir, 'dmt-%d.sock' % os.getuid())
+    return path
+
+
+def SocketInTempDir() -> bool:
+    return os.environ.get('DMT_SOCKET', '') == '' and os.environ.get('XDG_RUNTIME_DIR', '') == ''
+
+
+def IsPrivateDir(path: str) -> bool:
+    '''True if path is a real folder (not a symlink), that is owned by us
+and inaccessible to everyone else.'''
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return False
+    return stat.S_ISDIR(st.st_mode) and st.st_uid == os.getuid() and not st.st_mode & 0o077
+
+
+def PeerIsUs(conn: socket.socket) -> bool:
+    '''True if the other end of the (connected) socket runs as our user.
+Where this can't be checked, the daemon is not used.'''
+    if not hasattr(socket, 'SO_PEERCRED'):
+        return False  # pragma: no cover
+    # struct ucred: pid, uid, gid
+    _, uid, _ = struct.unpack('3i', conn.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize('3i')))
+    return uid == os.getuid()
+
+
+def RunViaDaemon(tool: str) -> Optional[int]:
+    '''Asks the daemon to run the tool with our command line, folder,
+environment and stdio. Returns the tool's exit code - or None if there
+is no daemon to ask (or DMT_NO_DAEMON is set).
+
+Our environment and stdio are only handed to a daemon that runs as our
+user: anyone else listening on the socket is ignored.'''
+    if os.environ.get('DMT_NO_DAEMON', '') != '':
+        return None
+    path = SocketPath()
+    if SocketInTempDir() and not IsPrivateDir(os.path.dirname(path)):
+        return None
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conn.connect(path)
+        if not PeerIsUs(conn):
+            conn.close()
+            return None
+        umask = os.umask(0o022)
+        os.umask(umask)
+        request = {
+            'tool': tool, 'argv': sys.argv, 'cwd': os.getcwd(),
+            'env': dict(os.environ), 'umask': umask}
+        conn.sendmsg(
+            [json.dumps(request).encode('utf-8') + b'\n'],
+            [(socket.SOL_SOCKET, socket.SCM_RIGHTS, array.array('i', [0, 1, 2]))])
+    except OSError:
+        # No daemon (or unusable stdio) - nothing was run yet
+        conn.close()
+        return None
+    reply = b''
+    try:
+        while not reply.endswith(b'\n'):
+            data = conn.recv(4096)
+            if not data:
+                break
+            reply += data
+    finally:
+        conn.close()
+    if not reply.endswith(b'\n'):
+        sys.stderr.write('[x] The DMT daemon (%s) failed to run %s\n' % (path, tool))
+        return 1
+    return json.loads(reply.decode('utf-8'))['exitCode']
+
+
+def RunTool(tool: str) -> None:
+    exitCode = RunViaDaemon(tool)
+    if exitCode is None:
+        importlib.import_module(g_tools[tool]).main()  # type: ignore
+    else:
+        sys.exit(exitCode)
+
+
+def ServeRequest(conn: socket.socket, pipeToDaemon: int) -> int:
+    '''Runs (in a forked child of the daemon) the tool that a client asked
+for - and reports any AST parsed along the way back to the daemon.
+Returns the exit code of the child, which ends with sys.exit: the client
+is sent the tool's exit code by the last of its atexit functions.'''
+    import pickle
+    import atexit
+    import threading
+    import traceback
+    from .commonPy import asnParser
+
+    if not PeerIsUs(conn):
+        return 1
+    fds = array.array('i')
+    data, ancdata, _, _ = conn.recvmsg(65536, socket.CMSG_SPACE(3 * fds.itemsize))
+    for level, kind, fdData in ancdata:
+        if level == socket.SOL_SOCKET and kind == socket.SCM_RIGHTS:
+            fds.frombytes(fdData[:len(fdData) - (len(fdData) % fds.itemsize)])
+    while not data.endswith(b'\n'):
+        more = conn.recv(65536)
+        if not more or len(fds) != 3:
+            return 1
+        data += more
+    request = json.loads(data.decode('utf-8'))
+
+    # Become the client: same stdio, folder, environment and command line
+    for i, fd in enumerate(fds):
+        os.dup2(fd, i)
+        os.close(fd)
+    os.chdir(request['cwd'])
+    os.umask(request['umask'])
+    os.environ.clear()
+    os.environ.update(request['env'])
+    sys.argv = request['argv']
+
+    def ReportParsedAST(key: str, snapshot: bytes) -> None:
+        asnParser.g_onParsed = None
+        with os.fdopen(pipeToDaemon, 'wb') as f:
+            f.write(pickle.dumps((key, snapshot), pickle.HIGHEST_PROTOCOL))
+    asnParser.g_onParsed = ReportParsedAST
+
+    replied = threading.Event()
+
+    def AbortIfClientLeaves() -> None:
+        # The client sends nothing else - so this returns when it dies
+        # (or when it got its reply, and closed the connection)
+        conn.recv(1)
+        if not replied.is_set():
+            os._exit(1)
+    threading.Thread(target=AbortIfClientLeaves, daemon=True).start()
+
+    exitCode = 1
+
+    def Reply() -> None:
+        # Registered before the tool runs, so it runs after the tool's own
+        # atexit functions; and the tools close their output files
+        # themselves - so the client finds everything in place
+        sys.stdout.flush()
+        sys.stderr.flush()
+        replied.set()
+        conn.sendall(json.dumps({'exitCode': exitCode}).encode('utf-8') + b'\n')
+    atexit.register(Reply)
+
+    try:
+        importlib.import_module(g_tools[request['tool']]).main()  # type: ignore
+        exitCode = 0
+    except SystemExit as e:
+        if isinstance(e.code, int):
+            exitCode = e.code
+        elif e.code is None:
+            exitCode = 0
+        else:
+            sys.stderr.write(str(e.code) + '\n')
+    except BaseException:  # pylint: disable=broad-except
+        traceback.print_exc()
+    return exitCode
+
+
+def Serve() -> None:
+    import pickle
+    import signal
+    import selectors
+    from .commonPy import asnParser, utility
+
+    # Import all the tools (and thus all the mappers) once and for all
+    for module in g_tools.values():
+        importlib.import_module(module)
+
+    path = SocketPath()
+    if SocketInTempDir():
+        # The temporary folder is shared: keep the socket in a folder of ours
+        try:
+            os.mkdir(os.path.dirname(path), 0o700)
+        except FileExistsError:
+            pass
+        if not IsPrivateDir(os.path.dirname(path)):
+            utility.panic("%s must be a folder that only you can access" % os.path.dirname(path))
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    if os.path.exists(path):
+        try:
+            listener.connect(path)
+            utility.panic("A DMT daemon is already listening on %s" % path)
+        except ConnectionRefusedError:
+            # Left behind by a daemon that is no more
+            os.unlink(path)
+        listener.close()
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    # Only our user may connect
+    umask = os.umask(0o077)
+    try:
+        listener.bind(path)
+    finally:
+        os.umask(umask)
+    listener.listen(16)
+    print("DMT daemon listening on %s" % path)
+    sys.stdout.flush()
+
+    daemonPid = os.getpid()
+    # Stop (and remove the socket) on SIGTERM, too
+    signal.signal(signal.SIGTERM, lambda _, __: sys.exit(0))
+    selector = selectors.DefaultSelector()
+    selector.register(listener, selectors.EVENT_READ)
+    # The pipes from the children, and what was read from them so far
+    children = {}  # type: Dict[int, List[bytes]]
+    try:
+        while True:
+            for key, _ in selector.select(timeout=5):
+                if key.fileobj is listener:
+                    conn, _ = listener.accept()
+                    readEnd, writeEnd = os.pipe()
+                    pid = os.fork()
+                    if pid == 0:
+                        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                        selector.close()
+                        listener.close()
+                        os.close(readEnd)
+                        sys.exit(ServeRequest(conn, writeEnd))
+                    conn.close()
+                    os.close(writeEnd)
+                    children[readEnd] = []
+                    selector.register(readEnd, selectors.EVENT_READ)
+                else:
+                    readEnd = key.fd
+                    data = os.read(readEnd, 1 << 20)
+                    if data:
+                        children[readEnd].append(data)
+                        continue
+                    selector.unregister(readEnd)
+                    os.close(readEnd)
+                    chunks = children.pop(readEnd)
+                    if chunks:
+                        astKey, snapshot = pickle.loads(b''.join(chunks))
+                        asnParser.g_parsedASTs.pop(astKey, None)
+                        asnParser.g_parsedASTs[astKey] = snapshot
+                        while len(asnParser.g_parsedASTs) > g_maxParsedASTs:
+                            del asnParser.g_parsedASTs[next(iter(asnParser.g_parsedASTs))]
+            # Reap the children that are done
+            try:
+                while os.waitpid(-1, os.WNOHANG)[0] != 0:
+                    pass
+            except ChildProcessError:
+                pass
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # (the children end with sys.exit, too)
+        if os.getpid() == daemonPid:
+            os.unlink(path)
+
+
+def main() -> None:
+    if sys.argv[1:2] == ['serve']:
+        Serve()
+    elif sys.argv[1:2] and sys.argv[1] in g_tools:
+        # dmt <tool> args...: the tool sees the same command line as
+        # when it is invoked via its own console script
+        sys.argv = sys.argv[1:]
+        RunTool(sys.argv[0])
+    else:
+        from .commonPy import print_version
+        print_version()
+
+
+if __name__ == "__main__":
+    main()
@@ -53,14 +53,18 @@ def usage():
     msg = 'Usage: {} <options> input1.asn1 [input2.asn1]...\nWhere options are:\n'
     msg += '\t-o dirname\t\tDirectory to place generated files\nAnd one of:\n'
     msg += '\t-verbose\t\tDisplay more debug output\n'
+    msg += '\t-snprint\t\tGenerate SnprintXXX functions, that format into a\n'
+    msg += '\t\t\t\tbuffer without locking (PrintXXX then uses them)\n'
     print(msg.format(sys.argv[0]))
     sys.exit(1)
 
 
 # noinspection PyListCreation
 class Printer(RecursiveMapper):
-    def __init__(self):
+    def __init__(self, printf='printf'):
         self.uniqueID = 0
+        # The printf-like function (or macro) that the generated code calls
+        self.printf = printf
 
     def UniqueID(self):
         self.uniqueID += 1 if self.uniqueID != 385 else 2
@@ -69,32 +73,32 @@ class Printer(RecursiveMapper):
     def MapInteger(self, srcCVariable, prefix, _, __, ___):
         lines = []
         lines.append('#if WORD_SIZE==8')
-        lines.append('printf("%%s%s %%lld\\n", paramName, %s);' % (prefix, srcCVariable))
+        lines.append('%s("%%s%s %%lld\\n", paramName, %s);' % (self.printf, prefix, srcCVariable))
         lines.append('#else')
-        lines.append('printf("%%s%s %%d\\n", paramName, %s);' % (prefix, srcCVariable))
+        lines.append('%s("%%s%s %%d\\n", paramName, %s);' % (self.printf, prefix, srcCVariable))
         lines.append('#endif')
         return lines
 
     def MapReal(self, srcCVariable, prefix, _, __, ___):
-        return ['printf("%%s%s %%f\\n", paramName, %s);' % (prefix, srcCVariable)]
+        return ['%s("%%s%s %%f\\n", paramName, %s);' % (self.printf, prefix, srcCVariable)]
 
     def MapBoolean(self, srcCVariable, prefix, _, __, ___):
-        return ['printf("%%s%s %%d\\n", paramName, (int)%s);' % (prefix, srcCVariable)]
+        return ['%s("%%s%s %%d\\n", paramName, (int)%s);' % (self.printf, prefix, srcCVariable)]
 
     def MapOctetString(self, srcCVariable, prefix, node, __, ___):
         lines = []
         lines.append("{")
         lines.append("    int i;")
         limit = sourceSequenceLimit(node, srcCVariable)
-        lines.append('    printf("%%s%s ", paramName);' % prefix)
+        lines.append('    %s("%%s%s ", paramName);' % (self.printf, prefix))
         lines.append("    for(i=0; i<%s; i++)" % limit)
-        lines.append('        printf("%%c", %s.arr[i]);' % srcCVariable)
-        lines.append('    printf("\\n");')
+        lines.append('        %s("%%c", %s.arr[i]);' % (self.printf, srcCVariable))
+        lines.append('    %s("\\n");' % self.printf)
         lines.append("}\n")
         return lines
 
     def MapEnumerated(self, srcCVariable, prefix, _, __, ___):
-        return ['printf("%%s%s %%d\\n", paramName, (int)%s);' % (prefix, srcCVariable)]
+        return ['%s("%%s%s %%d\\n", paramName, (int)%s);' % (self.printf, prefix, srcCVariable)]
 
     def MapSequence(self, srcCVariable, prefix, node, leafTypeDict, names):
         lines = []  # type: List[str]
@@ -151,6 +155,82 @@ class Printer(RecursiveMapper):
         return self.MapSequenceOf(srcCVariable, prefix, node, leafTypeDict, names)
 
 
+# The SnprintXXX functions (-snprint) append to the caller's buffer via this
+# macro. Past the end of the buffer it keeps counting, so that - just like
+# snprintf - they return the length that the complete output needs.
+g_snprintSupport = r"""#include <stdlib.h>
+
+#define SNPRINT(...)                                              \
+    do {                                                          \
+        int n_ = snprintf(pos < len ? buf + pos : NULL,           \
+                          pos < len ? len - pos : 0, __VA_ARGS__);\
+        if (n_ > 0)                                               \
+            pos += (size_t) n_;                                   \
+    } while (0)
+
+#if defined(__GNUC__)
+#define PRINTTYPES_THREAD_LOCAL __thread
+#elif defined(__STDC_VERSION__) && __STDC_VERSION__ >= 201112L
+#define PRINTTYPES_THREAD_LOCAL _Thread_local
+#endif
+
+#ifdef PRINTTYPES_THREAD_LOCAL
+#define PRINTTYPES_LOCK()
+#define PRINTTYPES_UNLOCK()
+#else
+/* No thread-local storage: the threads take turns on a single buffer */
+#include <pthread.h>
+#define PRINTTYPES_THREAD_LOCAL
+static pthread_mutex_t g_printing_mutex = PTHREAD_MUTEX_INITIALIZER;
+#define PRINTTYPES_LOCK() pthread_mutex_lock(&g_printing_mutex)
+#define PRINTTYPES_UNLOCK() pthread_mutex_unlock(&g_printing_mutex)
+#endif
+
+/* The PrintXXX functions format into a per-thread buffer, grown on demand */
+static PRINTTYPES_THREAD_LOCAL char *g_printing_buffer = NULL;
+static PRINTTYPES_THREAD_LOCAL size_t g_printing_buffer_size = 0;
+
+static int GrowPrintingBuffer(size_t size)
+{
+    char *p = realloc(g_printing_buffer, size);
+    if (p == NULL)
+        return 0;
+    g_printing_buffer = p;
+    g_printing_buffer_size = size;
+    return 1;
+}
+
+"""
+
+
+def WriteSnprinter(C_HeaderFile, C_SourceFile, cleanNodeTypename: str, lines: List[str], suffix: str='') -> None:
+    '''Emit SnprintXXX for the printer lines (that use SNPRINT) and a
+PrintXXX that outputs the formatted message with a single fwrite.'''
+    snprintName = 'Snprint%s%s' % (suffix, cleanNodeTypename)
+    C_HeaderFile.write('int %s(char *buf, size_t len, const char *paramName, const asn1Scc%s *pData);\n' % (snprintName, cleanNodeTypename))
+    C_SourceFile.write('int %s(char *buf, size_t len, const char *paramName, const asn1Scc%s *pData)\n{\n' % (snprintName, cleanNodeTypename))
+    C_SourceFile.write('    size_t pos = 0;\n')
+    C_SourceFile.write('    if (len > 0)\n')
+    C_SourceFile.write("        buf[0] = '\\0';\n")
+    C_SourceFile.write("\n".join(lines))
+    C_SourceFile.write('\n    return (int) pos;\n')
+    C_SourceFile.write('}\n\n')
+    C_SourceFile.write('void Print%s%s(const char *paramName, const asn1Scc%s *pData)\n{\n' % (suffix, cleanNodeTypename, cleanNodeTypename))
+    C_SourceFile.write('    int length;\n')
+    C_SourceFile.write('    PRINTTYPES_LOCK();\n')
+    C_SourceFile.write('    length = %s(g_printing_buffer, g_printing_buffer_size, paramName, pData);\n' % snprintName)
+    C_SourceFile.write('    if (length > 0 && (size_t) length >= g_printing_buffer_size) {\n')
+    C_SourceFile.write('        if (GrowPrintingBuffer((size_t) length + 1))\n')
+    C_SourceFile.write('            %s(g_printing_buffer, g_printing_buffer_size, paramName, pData);\n' % snprintName)
+    C_SourceFile.write('        else\n')
+    C_SourceFile.write('            length = 0;\n')
+    C_SourceFile.write('    }\n')
+    C_SourceFile.write('    if (length > 0)\n')
+    C_SourceFile.write('        fwrite(g_printing_buffer, 1, (size_t) length, stdout);\n')
+    C_SourceFile.write('    PRINTTYPES_UNLOCK();\n')
+    C_SourceFile.write('}\n\n')
+
+
 def main():
     if sys.argv.count("-o") != 0:
         idx = sys.argv.index("-o")
@@ -167,6 +247,10 @@ def main():
         configMT.verbose = True
         sys.argv.remove("-verbose")
 
+    bSnprint = "-snprint" in sys.argv
+    if bSnprint:
+        sys.argv.remove("-snprint")
+
     if not sys.argv[1:]:
         usage()
 
@@ -193,8 +277,7 @@ def main():
         )
 
         inform("Checking that all base nodes have mandatory ranges set in %s..." % asnFile)
-        for node in list(tmpNames.values()):
-            verify.VerifyRanges(node, asnParser.g_names)
+        verify.VerifyRangesOfTypes(list(tmpNames.keys()), asnParser.g_names)
 
     # If some AST nodes must be skipped (for any reason), go learn about them
     badTypes = cleanupNodes.DiscoverBadTypes()
@@ -202,6 +285,8 @@ def main():
     C_HeaderFile = open(configMT.outputDir + os.sep + "PrintTypes.h", "w")
     C_HeaderFile.write('#ifndef __PRINTTYPES_H__\n')
     C_HeaderFile.write('#define __PRINTTYPES_H__\n\n')
+    if bSnprint:
+        C_HeaderFile.write('#include <stddef.h>\n\n')
     C_HeaderFile.write('#ifdef __cplusplus\n')
     C_HeaderFile.write('extern "C" {\n')
     C_HeaderFile.write('#endif\n\n')
@@ -209,10 +294,13 @@ def main():
     C_SourceFile = open(configMT.outputDir + os.sep + "PrintTypes.c", "w")
     C_SourceFile.write('#include <stdio.h>\n\n')
     C_SourceFile.write('#include "PrintTypes.h"\n\n')
-    C_SourceFile.write('#ifdef __linux__\n')
-    C_SourceFile.write('#include <pthread.h>\n\n')
-    C_SourceFile.write('static pthread_mutex_t g_printing_mutex = PTHREAD_MUTEX_INITIALIZER;\n\n')
-    C_SourceFile.write('#endif\n\n')
+    if bSnprint:
+        C_SourceFile.write(g_snprintSupport)
+    else:
+        C_SourceFile.write('#ifdef __linux__\n')
+        C_SourceFile.write('#include <pthread.h>\n\n')
+        C_SourceFile.write('static pthread_mutex_t g_printing_mutex = PTHREAD_MUTEX_INITIALIZER;\n\n')
+        C_SourceFile.write('#endif\n\n')
 
     # Work on each ASN.1 file's types
     for asnFile in uniqueASNfiles:
@@ -223,7 +311,7 @@ def main():
         inform("Executing mappings for types inside %s...", asnFile)
         names = uniqueASNfiles[asnFile][0]
 
-        printer = Printer()
+        printer = Printer('SNPRINT' if bSnprint else 'printf')
 
         for nodeTypename in names:
             # Check if this type must be skipped
@@ -239,10 +327,6 @@ def main():
             assert nodeTypename in leafTypeDict
 
             C_HeaderFile.write('void Print%s(const char *paramName, const asn1Scc%s *pData);\n' % (cleanNodeTypename, cleanNodeTypename))
-            C_SourceFile.write('void Print%s(const char *paramName, const asn1Scc%s *pData)\n{\n' % (cleanNodeTypename, cleanNodeTypename))
-            C_SourceFile.write('#ifdef __linux__\n')
-            C_SourceFile.write('    pthread_mutex_lock(&g_printing_mutex);\n')
-            C_SourceFile.write('#endif\n')
             lines = ["    " + x
                      for x in printer.Map(
                          '(*pData)',
@@ -250,6 +334,13 @@ def main():
                          node,
                          leafTypeDict,
                          asnParser.g_names)]
+            if bSnprint:
+                WriteSnprinter(C_HeaderFile, C_SourceFile, cleanNodeTypename, lines)
+                continue
+            C_SourceFile.write('void Print%s(const char *paramName, const asn1Scc%s *pData)\n{\n' % (cleanNodeTypename, cleanNodeTypename))
+            C_SourceFile.write('#ifdef __linux__\n')
+            C_SourceFile.write('    pthread_mutex_lock(&g_printing_mutex);\n')
+            C_SourceFile.write('#endif\n')
             C_SourceFile.write("\n".join(lines))
             C_SourceFile.write('\n#ifdef __linux__\n')
             C_SourceFile.write('    pthread_mutex_unlock(&g_printing_mutex);\n')
@@ -260,6 +351,8 @@ def main():
     C_HeaderFile.write('}\n')
     C_HeaderFile.write('#endif\n')
     C_HeaderFile.write('\n#endif\n')
+    C_HeaderFile.close()
+    C_SourceFile.close()
 
 if __name__ == "__main__":
     if "-pdb" in sys.argv:
@@ -44,6 +44,7 @@ from .commonPy import cleanupNodes
 from .commonPy.recursiveMapper import RecursiveMapper
 
 from .commonPy import verify
+from .msgPrinter import g_snprintSupport, WriteSnprinter
 
 
 def usage():
@@ -51,14 +52,18 @@ def usage():
     msg = 'Usage: {} <options> input1.asn1 [input2.asn1]...\nWhere options are:\n'
     msg += '\t-o dirname\t\tDirectory to place generated files\nAnd one of:\n'
     msg += '\t-verbose\t\tDisplay more debug output\n'
+    msg += '\t-snprint\t\tGenerate SnprintASN1XXX functions, that format into a\n'
+    msg += '\t\t\t\tbuffer without locking (PrintASN1XXX then uses them)\n'
     print(msg.format(sys.argv[0]))
     sys.exit(1)
 
 
 # noinspection PyListCreation
 class Printer(RecursiveMapper):
-    def __init__(self):
+    def __init__(self, printf='printf'):
         self.uniqueID = 0
+        # The printf-like function (or macro) that the generated code calls
+        self.printf = printf
 
     def UniqueID(self):
         self.uniqueID += 1 if self.uniqueID != 385 else 2
@@ -67,27 +72,27 @@ class Printer(RecursiveMapper):
     def MapInteger(self, srcCVariable, unused, _, __, ___):
         lines = []
         lines.append('#if WORD_SIZE==8')
-        lines.append('printf("%%lld", %s);' % srcCVariable)
+        lines.append('%s("%%lld", %s);' % (self.printf, srcCVariable))
         lines.append('#else')
-        lines.append('printf("%%d", %s);' % srcCVariable)
+        lines.append('%s("%%d", %s);' % (self.printf, srcCVariable))
         lines.append('#endif')
         return lines
 
     def MapReal(self, srcCVariable, unused, _, __, ___):
-        return ['printf("%%f", %s);' % srcCVariable]
+        return ['%s("%%f", %s);' % (self.printf, srcCVariable)]
 
     def MapBoolean(self, srcCVariable, unused, _, __, ___):
-        return ['printf("%%s", (int)%s?"TRUE":"FALSE");' % srcCVariable]
+        return ['%s("%%s", (int)%s?"TRUE":"FALSE");' % (self.printf, srcCVariable)]
 
     def MapOctetString(self, srcCVariable, unused, node, __, ___):
         lines = []
         lines.append("{")
         lines.append("    int i;")
         limit = sourceSequenceLimit(node, srcCVariable)
-        lines.append('    printf("\'");')
+        lines.append('    %s("\'");' % self.printf)
         lines.append("    for(i=0; i<%s; i++)" % limit)
-        lines.append('        printf("%%02x", %s.arr[i]);' % srcCVariable)
-        lines.append('    printf("\'H");')
+        lines.append('        %s("%%02x", %s.arr[i]);' % (self.printf, srcCVariable))
+        lines.append('    %s("\'H");' % self.printf)
         lines.append("}\n")
         return lines
 
@@ -96,20 +101,20 @@ class Printer(RecursiveMapper):
         lines.append("switch(%s) {" % srcCVariable)
         for d in node._members:
             lines.append("case %s:" % d[1])
-            lines.append("    printf(\"%s\");" % d[0])
+            lines.append("    %s(\"%s\");" % (self.printf, d[0]))
             lines.append("    break;")
         lines.append("default:")
-        lines.append("    printf(\"Invalid value in ENUMERATED (%s)\");" % srcCVariable)
+        lines.append("    %s(\"Invalid value in ENUMERATED (%s)\");" % (self.printf, srcCVariable))
         lines.append("}")
         return lines
 
     def MapSequence(self, srcCVariable, prefix, node, leafTypeDict, names):
         lines = []
-        lines.append("printf(\"{\");")
+        lines.append("%s(\"{\");" % self.printf)
         for idx, child in enumerate(node._members):
             if idx > 0:
-                lines.append("printf(\", \");")
-            lines.append("printf(\"%s \");" % child[0])  # Sequences need the field name printed
+                lines.append("%s(\", \");" % self.printf)
+            lines.append("%s(\"%s \");" % (self.printf, child[0]))  # Sequences need the field name printed
             lines.extend(
                 self.Map(
                     "%s.%s" % (srcCVariable, self.CleanName(child[0])),
@@ -117,7 +122,7 @@ class Printer(RecursiveMapper):
                     child[1],
                     leafTypeDict,
                     names))
-        lines.append("printf(\"}\");")
+        lines.append("%s(\"}\");" % self.printf)
         return lines
 
     def MapSet(self, srcCVariable, prefix, node, leafTypeDict, names):
@@ -131,7 +136,7 @@ class Printer(RecursiveMapper):
             lines.append(
                 "%sif (%s.kind == %s) {" %
                 (self.maybeElse(childNo), srcCVariable, self.CleanName(child[2])))
-            lines.append("    printf(\"%s:\");" % child[0])  # Choices need the field name printed
+            lines.append("    %s(\"%s:\");" % (self.printf, child[0]))  # Choices need the field name printed
             lines.extend(
                 ['    ' + x
                  for x in self.Map(
@@ -148,11 +153,11 @@ class Printer(RecursiveMapper):
         lines.append("{")
         uniqueId = self.UniqueID()
         lines.append("    int i%s;" % uniqueId)
-        lines.append("    printf(\"{\");")
+        lines.append("    %s(\"{\");" % self.printf)
         limit = sourceSequenceLimit(node, srcCVariable)
         lines.append("    for(i%s=0; i%s<%s; i%s++) {" % (uniqueId, uniqueId, limit, uniqueId))
         lines.append("        if (i%s) " % uniqueId)
-        lines.append("            printf(\",\");")
+        lines.append("            %s(\",\");" % self.printf)
         lines.extend(
             ["        " + x
              for x in self.Map(
@@ -162,7 +167,7 @@ class Printer(RecursiveMapper):
                  leafTypeDict,
                  names)])
         lines.append("    }")
-        lines.append("    printf(\"}\");")
+        lines.append("    %s(\"}\");" % self.printf)
         lines.append("}")
         return lines
 
@@ -186,6 +191,10 @@ def main():
         configMT.verbose = True
         sys.argv.remove("-verbose")
 
+    bSnprint = "-snprint" in sys.argv
+    if bSnprint:
+        sys.argv.remove("-snprint")
+
     if not sys.argv[1:]:
         usage()
 
@@ -212,8 +221,7 @@ def main():
         )
 
         inform("Checking that all base nodes have mandatory ranges set in %s..." % asnFile)
-        for node in list(tmpNames.values()):
-            verify.VerifyRanges(node, asnParser.g_names)
+        verify.VerifyRangesOfTypes(list(tmpNames.keys()), asnParser.g_names)
 
     # If some AST nodes must be skipped (for any reason), go learn about them
     badTypes = cleanupNodes.DiscoverBadTypes()
@@ -221,6 +229,8 @@ def main():
     C_HeaderFile = open(configMT.outputDir + os.sep + "PrintTypesAsASN1.h", "w")
     C_HeaderFile.write('#ifndef __PRINTTYPESASASN1_H__\n')
     C_HeaderFile.write('#define __PRINTTYPESASASN1_H__\n\n')
+    if bSnprint:
+        C_HeaderFile.write('#include <stddef.h>\n\n')
     C_HeaderFile.write('#ifdef __cplusplus\n')
     C_HeaderFile.write('extern "C" {\n')
     C_HeaderFile.write('#endif\n\n')
@@ -228,10 +238,13 @@ def main():
     C_SourceFile = open(configMT.outputDir + os.sep + "PrintTypesAsASN1.c", "w")
     C_SourceFile.write('#include <stdio.h>\n\n')
     C_SourceFile.write('#include "PrintTypesAsASN1.h"\n\n')
-    C_SourceFile.write('#ifdef __linux__\n')
-    C_SourceFile.write('#include <pthread.h>\n\n')
-    C_SourceFile.write('static pthread_mutex_t g_printing_mutex = PTHREAD_MUTEX_INITIALIZER;\n\n')
-    C_SourceFile.write('#endif\n\n')
+    if bSnprint:
+        C_SourceFile.write(g_snprintSupport)
+    else:
+        C_SourceFile.write('#ifdef __linux__\n')
+        C_SourceFile.write('#include <pthread.h>\n\n')
+        C_SourceFile.write('static pthread_mutex_t g_printing_mutex = PTHREAD_MUTEX_INITIALIZER;\n\n')
+        C_SourceFile.write('#endif\n\n')
 
     # Work on each ASN.1 file's types
     for asnFile in uniqueASNfiles:
@@ -242,7 +255,7 @@ def main():
         inform("Executing mappings for types inside %s...", asnFile)
         names = uniqueASNfiles[asnFile][0]
 
-        printer = Printer()
+        printer = Printer('SNPRINT' if bSnprint else 'printf')
 
         for nodeTypename in names:
             # Check if this type must be skipped
@@ -258,6 +271,11 @@ def main():
             assert nodeTypename in leafTypeDict
 
             C_HeaderFile.write('void PrintASN1%s(const char *paramName, const asn1Scc%s *pData);\n' % (cleanNodeTypename, cleanNodeTypename))
+            if bSnprint:
+                lines = ['    SNPRINT("%s ", paramName);']
+                lines.extend("    " + x for x in printer.Map('(*pData)', '', node, leafTypeDict, asnParser.g_names))
+                WriteSnprinter(C_HeaderFile, C_SourceFile, cleanNodeTypename, lines, 'ASN1')
+                continue
             C_SourceFile.write('void PrintASN1%s(const char *paramName, const asn1Scc%s *pData)\n{\n' % (cleanNodeTypename, cleanNodeTypename))
             C_SourceFile.write('#ifdef __linux__\n')
             C_SourceFile.write('    pthread_mutex_lock(&g_printing_mutex);\n')
@@ -276,6 +294,8 @@ def main():
     C_HeaderFile.write('}\n')
     C_HeaderFile.write('#endif\n')
     C_HeaderFile.write('\n#endif\n')
+    C_HeaderFile.close()
+    C_SourceFile.close()
 
 if __name__ == "__main__":
     if "-pdb" in sys.argv:
@@ -30,13 +30,15 @@ of an ASN.1 file - thus allowing merging of SMP2 designs into TASTE designs
 '''
 import os
 import sys
+import heapq
 import getopt
 
-from typing import Dict
+from typing import Dict, List, Tuple, Iterator, Any  # NOQA pylint: disable=unused-import
 
 from .commonPy import asnParser
 from .commonPy.createInternalTypes import ScanChildren
 from .commonPy.asnParser import AST_Lookup  # NOQA pylint: disable=unused-import
+from .commonPy.asnAST import FingerprintPerSMP2
 from .commonPy.commonSMP2 import (
     info, panic, green, white, red, setVerbosity,
     DashUnderscoreAgnosticDict, ConvertCatalogueToASN_AST)
@@ -57,6 +59,45 @@ def usage(coloredMsg: str="") -> None:
     panic(usageMsg, coloredMsg)
 
 
+class CandidatesIndex:
+    '''Buckets the (non-artificial) types of an ASN.1 AST by their
+FingerprintPerSMP2, so that looking for a type identical to another only
+needs to call IdenticalPerSMP2 on the types of the same bucket (plus the
+ones that can't be fingerprinted, or are identical to any SEQUENCE).
+The candidates are returned in the order of the original AST.'''
+    def __init__(self, names: AST_Lookup) -> None:
+        self._buckets = {}  # type: Dict[Any, List[Tuple[int, str]]]
+        self._allMembers = []  # type: List[Tuple[int, str]]
+        self._emptyMembers = []  # type: List[Tuple[int, str]]
+        self._unknown = []  # type: List[Tuple[int, str]]
+        self._all = []  # type: List[Tuple[int, str]]
+        memo = {}  # type: Dict[int, Any]
+        for idx, (k, v) in enumerate(names.items()):
+            if v._isArtificial:
+                # Avoid mapping to artificially generated inner types
+                # (see last part of VerifyAndFixAST in asnParser)
+                continue
+            self._all.append((idx, k))
+            fp = FingerprintPerSMP2(v, names, memo)
+            if fp is None:
+                self._unknown.append((idx, k))
+                continue
+            self._buckets.setdefault(fp, []).append((idx, k))
+            if fp[0] == 'MEMBERS':
+                self._allMembers.append((idx, k))
+                if fp == ('MEMBERS',):
+                    self._emptyMembers.append((idx, k))
+
+    def Candidates(self, fp: Any) -> Iterator[Tuple[int, str]]:
+        if fp is None:
+            return iter(self._all)
+        if fp == ('MEMBERS',):
+            return heapq.merge(self._allMembers, self._unknown)
+        if fp[0] == 'MEMBERS':
+            return heapq.merge(self._buckets.get(fp, []), self._emptyMembers, self._unknown)
+        return heapq.merge(self._buckets.get(fp, []), self._unknown)
+
+
 def MergeASN1_AST(smp2AsnAST: AST_Lookup) -> Dict[str, str]:
     '''Merges the ASN.1 AST generated from SMP2 files (smp2AsnAST param)
     into the ASN.1 AST stored in asnParser.g_names. Uses smart
@@ -64,6 +105,8 @@ def MergeASN1_AST(smp2AsnAST: AST_Lookup) -> Dict[str, str]:
     typesToAddVerbatim = []
     identicals = {}  # type: Dict[str, str]
     d = asnParser.g_names
+    index = CandidatesIndex(d)
+    smp2Memo = {}  # type: Dict[int, Any]
     for k, v in smp2AsnAST.items():
         if k in d:
             # Type name exists in both trees - is it the same?
@@ -75,11 +118,8 @@ def MergeASN1_AST(smp2AsnAST: AST_Lookup) -> Dict[str, str]:
                 info(1, green, k, white, "exists and is semantically equivalent.")  # pragma: no cover
         else:
             # Find an identical type if possible
-            for k2, v2 in d.items():
-                if v2._isArtificial:
-                    # Avoid mapping to artificially generated inner types
-                    # (see last part of VerifyAndFixAST in asnParser)
-                    continue
+            for _, k2 in index.Candidates(FingerprintPerSMP2(v, smp2AsnAST, smp2Memo)):
+                v2 = d[k2]
                 if v2.IdenticalPerSMP2(v, d, smp2AsnAST):
                     info(1, green, k, white, "is identical to", red, k2, white)
                     identicals[k] = k2
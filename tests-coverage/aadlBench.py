@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+'''
+The AADL parser benchmark (see Makefile.aadl): times the native AADL
+parser of aadl2glueC and the legacy one (-legacyParser, i.e. the ANTLR
+one, under python2) on mini_cv.aadl, and on a model with the given
+number of subprograms - each one with an IN and an OUT parameter of the
+types of DataView.aadl, and a C implementation. The model is written
+in the given folder.
+
+    aadlBench.py outputDir runs subprograms
+
+Both parsers must find the same subprograms, with the same parameters
+(direction, name and type) and the same implementations.
+'''
+import os
+import re
+import sys
+import time
+
+from dmt import aadl2glueC
+from dmt.commonPy import aadlAST, configMT
+
+
+def Model(subprograms):
+    '''The AADL of the subprograms (see DataView.aadl for their types)'''
+    types = sorted(set(re.findall(r'^DATA (T_[A-Z0-9]+)$', open('DataView.aadl').read(), re.M)))
+    lines = []
+    for i in range(subprograms):
+        lines += [
+            'SUBPROGRAM sp%d' % i,
+            'FEATURES',
+            '\tin%d:IN PARAMETER DataView::%s {encoding=>UPER;};' % (i, types[i % len(types)]),
+            '\tout%d:OUT PARAMETER DataView::%s {encoding=>NATIVE;};' % (i, types[(i + 1) % len(types)]),
+            'END sp%d;' % i,
+            '',
+            'SUBPROGRAM IMPLEMENTATION sp%d.C' % i,
+            'PROPERTIES',
+            '\tFV_Name => "sp%d_fv";' % i,
+            '\tSource_Language => C;',
+            'END sp%d.C;' % i,
+            '']
+    return '\n'.join(lines)
+
+
+def Parse(files, legacy):
+    '''Parses the files as aadl2glueC does - returns what the glue needs'''
+    configMT.useLegacyAADLParser = legacy
+    sys.argv = ['aadl2glueC'] + files
+    aadl2glueC.ParseAADLfilesAndResolveSignals()
+    return sorted(
+        (spName, [(type(p).__name__, p._id, p._signal._asnNodename) for p in sp._params])
+        for spName, sp in aadlAST.g_apLevelContainers.items()), \
+        sorted(tuple(x) for x in aadlAST.g_subProgramImplementations)
+
+
+def main():
+    outputDir, runs, subprograms = sys.argv[1], int(sys.argv[2]), int(sys.argv[3])
+    model = os.path.join(outputDir, 'subprograms.aadl')
+    with open(model, 'w') as f:
+        f.write(Model(subprograms))
+    errors = []
+    for files in [['mini_cv.aadl', 'DataView.aadl'], [model, 'DataView.aadl']]:
+        results = {}
+        for legacy in [False, True]:
+            times = []
+            for _ in range(runs):
+                start = time.time()
+                results[legacy] = Parse(files, legacy)
+                times.append(time.time() - start)
+            times.sort()
+            print("%-30s %-14s %3d runs: median %.3f s, min %.3f s (%d subprograms)" % (
+                os.path.basename(files[0]), "-legacyParser" if legacy else "native",
+                runs, times[runs // 2], times[0], len(results[legacy][0])))
+        if results[False] != results[True]:
+            errors.append("%s: the parsers give different subprograms" % files[0])
+    for what in errors:
+        print(what)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+'''
+The benchmark of the asynchronous backends' type registration (see
+Makefile.async): times the ProcessAsync calls for the given number of
+subprograms (each one with 4 params) over a dataview with the given
+number of types - half of them INTEGERs, and the rest SEQUENCEs that
+contain them, or SEQUENCE OFs of these SEQUENCEs (as in sizesGrammar.py).
+
+    asyncBench.py subprograms types
+
+The backend only counts the On* calls: each type that the params use
+(directly, or via the types that they contain) must be registered
+exactly once - and no other type.
+'''
+import sys
+import time
+import types
+import collections
+
+from dmt import aadl2glueC
+from dmt.commonPy import asnAST, asnParser
+from dmt.commonPy.aadlAST import ApLevelContainer, InParam, Signal
+
+ASN_FILE = 'dataview.asn'
+
+
+def Dataview(total):
+    '''The types (and leaf types) of the dataview - see sizesGrammar.py'''
+    ints = total // 2
+    seqs = total * 2 // 5
+    lists = total - ints - seqs
+    names, leafTypes = {}, {}
+    for i in range(ints):
+        names['T-%d' % i] = asnAST.AsnInt(range=[0, i + 1], asnFilename=ASN_FILE)
+        leafTypes['T-%d' % i] = 'INTEGER'
+    for i in range(seqs):
+        names['T-%d' % (ints + i)] = asnAST.AsnSequence(members=[
+            ('a', asnAST.AsnMetaMember(containedType='T-%d' % i, asnFilename=ASN_FILE)),
+            ('b', asnAST.AsnBool(asnFilename=ASN_FILE))], asnFilename=ASN_FILE)
+        leafTypes['T-%d' % (ints + i)] = 'SEQUENCE'
+    for i in range(lists):
+        names['T-%d' % (ints + seqs + i)] = asnAST.AsnSequenceOf(
+            range=[1, 4], containedType='T-%d' % (ints + seqs - lists + i), asnFilename=ASN_FILE)
+        leafTypes['T-%d' % (ints + seqs + i)] = 'SEQUENCEOF'
+    return names, leafTypes
+
+
+def CountingBackend():
+    '''An asynchronous backend that only counts the types it is given'''
+    backend = types.ModuleType('countingBackend')
+    backend.registered = collections.Counter()
+    backend.OnStartup = lambda *args: None
+    for callback in ['OnBasic', 'OnSequence', 'OnSet', 'OnChoice', 'OnSequenceOf', 'OnSetOf', 'OnEnumerated']:
+        setattr(backend, callback, lambda nodeTypename, *args: backend.registered.update([nodeTypename]))
+    return backend
+
+
+def main():
+    subprograms, total = int(sys.argv[1]), int(sys.argv[2])
+    names, leafTypes = Dataview(total)
+    asnParser.g_names.clear()
+    asnParser.g_names.update(names)
+    asnParser.g_leafTypeDict.clear()
+    asnParser.g_leafTypeDict.update(leafTypes)
+    backend = CountingBackend()
+    aadl2glueC.g_async_mappers['Counting'] = backend
+
+    # Each param uses one of the types - and so, the ones it contains
+    sps = []
+    for i in range(subprograms):
+        sp = ApLevelContainer('sp%d' % i)
+        for j in range(4):
+            typename = 'T-%d' % ((i * 4 + j) * 7 % total)
+            sp.AddParam(InParam(sp._id, 'p%d' % j, Signal(ASN_FILE, typename, 8), None))
+        sps.append(sp)
+    used = set()
+    pending = [p._signal._asnNodename for sp in sps for p in sp._params]
+    while pending:
+        typename = pending.pop()
+        if typename not in used:
+            used.add(typename)
+            node = names[typename]
+            if isinstance(node, asnAST.AsnSequence):
+                pending.append(node._members[0][1]._containedType)
+            elif isinstance(node, asnAST.AsnSequenceOf):
+                pending.append(node._containedType)
+
+    start = time.time()
+    for sp in sps:
+        aadl2glueC.ProcessAsync('Counting', ASN_FILE, sp, None, False, set())
+    print("ProcessAsync, %d subprograms x 4 params over %d types: %.3f s, %d On* calls for %d used types" % (
+        subprograms, total, time.time() - start, sum(backend.registered.values()), len(used)))
+
+    errors = []
+    if set(backend.registered) != used:
+        errors.append("The registered types are not the used ones")
+    if any(count != 1 for count in backend.registered.values()):
+        errors.append("Some types were registered more than once")
+    for what in errors:
+        print(what)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
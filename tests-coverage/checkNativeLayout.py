@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+'''
+Checks that the native sizes that nativeLayout computes for the types of
+the given ASN.1 grammars are the ones that the C types generated by ASN1SCC
+have, when compiled with gcc -m64 (for LP64) and gcc -m32 (for ILP32).
+'''
+import os
+import sys
+import shutil
+import platform
+import tempfile
+import distutils.spawn as spawn
+
+from dmt import asn2aadlPlus
+from dmt.commonPy import asnParser, nativeLayout
+from dmt.commonPy.utility import mysystem, panic
+
+ABIs = [('LP64', 'gcc -m64'), ('ILP32', 'gcc -m32')]
+
+
+def main():
+    inputFiles = sys.argv[1:]
+    asnParser.ParseAsnFileList(inputFiles)
+    names = asnParser.g_names
+    namesDict = {}
+    for asnTypename, node in names.items():
+        if not node._isArtificial:
+            namesDict[asn2aadlPlus.cleanNameAsAsn1cWants(asnTypename)] = asnTypename
+    asn1SccPath = spawn.find_executable('asn1.exe')
+    if asn1SccPath is None:
+        panic("ASN1SCC seems not installed on your system (asn1.exe not found in PATH).\n")
+    asn1scc = os.path.abspath(asn1SccPath)
+    if platform.system() != "Windows":
+        asn1scc = "mono " + asn1scc
+    autosrc = tempfile.mkdtemp(".asn1c")
+    try:
+        mysystem("%s -wordSize 8 -c -uPER -o \"%s\" %s" % (asn1scc, autosrc, '"' + '" "'.join(inputFiles) + '"'))
+        measurements = asn2aadlPlus.measureWithCompilers(
+            autosrc, inputFiles, "", [(cc, cc) for _, cc in ABIs],
+            sorted(namesDict.values()), names, namesDict)
+    finally:
+        shutil.rmtree(autosrc)
+    mismatches = 0
+    for (abi, cc), measured in zip(ABIs, measurements):
+        memo = {}
+        for asnTypename in sorted(measured):
+            computed = nativeLayout.SizeOf(asnTypename, names, nativeLayout.g_ABIs[abi], memo)
+            if computed != measured[asnTypename]['sizeof']:
+                print("%s: sizeof(%s) is %d under %s, but nativeLayout computed %d" % (
+                    abi, asnTypename, measured[asnTypename]['sizeof'], cc, computed))
+                mismatches += 1
+    print("%d types checked in %s, %d mismatches" % (len(namesDict), " ".join(inputFiles), mismatches))
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
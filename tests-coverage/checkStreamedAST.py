@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+'''
+Checks that the streaming loader of the ASN1SCC XML AST (ParseASN1SCC_AST)
+leaves behind the same parser globals as the old one, that built the
+generic XML tree of the whole file first and then walked it - and that
+PrintGrammarFromAST re-creates the same grammar from both.
+
+    checkStreamedAST.py grammar.asn [grammar2.asn] ...
+
+The grammars are given to ASN1SCC together, as in ParseAsnFileList.
+'''
+import io
+import os
+import sys
+import tempfile
+import distutils.spawn as spawn
+
+from dmt.commonPy import asnParser
+
+
+def OldParseASN1SCC_AST(filename):
+    '''ParseASN1SCC_AST, as it was before StreamAsn1Modules'''
+    root = asnParser.LoadXMLTree(filename)
+    modules = []
+
+    def VisitAsn1Module(xmlAsn1File, xmlModule):
+        newModule = asnParser.Module()
+        newModule._id = asnParser.GetAttr(xmlModule, "ID")
+        newModule._asnFilename = asnParser.GetAttr(xmlAsn1File, "FileName")
+        newModule._exportedTypes = []
+        newModule._exportedVariables = []
+        newModule._importedModules = []
+        for header in ["ExportedTypes", "ExportedVariables", "ImportedModules"]:
+            xmlHeader = asnParser.GetChild(xmlModule, header)
+            if xmlHeader is not None:
+                asnParser.VisitModuleHeader(newModule, xmlHeader)
+        newModule._typeAssignments = asnParser.VisitAll(
+            asnParser.GetChild(xmlModule, "TypeAssignments"), "TypeAssignment",
+            lambda x: asnParser.VisitTypeAssignment(newModule, x))
+        asnParser.RegisterAsn1Module(newModule, modules)
+
+    asnParser.VisitAll(
+        root._children[0], "Asn1File",
+        lambda x: asnParser.VisitAll(x, "Asn1Module", lambda y: VisitAsn1Module(x, y)))
+    asnParser.g_xmlASTrootNode = root
+    for m in modules:
+        for typeName, typeData in m._typeAssignments:
+            asnParser.g_names[typeName] = typeData
+            asnParser.g_modules.setdefault(m._id, []).append(typeName)
+    asnParser.g_leafTypeDict.update(asnParser.VerifyAndFixAST())
+    for nodeTypename in list(asnParser.g_names.keys()):
+        if nodeTypename not in asnParser.g_checkedSoFarForKeywords:
+            asnParser.g_checkedSoFarForKeywords[nodeTypename] = 1
+            asnParser.CheckForInvalidKeywords(nodeTypename)
+
+
+def Canonical(value):
+    '''A comparable form of the parser globals (AsnNodes included)'''
+    if isinstance(value, dict):
+        return sorted((repr(k), Canonical(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return [Canonical(x) for x in value]
+    if hasattr(value, '__dict__'):
+        return (type(value).__name__, Canonical(vars(value)))
+    return repr(value)
+
+
+def LoadWith(loader, xmlAST):
+    for name in asnParser.g_parsedASTGlobals:
+        getattr(asnParser, name).clear()
+    asnParser.g_xmlASTrootNode = None
+    loader(xmlAST)
+    grammar = io.StringIO()
+    asnParser.PrintGrammarFromAST(grammar)
+    return {
+        name: Canonical(getattr(asnParser, name))
+        for name in asnParser.g_parsedASTGlobals
+    }, grammar.getvalue()
+
+
+def main():
+    asn1SccPath = spawn.find_executable('asn1.exe')
+    if asn1SccPath is None:
+        print("ASN1SCC seems not installed on your system (asn1.exe not found in PATH).")
+        return 1
+    (dummy, xmlAST) = tempfile.mkstemp()
+    os.close(dummy)
+    try:
+        if asnParser.InvokeASN1SCC("mono ", asn1SccPath, 4, xmlAST, sys.argv[1:]) != 0:
+            print("ASN1SCC failed to parse %s" % " ".join(sys.argv[1:]))
+            return 1
+        asnParser.g_keepXMLAST = True
+        old = LoadWith(OldParseASN1SCC_AST, xmlAST)
+        new = LoadWith(asnParser.ParseASN1SCC_AST, xmlAST)
+    finally:
+        os.unlink(xmlAST)
+    errors = [name for name in asnParser.g_parsedASTGlobals if old[0][name] != new[0][name]]
+    if old[1] != new[1]:
+        errors.append("the grammar from PrintGrammarFromAST")
+    for what in errors:
+        print("%s: the streaming loader gives a different %s" % (" ".join(sys.argv[1:]), what))
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+'''
+Checks the VHDL glue that aadl2glueC generated (in the given folder) for
+a register window of the given size (-vhdlWindow): the register array and
+the APB address decoding of the wrapper, its paddr/pmask in the top
+architecture, and the BASE_ADDR of the C side - as well as that the
+registers written (read) by the C side are the ones that the VHDL reads
+(writes), all of them inside the window.
+'''
+import re
+import sys
+import glob
+
+
+def Registers(pattern, text, words=1):
+    '''The register indexes accessed at "BASE_ADDR + 0x..." offsets'''
+    regs = set()
+    for offset in re.findall(pattern, text):
+        regs.update(int(offset, 16) // 4 + i for i in range(words))
+    return regs
+
+
+def main():
+    outputDir, window = sys.argv[1], int(sys.argv[2])
+    lastRegister = window // 4 - 1
+    msb = window.bit_length() - 2
+    paddr = max(2, window // 256)
+    pmask = 0xfff & ~(window // 256 - 1)
+    vhdl = open(outputDir + '/VHDL/APB wrapper/apbwrapper.vhd').read()
+    declaration = open(outputDir + '/VHDL/APB wrapper/apbwrapper_declaration.vhd').read()
+    top = open(outputDir + '/VHDL/Top architecture/architecture_top.vhd').read()
+    c = ''.join(open(x).read() for x in glob.glob(outputDir + '/*.VHDL.c'))
+
+    errors = []
+
+    def Expect(condition, what):
+        if not condition:
+            errors.append(what)
+
+    Expect('type registers_type is array(%d downto 0)' % lastRegister in vhdl, 'registers_type')
+    Expect('variable add : std_logic_vector(%d downto 0);' % msb in vhdl, 'add')
+    Expect('add := apbi.paddr(%d downto 0);' % msb in vhdl, 'add := apbi.paddr')
+    Expect('ind := conv_integer(add(%d downto 2));' % msb in vhdl, 'ind := conv_integer(add)')
+    Expect('generic map (pindex => 2, paddr => %d)' % paddr in top, 'paddr')
+    Expect(re.search(r'component apbwrapper2 is.*?pmask : integer := 16#%03x#' % pmask, declaration, re.S), 'pmask')
+    Expect(re.search(r'#define BASE_ADDR\s+0x%x\n' % (256 * paddr), c), 'BASE_ADDR')
+
+    # INTEGERs are written/read as 64-bit values, i.e. in two registers
+    cWrites = Registers(r'ESAWriteRegister\(BASE_ADDR \+ (0x[0-9a-f]+) \+ i\*4', c, 2) | \
+        Registers(r'ESAWriteRegister\(BASE_ADDR \+ (0x[0-9a-f]+), tmp\)', c)
+    cReads = Registers(r'ESAReadRegister\(BASE_ADDR \+ (0x[0-9a-f]+) \+ \(\(sizeof', c, 2) | \
+        Registers(r'ESAReadRegister\(BASE_ADDR \+ (0x[0-9a-f]+)\)', c)
+    vhdlReads = set(int(x) for x in re.findall(r'<= regs\((\d+)\)', vhdl))
+    vhdlWrites = set(int(x) for x in re.findall(r'^\s*regs\((\d+)\)(?:\(\d+\))? :=', vhdl, re.M))
+    # ...and register 0 is the control one (start/finish)
+    for registers in (cWrites, cReads, vhdlReads, vhdlWrites):
+        registers.discard(0)
+    Expect(cWrites and cWrites == vhdlReads, 'the input registers')
+    Expect(cReads and cReads == vhdlWrites, 'the output registers')
+    Expect(max(cWrites | cReads | vhdlReads | vhdlWrites) <= lastRegister, 'the registers inside the window')
+
+    for what in errors:
+        print("%s: unexpected %s for a %d byte register window" % (outputDir, what, window))
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+'''
+The daemon benchmark (see Makefile.daemon): times asn2dataModel runs on
+the given grammar, started cold (python3 -m dmt.asn2dataModel) and via a
+"dmt serve" daemon (python3 -m dmt.daemon asn2dataModel) - each of them
+into an empty output folder.
+
+    daemonBench.py outputDir runs grammar.asn -toXXX [-toYYY] ...
+
+The daemon runs must leave the same outputs as the cold ones by the time
+the client returns, report the same exit code for a failing run, and the
+daemon must remove its socket when it is stopped.
+'''
+import os
+import sys
+import time
+import shutil
+import signal
+import filecmp
+import subprocess
+
+
+def Outputs(folder):
+    '''The outputs of a run (the manifest keys depend on the command line)'''
+    return sorted(
+        os.path.relpath(os.path.join(root, f), folder)
+        for root, _, files in os.walk(folder)
+        for f in files if f != '.asn2dataModel.manifest')
+
+
+def main():
+    outputDir, runs, grammar, backends = sys.argv[1], int(sys.argv[2]), sys.argv[3], sys.argv[4:]
+    socketPath = os.path.join(os.path.abspath(outputDir), 'dmt.sock')
+    os.environ['DMT_SOCKET'] = socketPath
+    errors = []
+
+    def Run(command, output, stderr=None):
+        shutil.rmtree(output, ignore_errors=True)
+        os.makedirs(output)
+        start = time.time()
+        exitCode = subprocess.call(
+            command + ['-o', output] + backends + [grammar], stdout=subprocess.DEVNULL, stderr=stderr)
+        return time.time() - start, exitCode
+
+    cold = [sys.executable, '-m', 'dmt.asn2dataModel']
+    viaDaemon = [sys.executable, '-m', 'dmt.daemon', 'asn2dataModel']
+    coldOutput = os.path.join(outputDir, 'cold')
+    daemonOutput = os.path.join(outputDir, 'daemon')
+    # (the first cold run also fills the XML cache of both)
+    Run(cold, coldOutput)
+    coldTimes = [Run(cold, coldOutput)[0] for _ in range(runs)]
+
+    daemon = subprocess.Popen(
+        [sys.executable, '-m', 'dmt.daemon', 'serve'], stdout=subprocess.DEVNULL)
+    try:
+        while not os.path.exists(socketPath):
+            if daemon.poll() is not None:
+                print("The daemon failed to start")
+                return 1
+            time.sleep(0.05)
+        Run(viaDaemon, daemonOutput)
+        daemonTimes = [Run(viaDaemon, daemonOutput)[0] for _ in range(runs)]
+        outputs = Outputs(coldOutput)
+        if outputs != Outputs(daemonOutput) or \
+                filecmp.cmpfiles(coldOutput, daemonOutput, outputs, shallow=False)[0] != outputs:
+            errors.append("the daemon runs leave different outputs than the cold ones")
+        # A failing run reports the same exit code, too
+        backends.append('-toNothing')
+        if Run(viaDaemon, daemonOutput, subprocess.DEVNULL)[1] != Run(cold, coldOutput, subprocess.DEVNULL)[1]:
+            errors.append("the daemon runs report a different exit code")
+    finally:
+        daemon.send_signal(signal.SIGTERM)
+        daemon.wait()
+    if os.path.exists(socketPath):
+        errors.append("the daemon left its socket behind")
+
+    for what, times in [("cold", coldTimes), ("via the daemon", daemonTimes)]:
+        times.sort()
+        print("asn2dataModel %s %-16s %3d runs: median %.3f s, min %.3f s" % (
+            ' '.join(backends[:-1]), what, runs, times[runs // 2], times[0]))
+    for what in errors:
+        print(what)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+/*
+ * The GUI benchmark (see Makefile.gui): runs the telemetry thread of the
+ * gui_B_mapper glue (MyThreads.inc) against a real POSIX message queue.
+ *
+ *     guiBench messages periodInUs
+ *
+ *         Sends the TMs (hk and status, in turns) - as fast as possible
+ *         for a period of 0 - and reports how many the thread processed
+ *         per second, and how many GUI refreshes and control updates it
+ *         made for them.
+ *
+ *     guiBench idle seconds
+ *
+ *         Reports how many times the thread woke up, without any TMs.
+ *
+ *     guiBench closed
+ *
+ *         Closes the queue under the thread, which must then end (instead
+ *         of spinning).
+ */
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <fcntl.h>
+#include <mqueue.h>
+#include <poll.h>
+#include <iostream>
+#include <sstream>
+#include <iomanip>
+
+#include "guiBench.h"
+#include "bench_enums_def.h"
+#include "queue_manager.h"
+
+using namespace std;
+
+volatile bool g_stop = false;
+long g_guiEnter, g_setValue, g_wakeups, g_printed;
+wxConvLocalT wxConvLocal;
+
+class TeleCmds {
+public:
+#include "MyControls.inc"
+};
+
+// The benchmark closes the queue of the thread
+#define private public
+#include "MyThreads.h"
+#undef private
+#include "MyThreads.inc"
+
+int main(int argc, char **argv)
+{
+    if (argc < 2 || (strcmp(argv[1], "closed") && argc != 3)) {
+        fprintf(stderr, "Usage: %s messages periodInUs | idle seconds | closed\n", argv[0]);
+        return 1;
+    }
+    char queueName[100];
+    snprintf(queueName, sizeof queueName, "/%d_bench_PI_queue", geteuid());
+    mq_unlink(queueName);
+    struct mq_attr attr;
+    memset(&attr, 0, sizeof attr);
+    attr.mq_maxmsg = 10;
+    attr.mq_msgsize = sizeof(int) + sizeof(asn1SccT_INT) + sizeof(asn1SccT_SET);
+    if (mq_open(queueName, O_CREAT | O_RDWR, 0600, &attr) == (mqd_t)-1) {
+        perror(queueName);
+        return 1;
+    }
+
+    // The stand-in controls have no state - all the control pointers of
+    // the frame can point to the same storage
+    TeleCmds frame;
+    static char controls[16];
+    for (size_t i = 0; i < sizeof frame / sizeof(void *); i++)
+        ((void **)&frame)[i] = controls;
+    bench_telemetry *thread = new bench_telemetry(&frame);
+    thread->Create();
+    thread->Run();
+
+    int result = 0;
+    if (!strcmp(argv[1], "closed")) {
+        mq_close(thread->_queue_id);
+        if (!thread->Wait(2000)) {
+            fprintf(stderr, "The telemetry thread goes on after its queue was closed\n");
+            result = 1;
+        }
+    } else if (!strcmp(argv[1], "idle")) {
+        sleep(atoi(argv[2]));
+        fprintf(stderr, "Idle for %s s: %ld wakeups\n", argv[2], g_wakeups);
+    } else {
+        int messages = atoi(argv[1]), period = atoi(argv[2]);
+        mqd_t queue_id;
+        open_exchange_queue_for_writing(queueName + 1, &queue_id);
+        long long start = getTimeInMilliseconds();
+        for (int i = 0; i < messages; i++) {
+            char buf[sizeof(asn1SccT_INT) + sizeof(asn1SccT_SET)] = {0};
+            asn1SccT_INT counter = i;
+            memcpy(buf, &counter, sizeof counter);
+            write_message_to_queue(queue_id, sizeof buf, buf, i % 2 ? i_status : i_hk);
+            if (period)
+                usleep(period);
+        }
+        while (g_printed < messages && getTimeInMilliseconds() - start < 60000)
+            usleep(100);
+        long long elapsed = getTimeInMilliseconds() - start;
+        if (g_printed != messages) {
+            fprintf(stderr, "Only %ld of the %d TMs were processed\n", g_printed, messages);
+            result = 1;
+        } else
+            fprintf(stderr, "%d TMs, sent every %d us: %.0f TMs/s, %ld GUI refreshes, %ld control updates\n",
+                    messages, period, messages * 1000.0 / (elapsed ? elapsed : 1), g_guiEnter, g_setValue);
+    }
+    g_stop = true;
+    thread->Wait(1000);
+    mq_unlink(queueName);
+    return result;
+}
@@ -0,0 +1,70 @@
+/*
+ * The GUI benchmark (see Makefile.gui) runs the telemetry thread of the
+ * gui_B_mapper glue without an X server: these are minimal stand-ins for
+ * the parts of wxWidgets that the thread uses (wxThread over pthreads,
+ * and controls that count their updates), and for the printers of
+ * msgPrinterASN1 (that count the TMs).
+ */
+#ifndef __GUIBENCH_H__
+#define __GUIBENCH_H__
+
+#include <pthread.h>
+#include <time.h>
+#include <errno.h>
+#include <unistd.h>
+#include <sys/time.h>
+
+#include "DataTypesSimulink.h"
+
+extern volatile bool g_stop;
+extern long g_guiEnter, g_setValue, g_wakeups, g_printed;
+
+struct wxString { wxString(const wchar_t *) {} };
+struct wxConvLocalT { const wchar_t *cMB2WC(const char *) { return L""; } };
+extern wxConvLocalT wxConvLocal;
+enum { wxCHK_UNCHECKED, wxCHK_CHECKED };
+struct wxTextCtrl { void SetValue(const wxString &) { g_setValue++; } };
+struct wxCheckBox { void Set3StateValue(int) { g_setValue++; } };
+struct wxChoice { void SetSelection(int) { g_setValue++; } };
+struct wxScrolledWindow {};
+struct wxStaticBoxSizer {};
+
+inline void wxMutexGuiEnter() { g_guiEnter++; }
+inline void wxMutexGuiLeave() {}
+
+class wxThread {
+public:
+    virtual ~wxThread() {}
+    virtual void *Entry() = 0;
+    virtual void OnExit() {}
+    bool TestDestroy() { g_wakeups++; return g_stop; }
+    void Create() {}
+    void Run() { pthread_create(&_thread, NULL, Go, this); }
+    // Returns false if the thread didn't end within timeoutInMs
+    bool Wait(int timeoutInMs) {
+        struct timespec deadline;
+        clock_gettime(CLOCK_REALTIME, &deadline);
+        deadline.tv_sec += timeoutInMs / 1000;
+        deadline.tv_nsec += (timeoutInMs % 1000) * 1000000L;
+        if (deadline.tv_nsec >= 1000000000L) {
+            deadline.tv_sec++;
+            deadline.tv_nsec -= 1000000000L;
+        }
+        return 0 == pthread_timedjoin_np(_thread, NULL, &deadline);
+    }
+private:
+    static void *Go(void *p) { return ((wxThread *)p)->Entry(); }
+    pthread_t _thread;
+};
+
+inline long long getTimeInMilliseconds()
+{
+    struct timeval tv;
+    gettimeofday(&tv, NULL);
+    return tv.tv_sec * 1000LL + tv.tv_usec / 1000;
+}
+
+inline void PrintASN1T_INT(const char *, const asn1SccT_INT *) { g_printed++; }
+inline void PrintASN1T_SET(const char *, const asn1SccT_SET *) {}
+
+#endif
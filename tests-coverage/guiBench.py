@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+'''
+Generates, in the given folder, the GUI glue of gui_B_mapper for the
+GUI benchmark (see Makefile.gui): two TMs of the "bench" function (hk
+and status) with two parameters each - a T-INT and a T-SET of
+DataTypesSimulink.asn.
+'''
+import os
+import sys
+
+from dmt.commonPy import asnParser
+from dmt.commonPy.aadlAST import ApLevelContainer, InParam, AadlParameter, Signal
+from dmt.B_mappers import gui_B_mapper
+
+TMs = ['hk', 'status']
+Params = [('counter', 'T-INT'), ('data', 'T-SET')]
+
+
+def main():
+    asnFile = 'DataTypesSimulink.asn'
+    outputDir = os.path.join(sys.argv[1], '')
+    asnParser.ParseAsnFileList([asnFile])
+    names, leafTypeDict = asnParser.g_names, asnParser.g_leafTypeDict
+    for tm in TMs:
+        sp = ApLevelContainer(tm)
+        sp._params = [
+            InParam(tm, paramName, Signal(asnFile, typename, 0), AadlParameter('IN', typename))
+            for paramName, typename in Params]
+        gui_B_mapper.OnStartup('gui_pi', asnFile, sp, 'GUI', outputDir, 'bench', False)
+        for param in sp._params:
+            typename = param._signal._asnNodename
+            processor = gui_B_mapper.OnBasic if leafTypeDict[typename] == 'INTEGER' else gui_B_mapper.OnSet
+            processor(typename, names[typename], sp, 'GUI', param, leafTypeDict, names)
+        gui_B_mapper.OnShutdown('gui_pi', asnFile, sp, 'GUI', 'bench')
+    gui_B_mapper.OnFinal()
+
+
+if __name__ == "__main__":
+    main()
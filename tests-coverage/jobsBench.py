@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+'''
+The -j benchmark (see Makefile.jobs): times asn2dataModel runs on the given
+grammar, with the backends running in-process, one after the other (no -j)
+and in forked workers (-j N, for each of the given N) - always regenerating
+their outputs (--no-cache).
+
+    jobsBench.py outputDir runs 1,2,4 grammar.asn -toXXX [-toYYY] ...
+'''
+import os
+import sys
+import time
+import shutil
+import subprocess
+
+
+def main():
+    outputDir, runs, jobs, grammar, backends = \
+        sys.argv[1], int(sys.argv[2]), sys.argv[3].split(','), sys.argv[4], sys.argv[5:]
+
+    def Run(options):
+        shutil.rmtree(outputDir, ignore_errors=True)
+        os.makedirs(outputDir)
+        start = time.time()
+        subprocess.check_call(
+            [sys.executable, '-m', 'dmt.asn2dataModel', '--no-cache', '-o', outputDir] + options + backends + [grammar],
+            stdout=subprocess.DEVNULL)
+        return time.time() - start
+
+    print("asn2dataModel %s (CPUs: %d):" % (' '.join(backends), os.cpu_count() or 1))
+    for options in [[]] + [['-j', j] for j in jobs]:
+        times = sorted(Run(options) for _ in range(runs))
+        print("    %-8s %3d runs: median %.3f s, min %.3f s" % (
+            ' '.join(options) or 'no -j', runs, times[runs // 2], times[0]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+'''
+The manifest benchmark (see Makefile.manifest): times asn2dataModel runs
+on a grammar whose outputs are already in the output folder - with
+--no-cache (i.e. every backend runs and rewrites its outputs, as before
+the manifest) and without (the backends are up to date, and skipped).
+
+    manifestBench.py outputDir runs grammar.asn otherGrammar.asn -toXXX [-toYYY] ...
+
+The runs without --no-cache must leave every output untouched (mtimes
+included). Then the outputs of otherGrammar.asn replace the ones of
+grammar.asn, which must be removed - except the one that was edited
+in the meantime.
+'''
+import os
+import sys
+import time
+import subprocess
+
+
+def Mtimes(folder):
+    return {
+        os.path.join(root, f): os.stat(os.path.join(root, f)).st_mtime_ns
+        for root, _, files in os.walk(folder)
+        for f in files}
+
+
+def main():
+    outputDir, runs, grammar, otherGrammar, backends = \
+        sys.argv[1], int(sys.argv[2]), sys.argv[3], sys.argv[4], sys.argv[5:]
+    errors = []
+
+    def Run(options, asnFile):
+        start = time.time()
+        subprocess.check_call(
+            [sys.executable, '-m', 'dmt.asn2dataModel', '-o', outputDir] + options + backends + [asnFile],
+            stdout=subprocess.DEVNULL)
+        return time.time() - start
+
+    # (the first run also fills the XML cache)
+    Run([], grammar)
+    regenerated = [Run(['--no-cache'], grammar) for _ in range(runs)]
+    before = Mtimes(outputDir)
+    upToDate = [Run([], grammar) for _ in range(runs)]
+    if Mtimes(outputDir) != before:
+        errors.append("the up-to-date runs modified the outputs")
+    for what, times in [("--no-cache", regenerated), ("up to date", upToDate)]:
+        times.sort()
+        print("asn2dataModel %s %-10s %3d runs: median %.3f s, min %.3f s" % (
+            ' '.join(backends), what, runs, times[runs // 2], times[0]))
+
+    # The outputs that are no longer generated are removed - unless edited
+    base = os.path.splitext(os.path.basename(grammar))[0].lower()
+    outputsOfGrammar = sorted(f for f in before if base in os.path.basename(f).lower())
+    edited = outputsOfGrammar[0]
+    with open(edited, 'a') as f:
+        f.write('\n')
+    Run([], otherGrammar)
+    after = Mtimes(outputDir)
+    if edited not in after:
+        errors.append("%s was edited, but removed" % edited)
+    stale = [f for f in outputsOfGrammar[1:] if f in after]
+    if stale:
+        errors.append("the outputs of %s were left behind: %s" % (grammar, ' '.join(sorted(stale))))
+
+    for what in errors:
+        print(what)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
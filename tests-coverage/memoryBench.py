@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+'''
+The memory benchmark of the parser (see Makefile.memory): loads the XML
+AST that ASN1SCC creates for the given grammar under tracemalloc, and
+reports the memory that the parsed AST keeps (per type, too) and the
+peak of the load.
+
+    memoryBench.py grammar.asn
+
+Also checks that the AST nodes carry no per-instance __dict__ (i.e. that
+every attribute set on them is declared in the __slots__ of asnAST), and
+that their filenames and referenced type names are interned.
+'''
+import gc
+import os
+import sys
+import tempfile
+import tracemalloc
+import distutils.spawn as spawn
+
+from dmt.commonPy import asnParser
+from dmt.commonPy.asnAST import AsnNode
+
+
+def Nodes(node):
+    '''The AST node and the ones under it (SEQUENCE members, etc.)'''
+    yield node
+    for member in getattr(node, '_members', ()):
+        if isinstance(member[1], AsnNode):
+            yield from Nodes(member[1])
+    contained = getattr(node, '_containedType', None)
+    if isinstance(contained, AsnNode):
+        yield from Nodes(contained)
+
+
+def main():
+    asn1SccPath = spawn.find_executable('asn1.exe')
+    if asn1SccPath is None:
+        print("ASN1SCC seems not installed on your system (asn1.exe not found in PATH).")
+        return 1
+    (dummy, xmlAST) = tempfile.mkstemp()
+    os.close(dummy)
+    try:
+        if asnParser.InvokeASN1SCC("mono ", asn1SccPath, 4, xmlAST, sys.argv[1:]) != 0:
+            print("ASN1SCC failed to parse %s" % " ".join(sys.argv[1:]))
+            return 1
+        gc.collect()
+        tracemalloc.start()
+        asnParser.ParseASN1SCC_AST(xmlAST)
+        gc.collect()
+        kept, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        os.unlink(xmlAST)
+
+    types = len(asnParser.g_names)
+    print("%s: %d types, AST %.1f MB (%d bytes/type), peak %.1f MB" % (
+        " ".join(sys.argv[1:]), types, kept / 2**20, kept // types, peak / 2**20))
+
+    errors = set()
+    for node in (n for typeData in asnParser.g_names.values() for n in Nodes(typeData)):
+        if hasattr(node, '__dict__'):
+            errors.add("%s nodes have a __dict__ (%s)" % (type(node).__name__, ", ".join(sorted(vars(node)))))
+        for attr in ['_asnFilename', '_leafType', '_containedType']:
+            value = getattr(node, attr, None)
+            if isinstance(value, str) and value is not sys.intern(value):
+                errors.add("the %s of the %s nodes is not interned" % (attr, type(node).__name__))
+    for what in sorted(errors):
+        print(what)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+/*
+ * The mqueue benchmark (see Makefile.mqueue): the queue manager functions
+ * of queue_manager.h, and (built with -DPRODUCER) the producer of the TMs:
+ *
+ *     producer queueName messages periodInUs
+ *
+ * Each TM carries the CLOCK_MONOTONIC time it was sent at (in ns) and its
+ * index; a period of 0 sends them as fast as possible.
+ */
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <fcntl.h>
+#include <time.h>
+#include <unistd.h>
+#include "queue_manager.h"
+
+#define MAX_MESSAGE 8192
+
+static int OpenQueue(char *queue_name, int flags, mqd_t *queue_id)
+{
+    char name[256];
+    snprintf(name, sizeof name, "/%s", queue_name);
+    *queue_id = mq_open(name, flags);
+    return *queue_id == (mqd_t)-1;
+}
+
+int open_exchange_queue_for_reading(char *queue_name, mqd_t *queue_id)
+{
+    return OpenQueue(queue_name, O_RDONLY | O_NONBLOCK, queue_id);
+}
+
+int open_exchange_queue_for_writing(char *queue_name, mqd_t *queue_id)
+{
+    return OpenQueue(queue_name, O_WRONLY, queue_id);
+}
+
+int retrieve_message_from_queue(mqd_t queue_id, int message_size, void *message_data_received, int *message_received_type)
+{
+    char buf[MAX_MESSAGE];
+    ssize_t received = mq_receive(queue_id, buf, sizeof buf, NULL);
+    if (received < (ssize_t) sizeof(int) || received - (ssize_t) sizeof(int) > message_size)
+        return -1;
+    memcpy(message_received_type, buf, sizeof(int));
+    memcpy(message_data_received, buf + sizeof(int), received - sizeof(int));
+    return 0;
+}
+
+int write_message_to_queue(mqd_t queue_id, int message_size, void *message_data, int message_type)
+{
+    char buf[MAX_MESSAGE];
+    if (message_size + sizeof(int) > sizeof buf)
+        return -1;
+    memcpy(buf, &message_type, sizeof(int));
+    memcpy(buf + sizeof(int), message_data, message_size);
+    return mq_send(queue_id, buf, message_size + sizeof(int), 1);
+}
+
+#ifdef PRODUCER
+int main(int argc, char **argv)
+{
+    mqd_t queue_id;
+    long long tm[2];
+    int messages, period, i;
+    if (argc != 4) {
+        fprintf(stderr, "Usage: %s queueName messages periodInUs\n", argv[0]);
+        return 1;
+    }
+    messages = atoi(argv[2]);
+    period = atoi(argv[3]);
+    if (open_exchange_queue_for_writing(argv[1], &queue_id)) {
+        perror(argv[1]);
+        return 1;
+    }
+    for (i = 0; i < messages; i++) {
+        struct timespec now;
+        clock_gettime(CLOCK_MONOTONIC, &now);
+        tm[0] = now.tv_sec * 1000000000LL + now.tv_nsec;
+        tm[1] = i;
+        if (write_message_to_queue(queue_id, sizeof tm, tm, 0) != 0) {
+            perror("mq_send");
+            return 1;
+        }
+        if (period)
+            usleep(period);
+    }
+    mq_close(queue_id);
+    return 0;
+}
+#endif
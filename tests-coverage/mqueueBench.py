@@ -0,0 +1,123 @@
+#!/usr/bin/env python2
+'''
+The mqueue benchmark (see Makefile.mqueue): runs the Poll loop of the
+PythonController.py that aadl2glueC generated for the GUI_PI of
+mqueueBench.aadl (in the current folder, with its PythonAccess.so)
+against a real POSIX message queue. The generated code is Python 2.
+
+    mqueueBench.py producer pathOfProducer messages periodInUs
+
+        The producer (see mqueueBench.c) sends the TMs, and the throughput
+        and the latency (from the time each TM was sent, to the time that
+        ProcessTM got it) are reported - as well as the CPU time that the
+        loop used.
+
+    mqueueBench.py idle seconds
+
+        Reports the CPU time that the loop used, without any TMs.
+
+    mqueueBench.py closed
+
+        Closes the queue under the loop, which must then end (instead
+        of spinning).
+'''
+from __future__ import print_function
+
+import os
+import re
+import sys
+import time
+import types
+import ctypes
+import struct
+import resource
+import subprocess
+
+
+class Timespec(ctypes.Structure):
+    _fields_ = [('tv_sec', ctypes.c_long), ('tv_nsec', ctypes.c_long)]
+
+
+librt = ctypes.CDLL('librt.so.1', use_errno=True)
+CLOCK_MONOTONIC = 1
+
+
+def Monotonic():
+    '''The CLOCK_MONOTONIC time (in ns) - the one the producer uses'''
+    ts = Timespec()
+    librt.clock_gettime(CLOCK_MONOTONIC, ctypes.byref(ts))
+    return ts.tv_sec * 1000000000 + ts.tv_nsec
+
+
+def CpuTime():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+def LoadController():
+    '''The namespace of PythonController.py (without its __main__ part)'''
+    source = open('PythonController.py').read()
+    # Only ProcessTM uses the DV and the (python A mapper) type modules
+    for module in ['DV'] + re.findall(r'^import (\w+_asn)$', source, re.M):
+        sys.modules[module] = types.ModuleType(module)
+    namespace = {'__name__': 'PythonController'}
+    exec(compile(source, 'PythonController.py', 'exec', 0, True), namespace)
+    return namespace
+
+
+def main():
+    controller = LoadController()
+    pollClass = [v for k, v in controller.items() if k.startswith('Poll_')][0]
+    fvName = pollClass.__name__[len('Poll_'):]
+    queueName = '%d_%s_PI_Python_queue' % (os.geteuid(), fvName)
+    librt.mq_unlink(('/' + queueName).encode())
+    queue = librt.mq_open(('/' + queueName).encode(), os.O_CREAT | os.O_RDWR, 0o600, None)
+    if queue == -1:
+        print("Failed to create the message queue /%s (errno %d)" % (queueName, ctypes.get_errno()))
+        return 1
+
+    latencies = []
+
+    def ProcessTM(self):
+        sent, unused_index = struct.unpack('qq', self._pMem[:16])
+        latencies.append(Monotonic() - sent)
+    controller['ProcessTM'] = ProcessTM
+
+    poll = pollClass()
+    poll.start()
+    while getattr(poll, '_pMem', None) is None:
+        time.sleep(0.01)
+    try:
+        if sys.argv[1] == 'producer':
+            messages = int(sys.argv[3])
+            cpu, start = CpuTime(), time.time()
+            subprocess.check_call([sys.argv[2], queueName, str(messages), sys.argv[4]])
+            while len(latencies) < messages and time.time() - start < 60:
+                time.sleep(0.001)
+            elapsed, cpu = time.time() - start, CpuTime() - cpu
+            if len(latencies) != messages:
+                print("Only %d of the %d TMs were processed" % (len(latencies), messages))
+                return 1
+            latencies.sort()
+            print("%d TMs, sent every %s us: %.0f TMs/s, latency p50 %.3f ms, p99 %.3f ms, CPU %.2f s" % (
+                messages, sys.argv[4], messages / elapsed,
+                latencies[messages // 2] / 1e6, latencies[messages * 99 // 100] / 1e6, cpu))
+        elif sys.argv[1] == 'idle':
+            cpu = CpuTime()
+            time.sleep(float(sys.argv[2]))
+            print("Idle for %s s: CPU %.3f s" % (sys.argv[2], CpuTime() - cpu))
+        elif sys.argv[1] == 'closed':
+            controller['CloseMsgQueue'](poll._msgQueue)
+            poll.join(2)
+            if poll.is_alive():
+                print("The Poll loop goes on after its queue was closed")
+                return 1
+        return 0
+    finally:
+        poll._bDie = True
+        poll.join()
+        librt.mq_unlink(('/' + queueName).encode())
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,174 @@
+#!/usr/bin/env python2
+'''
+The PySide backend benchmark (see Makefile.pyside): runs the expect()
+functions of the hk_backend.py and status_backend.py that aadl2glueC
+generated for the GUI_PI of pysideBench.aadl (in the given folder),
+with TMs that come over UDP on 127.0.0.1 - read by a thread that puts
+them in the Queue, as the UDP controller of the GUI does. The generated
+code is Python 2.
+
+    pysideBench.py outputDir messages otherPerExpected
+
+        Reports the rate of the TMs that one thread expects (ignoring the
+        others) when otherPerExpected TMs of the other kind arrive between
+        them - and the same, with one thread per kind. Also checks the
+        errors of expect(): wrong data, other TMs, and timeouts.
+
+The ASN.1 modules of the backends are replaced by minimal stand-ins, whose
+TMs are integers (in their GSER form).
+'''
+from __future__ import print_function
+
+import os
+import sys
+import time
+import types
+import Queue
+import socket
+import threading
+
+
+class TM(object):
+    '''Stand-in of the T-INT class of the Python A mapper'''
+    def SetData(self, rawTM):
+        self._value = int(rawTM)
+
+    def GSER(self):
+        return str(self._value)
+
+
+def LoadBackends(outputDir):
+    sys.path.insert(0, outputDir)
+    stubs = {
+        'DV': {}, 'Stubs': {}, 'vn': {'format_gser': str},
+        'asn1_python': {'compareVnValues': lambda a, b: a == b},
+        'DataTypesSimulink_asn': {'T_INT': TM},
+        'PythonController': {'i_hk': 1, 'i_status': 2},
+    }
+    for module, contents in stubs.items():
+        sys.modules[module] = types.ModuleType(module)
+        sys.modules[module].__dict__.update(contents)
+    import hk_backend
+    import status_backend
+    import tm_dispatcher
+    for backend in [hk_backend, status_backend]:
+        backend.setMsgQ()
+    return hk_backend, status_backend, tm_dispatcher
+
+
+class Link(object):
+    '''TMs sent over UDP, and put in the Queue of the expect() calls by
+    a reader thread. At most window TMs are in flight (sent, and not yet
+    expected), so that no datagram is dropped'''
+    def __init__(self, window=100):
+        self.Q = Queue.Queue()
+        self._window = threading.Semaphore(window)
+        self._receiver = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._receiver.bind(('127.0.0.1', 0))
+        self._sender = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._sender.connect(self._receiver.getsockname())
+        reader = threading.Thread(target=self._read)
+        reader.daemon = True
+        reader.start()
+
+    def _read(self):
+        while True:
+            msgId, value = self._receiver.recv(64).split(':')
+            self.Q.put((int(msgId), value))
+
+    def send(self, tms):
+        for msgId, value in tms:
+            self._window.acquire()
+            self._sender.send('%d:%d' % (msgId, value))
+
+    def consumed(self, count):
+        for _ in range(count):
+            self._window.release()
+
+
+def Expect(backend, link, values, inFlight, errors):
+    for value in values:
+        try:
+            backend.expect(link.Q, str(value), ignoreOther=True, timeout=10)
+        except Exception as e:
+            errors.append("Expecting %d: %s" % (value, e))
+            # (so that the sender doesn't wait for the rest)
+            link.consumed(inFlight * len(values))
+            return
+        link.consumed(inFlight)
+
+
+def Run(backends, link, messages, otherPerExpected, threaded):
+    hk, status = backends
+    tms, errors = [], []
+    for i in range(messages):
+        tms.extend((status.tmId, 50) for _ in range(otherPerExpected))
+        tms.append((hk.tmId, i % 50))
+    expected = [[value for msgId, value in tms if msgId == backend.tmId] for backend in backends]
+    if threaded:
+        waiters = [
+            threading.Thread(target=Expect, args=(backend, link, values, 1, errors))
+            for backend, values in zip(backends, expected)]
+    else:
+        # (the skipped TMs are printed, as "Received other")
+        waiters = [threading.Thread(target=Expect, args=(hk, link, expected[0], 1 + otherPerExpected, errors))]
+    stdout, sys.stdout = sys.stdout, open(os.devnull, 'w')
+    try:
+        start = time.time()
+        for waiter in waiters:
+            waiter.start()
+        link.send(tms)
+        for waiter in waiters:
+            waiter.join()
+        elapsed = time.time() - start
+    finally:
+        sys.stdout = stdout
+    print("%s, %d other TMs per hk: %.0f TMs/s (%.0f hk/s)" % (
+        "One thread per kind" if threaded else "One thread for hk",
+        otherPerExpected, len(tms) / elapsed, messages / elapsed))
+    return errors
+
+
+def Check(backends, link, tm_dispatcher):
+    '''The errors of expect(), as reported before the dispatcher'''
+    hk, status = backends
+    errors = []
+
+    def Raises(exception, call):
+        try:
+            call()
+            errors.append("%s was not raised" % exception.__name__)
+        except exception:
+            pass
+
+    link.send([(hk.tmId, 1)])
+    Raises(ValueError, lambda: hk.expect(link.Q, '2'))
+    link.send([(status.tmId, 1)])
+    Raises(TypeError, lambda: hk.expect(link.Q, '1'))
+    Raises(IOError, lambda: hk.expect(link.Q, '1', timeout=0.1))
+    # The decoder of a backend is also used for messages read before it was set
+    dispatcher = tm_dispatcher.Dispatcher.For(link.Q)
+    del dispatcher._decoders[status.tmId]
+    link.send([(status.tmId, 3)])
+    time.sleep(0.1)
+    status.expect(link.Q, '3')
+    link.consumed(3)
+    return errors
+
+
+def main():
+    outputDir, messages, otherPerExpected = sys.argv[1], int(sys.argv[2]), int(sys.argv[3])
+    hk, status, tm_dispatcher = LoadBackends(outputDir)
+    link = Link()
+    errors = []
+    for other in sorted(set([0, otherPerExpected])):
+        errors.extend(Run((hk, status), link, messages, other, False))
+    errors.extend(Run((hk, status), link, messages, otherPerExpected, True))
+    errors.extend(Check((hk, status), link, tm_dispatcher))
+    for what in errors:
+        print(what)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
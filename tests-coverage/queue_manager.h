@@ -0,0 +1,17 @@
+/*
+ * The mqueue and GUI benchmarks (see Makefile.mqueue and Makefile.gui)
+ * build the generated glue with mqueueBench.c - a minimal stand-in of the
+ * queue manager of the TASTE runtime: each message is the type (an int)
+ * of the TM, followed by its data.
+ */
+#ifndef __QUEUE_MANAGER_H__
+#define __QUEUE_MANAGER_H__
+
+#include <mqueue.h>
+
+int open_exchange_queue_for_reading(char *queue_name, mqd_t *queue_id);
+int open_exchange_queue_for_writing(char *queue_name, mqd_t *queue_id);
+int retrieve_message_from_queue(mqd_t queue_id, int message_size, void *message_data_received, int *message_received_type);
+int write_message_to_queue(mqd_t queue_id, int message_size, void *message_data, int message_type);
+
+#endif
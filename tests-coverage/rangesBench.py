@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+'''
+The benchmark of the range checks (see Makefile.ranges): times
+VerifyRanges on "diamonds" of SEQUENCEs with the given numbers of
+levels - where both types of each level contain both types of the
+level below, so a level-N type reaches the INTEGERs at the bottom
+via 2**N paths. (Each diamond is made of new nodes, so none of them
+counts as already verified.)
+
+    rangesBench.py levels [levels] ...
+
+Also checks that a missing range at the bottom of the diamond is
+reported once, along with the (two) fields that refer to it.
+'''
+import io
+import sys
+import time
+import contextlib
+
+from dmt.commonPy import asnAST, verify
+
+
+def Diamond(levels, bottomRange=(0, 5)):
+    '''The types of the diamond - T-0-a/T-0-b are INTEGERs, and every
+T-i-a/T-i-b is a SEQUENCE { x T-(i-1)-a, y T-(i-1)-b }'''
+    names = {
+        'T-0-a': asnAST.AsnInt(range=[0, 5], asnFilename='diamond.asn', lineno=1),
+        'T-0-b': asnAST.AsnInt(range=list(bottomRange), asnFilename='diamond.asn', lineno=2),
+    }
+    for i in range(1, levels + 1):
+        for side in 'ab':
+            names['T-%d-%s' % (i, side)] = asnAST.AsnSequence(members=[
+                (field, asnAST.AsnMetaMember(containedType='T-%d-%s' % (i - 1, below)))
+                for field, below in [('x', 'a'), ('y', 'b')]])
+    return names
+
+
+def main():
+    errors = []
+    for levels in [int(x) for x in sys.argv[1:]]:
+        names = Diamond(levels)
+        start = time.time()
+        verify.VerifyRanges('T-%d-a' % levels, names)
+        print("VerifyRanges, %3d levels (%d types): %.4f s" % (levels, len(names), time.time() - start))
+
+    # The INTEGER without a range is reported once, with its referrers
+    names = Diamond(3, ())
+    report = io.StringIO()
+    with contextlib.redirect_stderr(report):
+        try:
+            verify.VerifyRangesOfTypes(list(names.keys()), names)
+            errors.append("The INTEGER without a range was not reported")
+        except SystemExit:
+            pass
+    if report.getvalue().count("must have a range constraint") != 1:
+        errors.append("The INTEGER without a range was not reported once:\n" + report.getvalue())
+    elif "(used in: T-1-a.y, T-1-b.y)" not in report.getvalue():
+        errors.append("The fields that use the INTEGER without a range were not reported:\n" + report.getvalue())
+
+    for what in errors:
+        print(what)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+'''
+The benchmark of the register allocation of the VHDL mapper (see
+Makefile.registers): times the given number of RegistersAllocated calls
+on a 240-byte parameter type, i.e. a SEQUENCE with a SEQUENCE OF
+SEQUENCEs (of an INTEGER, a BOOLEAN and an OCTET STRING) in it.
+
+    registersBench.py calls
+
+Also checks the sizes of the types - and that the sizes of a new AST
+(e.g. the one that a "dmt serve" daemon parses for its next request)
+are computed again, even when its types have the same names.
+'''
+import sys
+import time
+
+from dmt.commonPy import asnAST, asnParser
+from dmt.B_mappers import vhdl_B_mapper
+
+# The size (in bytes) of the types, for each SIZE of T-Oct
+EXPECTED_SIZES = {
+    6: {'T-Int': 8, 'T-Oct': 8, 'T-Elem': 20, 'T-Param': 240},
+    10: {'T-Int': 8, 'T-Oct': 12, 'T-Elem': 24, 'T-Param': 280},
+}
+
+
+def Grammar(octetStringSize):
+    '''T-Param ::= SEQUENCE { x SEQUENCE (SIZE(10)) OF T-Elem, y T-Int, z OCTET STRING (SIZE(32)) },
+with T-Elem ::= SEQUENCE { a T-Int, b BOOLEAN, c T-Oct }'''
+    def Member(typename):
+        return asnAST.AsnMetaMember(containedType=typename)
+    names = {
+        'T-Int': asnAST.AsnInt(range=[0, 255]),
+        'T-Oct': asnAST.AsnOctetString(range=[octetStringSize, octetStringSize]),
+        'T-Elem': asnAST.AsnSequence(members=[
+            ('a', Member('T-Int')), ('b', asnAST.AsnBool()), ('c', Member('T-Oct'))]),
+        'T-Param': asnAST.AsnSequence(members=[
+            ('x', asnAST.AsnSequenceOf(range=[10, 10], containedType='T-Elem')),
+            ('y', Member('T-Int')),
+            ('z', asnAST.AsnOctetString(range=[32, 32]))]),
+    }
+    leafTypes = {'T-Int': 'INTEGER', 'T-Oct': 'OCTET STRING', 'T-Elem': 'SEQUENCE', 'T-Param': 'SEQUENCE'}
+    leafTypes.update((x, x) for x in ['INTEGER', 'BOOLEAN', 'OCTET STRING'])
+    return names, leafTypes
+
+
+def main():
+    calls = int(sys.argv[1])
+    errors = []
+    for octetStringSize in [6, 10]:
+        names, leafTypes = Grammar(octetStringSize)
+        asnParser.g_names.clear()
+        asnParser.g_names.update(names)
+        asnParser.g_leafTypeDict.clear()
+        asnParser.g_leafTypeDict.update(leafTypes)
+        start = time.time()
+        for _ in range(calls):
+            vhdl_B_mapper.RegistersAllocated('T-Param')
+        print("T-Oct of %2d bytes: %d RegistersAllocated('T-Param') calls in %.4f s" % (
+            octetStringSize, calls, time.time() - start))
+        sizes = {typename: vhdl_B_mapper.RegistersAllocated(typename) for typename in names}
+        if sizes != EXPECTED_SIZES[octetStringSize]:
+            errors.append("T-Oct of %d bytes: unexpected sizes %s" % (octetStringSize, sizes))
+    for what in errors:
+        print(what)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+'''
+Writes (to stdout) the grammar of the type size checks of asn2aadlPlus
+(see Makefile.sizes), with the given number of types: half of them are
+INTEGERs, and the rest SEQUENCEs that contain them - or SEQUENCE OFs of
+these SEQUENCEs. With 1000 types, T-903 contains T-803, that contains
+T-303. If a second argument is given, the range of that INTEGER is
+widened (and so, the definitions of the types that depend on it change).
+'''
+import sys
+
+total = int(sys.argv[1])
+edited = int(sys.argv[2]) if len(sys.argv) > 2 else None
+ints = total // 2
+seqs = total * 2 // 5
+lists = total - ints - seqs
+
+print('BigGrammar DEFINITIONS AUTOMATIC TAGS ::= BEGIN\n')
+for i in range(ints):
+    print('T-%d ::= INTEGER (0..%d)' % (i, i + 1 if i != edited else 100000 + i))
+for i in range(seqs):
+    print('T-%d ::= SEQUENCE { a T-%d, b BOOLEAN }' % (ints + i, i))
+for i in range(lists):
+    print('T-%d ::= SEQUENCE (SIZE(1..4)) OF T-%d' % (ints + seqs + i, ints + seqs - lists + i))
+print('\nEND')
@@ -0,0 +1,76 @@
+/*
+ * The -snprint benchmark (see Makefile.snprint): N threads print the
+ * same 200-field SEQUENCE, M times each - via PrintT_Big, or (with a
+ * third argument) via PrintASN1T_Big.
+ */
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <pthread.h>
+#include <time.h>
+#include "PrintTypes.h"
+#include "PrintTypesAsASN1.h"
+
+static asn1SccT_Big g_big;
+static int g_messages, g_asn1;
+
+static void SetField_asn1SccT_Int(asn1SccT_Int *p, int k) { *p = k * 37 - 500; }
+static void SetField_asn1SccT_Real(asn1SccT_Real *p, int k) { *p = k / 3.0; }
+static void SetField_asn1SccT_Bool(asn1SccT_Bool *p, int k) { *p = k & 1; }
+static void SetField_asn1SccT_Enum(asn1SccT_Enum *p, int k) { *p = (asn1SccT_Enum) ((k >> 1) & 1); }
+static void SetField_asn1SccT_Oct(asn1SccT_Oct *p, int k) { memcpy(p->arr, "abcd", 4); p->arr[k % 4] = 'A' + k % 26; }
+static void SetField_asn1SccT_List(asn1SccT_List *p, int k) { int i; p->nCount = k % 5; for (i = 0; i < 4; i++) p->arr[i] = k + i; }
+static void SetField_asn1SccT_Choice(asn1SccT_Choice *p, int k)
+{
+    /* The first alternative (a) is 1, the second (b) is 2 */
+    p->kind = (k & 1) ? 1 : 2;
+    if (k & 1)
+        p->u.a = k;
+    else
+        p->u.b = 1;
+}
+
+static void *Worker(void *arg)
+{
+    char name[16];
+    int i;
+    snprintf(name, sizeof name, "t%ld", (long) arg);
+    for (i = 0; i < g_messages; i++) {
+        if (g_asn1) {
+            PrintASN1T_Big(name, &g_big);
+            printf("\n");
+        } else
+            PrintT_Big(name, &g_big);
+    }
+    return NULL;
+}
+
+int main(int argc, char **argv)
+{
+    pthread_t threads[64];
+    struct timespec start, end;
+    long i, nThreads;
+    int k = 0;
+    double seconds;
+
+    if (argc < 3 || (nThreads = atol(argv[1])) < 1 || nThreads > 64) {
+        fprintf(stderr, "Usage: %s threads messages [asn1]\n", argv[0]);
+        return 1;
+    }
+    g_messages = atoi(argv[2]);
+    g_asn1 = argc > 3;
+#define F(i, t) SetField_##t(&g_big.f##i, k++);
+#include "BigSequence_fields.inc"
+#undef F
+    clock_gettime(CLOCK_MONOTONIC, &start);
+    for (i = 0; i < nThreads; i++)
+        pthread_create(&threads[i], NULL, Worker, (void *) i);
+    for (i = 0; i < nThreads; i++)
+        pthread_join(threads[i], NULL);
+    fflush(stdout);
+    clock_gettime(CLOCK_MONOTONIC, &end);
+    seconds = (end.tv_sec - start.tv_sec) + (end.tv_nsec - start.tv_nsec) / 1e9;
+    fprintf(stderr, "%ld threads x %d messages: %.3f s, %.1f us/message\n",
+            nThreads, g_messages, seconds, seconds * 1e6 / (nThreads * g_messages));
+    return 0;
+}
@@ -0,0 +1,29 @@
+#!/usr/bin/env python3
+'''
+Writes the inputs of the -snprint benchmark (see Makefile.snprint) in the
+given folder: BigSequence.asn, with a 200-field SEQUENCE of all the kinds
+of types that the printers handle, and BigSequence_fields.inc, that lists
+the fields (as F(index, type)) for snprintBench.c to fill them in.
+'''
+import os
+import sys
+
+kinds = ['T-Int', 'T-Real', 'T-Bool', 'T-Enum', 'T-Oct', 'T-Choice', 'T-List']
+fields = [(i, kinds[i % len(kinds)]) for i in range(200)]
+
+with open(os.path.join(sys.argv[1], 'BigSequence.asn'), 'w') as f:
+    f.write('BigSequence DEFINITIONS AUTOMATIC TAGS ::= BEGIN\n\n')
+    f.write('T-Int ::= INTEGER (-100000..100000)\n')
+    f.write('T-Real ::= REAL (-1000.0..1000.0)\n')
+    f.write('T-Bool ::= BOOLEAN\n')
+    f.write('T-Enum ::= ENUMERATED { red, green }\n')
+    f.write('T-Oct ::= OCTET STRING (SIZE(4))\n')
+    f.write('T-Choice ::= CHOICE { a INTEGER (0..255), b BOOLEAN }\n')
+    f.write('T-List ::= SEQUENCE (SIZE(0..4)) OF INTEGER (0..255)\n\n')
+    f.write('T-Big ::= SEQUENCE {\n')
+    f.write(',\n'.join('    f%d %s' % (i, kind) for i, kind in fields))
+    f.write('\n}\n\nEND\n')
+
+with open(os.path.join(sys.argv[1], 'BigSequence_fields.inc'), 'w') as f:
+    for i, kind in fields:
+        f.write('F(%d, asn1Scc%s)\n' % (i, kind.replace('-', '_')))
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+'''
+Runs asn2dataModel with the SQL tables emitted in the order of the original
+sql_A_mapper.OnShutdown - that swept the list of types over and over, until
+no more could be emitted. Makefile.M2M uses it to check that DependencyOrder
+generates exactly the same .sql files.
+'''
+import sys
+
+from dmt import asn2dataModel
+from dmt.A_mappers import sql_A_mapper
+
+
+def SweepOrder(typenameList, dependencyGraph):
+    dependencyGraph = {k: dict(v) for k, v in dependencyGraph.items()}
+    result = []
+    typesDoneSoFar = set()
+
+    workRemains = True
+    while workRemains:
+        workRemains = False
+        for nodeTypename in typenameList:
+
+            # only emit for types with no more dependencies
+            if nodeTypename in dependencyGraph and \
+                    dependencyGraph[nodeTypename]:
+                continue
+
+            # only emit each type once
+            if nodeTypename in typesDoneSoFar:
+                continue
+            typesDoneSoFar.add(nodeTypename)
+
+            # if we process even one type, deps may be removed,
+            # so scan again next time
+            workRemains = True
+
+            result.append(nodeTypename)
+
+            # eliminate nodeTypename from dependency lists
+            for t in typenameList:
+                if t in dependencyGraph and \
+                        nodeTypename in dependencyGraph[t]:
+                    del dependencyGraph[t][nodeTypename]
+    return result
+
+
+if __name__ == "__main__":
+    sql_A_mapper.DependencyOrder = SweepOrder
+    asn2dataModel.main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+'''
+The SQLAlchemy benchmark (see Makefile.sqlalchemy): saves records of the
+T-SET and T-ARR types of DataTypesSimulink.asn in a SQLite file, via the
+models that asn2dataModel generated (in the given folder) - one at a time
+with save(), and with bulk_save in batches of various sizes - and loads
+them back, one at a time with loadFromDB, and all at once with
+loadManyFromDB (counting the queries they run).
+
+    sqlalchemyBench.py outputDir records
+
+The Python A mapper module is replaced by minimal stand-ins of its
+proxies (only the constructors of the _SQL classes use them). The
+records must read back as they were saved, and bulk_save must reject
+the objects that are already saved.
+'''
+import os
+import sys
+import time
+import types
+
+from sqlalchemy import create_engine, event, func
+from sqlalchemy.orm import sessionmaker
+
+
+class Proxy:
+    '''Stand-in of the python A mapper proxies, over a plain value'''
+    def __init__(self, value):
+        self._value = value
+
+    def Get(self):
+        return self._value
+
+    def GetState(self):
+        return None
+
+    def Reset(self, unused_state):
+        pass
+
+    def GetLength(self):
+        return len(self._value)
+
+    def __getitem__(self, idx):
+        return Proxy(self._value[idx])
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return Proxy(self._value[name])
+
+
+def LoadModels(outputDir):
+    sys.path.insert(0, outputDir)
+    for module in ['DataTypesSimulink_asn', 'DV']:
+        sys.modules[module] = types.ModuleType(module)
+    # (the type classes are only used by the asn1 properties)
+    sys.modules['DataTypesSimulink_asn'].__getattr__ = lambda unused_name: Proxy
+    import datatypessimulink_model
+    return datatypessimulink_model
+
+
+def Records(models, count):
+    '''count T-SET and T-ARR objects, and the values they must read back as'''
+    for i in range(count):
+        if i % 2:
+            value = {'data1': i % 131072, 'data2': i % 1000 / 10.0 - 90, 'data3': i % 1024, 'data4': -(i % 1310720)}
+            yield models.T_SET_SQL(Proxy(value)), value
+        else:
+            value = [(i + j) % 32764 for j in range(5 + i % 4 // 2)]
+            yield models.T_ARR_SQL(Proxy(value)), value
+
+
+def ReadBack(obj):
+    if hasattr(obj, 'arrIndexes_T_ARR'):
+        return [x.data.data for x in sorted(obj.arrIndexes_T_ARR, key=lambda x: x.idx)]
+    return {f: getattr(obj, f).data for f in ['data1', 'data2', 'data3', 'data4']}
+
+
+def Rows(session, models):
+    return sum(
+        session.execute(func.count(table.c.iid)).scalar()
+        for table in models.Base.metadata.sorted_tables)
+
+
+def main():
+    outputDir, count = sys.argv[1], int(sys.argv[2])
+    models = LoadModels(outputDir)
+    dbFile = os.path.join(outputDir, 'bench.db')
+    errors = []
+
+    def Run(what, save):
+        if os.path.exists(dbFile):
+            os.unlink(dbFile)
+        engine = create_engine('sqlite:///' + dbFile)
+        models.Base.metadata.create_all(engine)
+        session = sessionmaker(bind=engine)()
+        records = list(Records(models, count))
+        start = time.time()
+        iids = save(session, [obj for obj, _ in records])
+        elapsed = time.time() - start
+        rows = Rows(session, models)
+        print("%-32s %6d rows, %6.0f rows/s" % (what, rows, rows / elapsed))
+
+        # Every record reads back as it was saved, in a new session...
+        session.close()
+        session = sessionmaker(bind=engine)()
+        for cls in [models.T_SET_SQL, models.T_ARR_SQL]:
+            clsIids = [iid for iid, (obj, _) in zip(iids, records) if isinstance(obj, cls)]
+            clsValues = [value for obj, value in records if isinstance(obj, cls)]
+            if [ReadBack(x) for x in cls.loadManyFromDB(session, clsIids)] != clsValues:
+                errors.append("%s: the %s records don't read back as saved" % (what, cls.__name__))
+
+        # ...and a batch with an already saved object is rejected, as a whole
+        if what.startswith('bulk_save'):
+            new, _ = next(Records(models, 2))
+            old = models.T_SET_SQL.loadFromDB(session, iids[1])
+            try:
+                models.bulk_save(session, [new, old])
+                errors.append("%s: an already saved object was saved again" % what)
+            except ValueError:
+                session.rollback()
+            if Rows(session, models) != rows:
+                errors.append("%s: a rejected batch added rows" % what)
+        session.close()
+        engine.dispose()
+        return iids, records
+
+    Run("save() per record", lambda session, objects: [obj.save(session) for obj in objects])
+    for batchSize in [1, 100, 1000]:
+        iids, records = Run("bulk_save, %d records/commit" % batchSize,
+                            lambda session, objects: models.bulk_save(session, objects, batchSize))
+
+    # Loading the (last) records back - one at a time, and all at once
+    engine = create_engine('sqlite:///' + dbFile)
+    queries = []
+    event.listen(engine, 'before_cursor_execute', lambda *args: queries.append(1))
+    for what, load in [
+            ("loadFromDB per record", lambda session, cls, clsIids: [cls.loadFromDB(session, iid) for iid in clsIids]),
+            ("loadManyFromDB", lambda session, cls, clsIids: cls.loadManyFromDB(session, clsIids))]:
+        session = sessionmaker(bind=engine)()
+        del queries[:]
+        start = time.time()
+        for cls in [models.T_SET_SQL, models.T_ARR_SQL]:
+            clsIids = [iid for iid, (obj, _) in zip(iids, records) if isinstance(obj, cls)]
+            clsValues = [value for obj, value in records if isinstance(obj, cls)]
+            if [ReadBack(x) for x in load(session, cls, clsIids)] != clsValues:
+                errors.append("%s: the %s records don't read back as saved" % (what, cls.__name__))
+        print("%-32s %6d records, %6.0f records/s, %6d queries" % (
+            what, len(records), len(records) / (time.time() - start), len(queries)))
+        session.close()
+    session = sessionmaker(bind=engine)()
+    if [x is None for x in models.T_SET_SQL.loadManyFromDB(session, [iids[1], -1, iids[3]])] != [False, True, False]:
+        errors.append("loadManyFromDB: an unknown iid is not loaded as None")
+    session.close()
+    engine.dispose()
+    os.unlink(dbFile)
+
+    for what in errors:
+        print(what)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
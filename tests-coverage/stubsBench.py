@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+'''
+The micro-benchmark of Stubs.py (see Makefile.stubs), run in the folder
+where the Python A mapper outputs of stubsBench.asn were built: the rate
+of SetFromPyString/GetPyString calls on short strings, of encode + decode
+round trips (set the field, encode it, read the stream, write it back,
+decode it, read the field) of larger ones, and of the Get/Set calls on
+the nested fields and cells of T-Arr - as well as the time it takes to
+set all the fields of T-Big, saving and restoring the access path of
+each element around every field. Also checks that SetFromPyString
+rejects the strings that don't fit in the OCTET STRING.
+'''
+import sys
+import time
+
+import stubsBench_asn as ASN1
+from Stubs import AsnCoderError
+
+# (see stubsBench.asn)
+MAX_SIZE = 65536
+
+
+def Rate(what, seconds=1):
+    '''Runs what() for the given time - returns the calls per second'''
+    count, start = 0, time.time()
+    while time.time() - start < seconds:
+        what()
+        count += 1
+    return count / (time.time() - start)
+
+
+def main():
+    errors = []
+    src, dst = ASN1.T_Oct(), ASN1.T_Oct()
+
+    # The strings that fit are accepted, the others are rejected - and
+    # leave the value as it was
+    src.SetFromPyString(b'x' * MAX_SIZE)
+    src.SetFromPyString(b'abc')
+    try:
+        src.SetFromPyString(b'x' * (MAX_SIZE + 1))
+        errors.append("A string of %d bytes was accepted in T-Oct" % (MAX_SIZE + 1))
+    except AsnCoderError:
+        pass
+    if src.GetPyString() != 'abc':
+        errors.append("A rejected string changed T-Oct")
+
+    payload = 'sixteen bytes...'
+    src.SetFromPyString(payload)
+    print("%6d bytes: SetFromPyString %8.0f calls/s, GetPyString %8.0f calls/s" % (
+        len(payload),
+        Rate(lambda: src.SetFromPyString(payload)),
+        Rate(src.GetPyString)))
+
+    for size in (1024, 16384, MAX_SIZE):
+        payload = bytes((i * 7) % 256 for i in range(size)).decode('latin-1')
+        stream = ASN1.DataStream(size + 4)
+        stream2 = ASN1.DataStream(size + 4)
+
+        def RoundTrip():
+            src.SetFromPyString(payload)
+            src.Encode(stream)
+            stream2.SetBuffer(stream.GetBuffer())
+            dst.Decode(stream2)
+            return dst.GetPyString()
+        if RoundTrip() != payload:
+            errors.append("A %d byte string changed in an encode/decode round trip" % size)
+        print("%6d bytes: %8.0f round trips/s" % (size, Rate(RoundTrip)))
+
+    # The accessors of nested fields/cells - resolved once per access path
+    arr = ASN1.T_Arr()
+    arr.SetLength(10)
+    for i in range(10):
+        arr[i].a.Set(i * 1000)
+        arr[i].b.SetLength(5)
+        for j in range(5):
+            arr[i].b[j].Set(i * 10 + j)
+    if [arr[i].a.Get() for i in range(10)] != [i * 1000 for i in range(10)] or \
+            [arr[i].b[j].Get() for i in range(10) for j in range(5)] != [i * 10 + j for i in range(10) for j in range(5)]:
+        errors.append("The values set in T-Arr read back differently")
+    print("T-Arr[i].a:    Get %8.0f calls/s, Set %8.0f calls/s" % (
+        Rate(lambda: arr[3].a.Get()), Rate(lambda: arr[3].a.Set(3000))))
+    print("T-Arr[i].b[j]: Get %8.0f calls/s, Set %8.0f calls/s" % (
+        Rate(lambda: arr[3].b[4].Get()), Rate(lambda: arr[3].b[4].Set(34))))
+
+    # Walking T-Big as the GSER dumpers do: remembering the access path
+    # of each element (GetState), and going back to it (Reset) after
+    # every field
+    big = ASN1.T_Big()
+    start = time.time()
+    for i in range(1000):
+        elem = big[i]
+        state = elem.GetState()
+        for k in range(20):
+            getattr(elem, 'f%d' % k).Set(i + k)
+            big.Reset(state)
+        big.Reset()
+    print("T-Big: %.3f s to set its 20000 fields, with a GetState/Reset per field" % (time.time() - start))
+    elem = arr[9].b
+    print("T-Arr[i].b: GetState + Reset %8.0f calls/s" % Rate(lambda: arr.Reset(elem.GetState())))
+    if [big[i].f0.Get() for i in (0, 500, 999)] != [0, 500, 999] or big[999].f19.Get() != 999 + 19:
+        errors.append("The fields set in T-Big read back differently")
+
+    for what in errors:
+        print(what)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())